@@ -4,9 +4,10 @@ import math
 import re
 import statistics
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 from utils.models import model_manager
 from config.settings import settings
+from utils.a2a import card_response, llm_stats, sse_response, task_stream_events
 
 app = FastAPI()
 
@@ -96,8 +97,12 @@ class CalculatorAgent:
         except Exception as e:
             return {"error": f"Trend analysis error: {str(e)}"}
     
-    def intelligent_calculate(self, text: str) -> str:
+    async def intelligent_calculate(self, text: str) -> str:
         """Enhanced calculation that can handle various types of input"""
+        return "".join([chunk async for chunk in self.intelligent_calculate_stream(text)])
+
+    async def intelligent_calculate_stream(self, text: str) -> AsyncIterator[str]:
+        """Streaming variant of intelligent_calculate; only the LLM analysis is token-streamed"""
         # Check if it's a simple mathematical expression first
         simple_expr_patterns = [
             r'^[\d\+\-\*/\(\)\.\s%]+$',  # Simple math expression
@@ -112,7 +117,8 @@ class CalculatorAgent:
                 try:
                     parsed = self.parse_math_expression(text)
                     result = eval(parsed, {"__builtins__": {}, "math": math})
-                    return f"Calculation result: {result}"
+                    yield f"Calculation result: {result}"
+                    return
                 except:
                     pass  # Fall through to statistical analysis
         
@@ -134,11 +140,15 @@ class CalculatorAgent:
             If there are specific numbers, provide calculations. If the content describes trends without exact numbers, provide qualitative analysis."""
 
             try:
-                response = model_manager.azure_llm.invoke(prompt)
-                content = response.content if hasattr(response, 'content') else str(response)
-                return f"Statistical Analysis:\n{content}"
+                header_sent = False
+                async for chunk in model_manager.astream(prompt):
+                    if not header_sent:
+                        yield "Statistical Analysis:\n"
+                        header_sent = True
+                    yield chunk
             except Exception as e:
-                return f"Unable to perform numerical analysis on the provided content. Error: {str(e)}"
+                yield f"Unable to perform numerical analysis on the provided content. Error: {str(e)}"
+            return
         
         # Perform statistical analysis on extracted numbers
         stats = self.calculate_statistics(numbers)
@@ -167,7 +177,7 @@ class CalculatorAgent:
                 f"• Volatility: {trends['volatility']:.2f}%"
             ])
         
-        return "\n".join(filter(None, response_parts))
+        yield "\n".join(filter(None, response_parts))
     
     def parse_math_expression(self, text: str) -> str:
         # Try to extract expression inside quotes if present
@@ -194,14 +204,16 @@ class CalculatorAgent:
 calculator_agent = CalculatorAgent()
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": calculator_agent.name,
         "description": calculator_agent.description,
         "version": "1.0.0",
         "capabilities": ["mathematical_calculations", "statistical_analysis", "data_extraction", "trend_analysis", "expression_evaluation"],
         "endpoints": {"a2a": "/"}
-    }
+    })
+
+app.add_api_route("/stats", llm_stats)
 
 @app.post("/")
 async def handle_a2a(request: Request):
@@ -211,7 +223,7 @@ async def handle_a2a(request: Request):
     
     if method == "sendTask":
         user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
-        result = calculator_agent.intelligent_calculate(user_message)
+        result = await calculator_agent.intelligent_calculate(user_message)
         
         return JSONResponse({
             "jsonrpc": "2.0",
@@ -224,6 +236,11 @@ async def handle_a2a(request: Request):
             }
         })
     
+    if method == "sendTaskSubscribe":
+        user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
+        chunks = calculator_agent.intelligent_calculate_stream(user_message)
+        return sse_response(data.get("id"), task_stream_events(params.get("id"), chunks))
+    
     return JSONResponse({"error": "Invalid method"}, status_code=400)
 
 if __name__ == "__main__":
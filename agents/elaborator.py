@@ -1,7 +1,9 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from typing import AsyncIterator
 from utils.models import model_manager
 from config.settings import settings
+from utils.a2a import card_response, llm_stats, sse_response, task_stream_events
 
 app = FastAPI()
 
@@ -10,31 +12,35 @@ class ElaboratorAgent:
         self.name = "Elaborator Agent"
         self.description = "Provides detailed explanations for given topics"
     
-    def elaborate_topic(self, topic: str) -> str:
-        """Use LLM to elaborate on the given topic"""
-        prompt = f"""The following topic needs to be elaborated on:
+    def build_prompt(self, topic: str) -> str:
+        return f"""The following topic needs to be elaborated on:
 
 Topic:
 {topic}
 
 Please provide a detailed explanation, including examples and additional context."""
-        
-        response = model_manager.azure_llm.invoke(prompt)
-        if hasattr(response, 'content'):
-            return response.content
-        return str(response)
+
+    async def elaborate_topic(self, topic: str) -> str:
+        """Use LLM to elaborate on the given topic"""
+        return await model_manager.ainvoke(self.build_prompt(topic))
+
+    def elaborate_topic_stream(self, topic: str) -> AsyncIterator[str]:
+        """Stream the elaboration of the given topic token by token"""
+        return model_manager.astream(self.build_prompt(topic))
 
 elaborator_agent = ElaboratorAgent()
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": elaborator_agent.name,
         "description": elaborator_agent.description,
         "version": "1.0.0",
         "capabilities": ["topic_elaboration", "detailed_explanation", "llm_analysis"],
         "endpoints": {"a2a": "/"}
-    }
+    })
+
+app.add_api_route("/stats", llm_stats)
 
 @app.post("/")
 async def handle_a2a(request: Request):
@@ -44,7 +50,7 @@ async def handle_a2a(request: Request):
     
     if method == "sendTask":
         user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
-        result = elaborator_agent.elaborate_topic(user_message)
+        result = await elaborator_agent.elaborate_topic(user_message)
         
         return JSONResponse({
             "jsonrpc": "2.0",
@@ -57,6 +63,11 @@ async def handle_a2a(request: Request):
             }
         })
     
+    if method == "sendTaskSubscribe":
+        user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
+        chunks = elaborator_agent.elaborate_topic_stream(user_message)
+        return sse_response(data.get("id"), task_stream_events(params.get("id"), chunks))
+    
     return JSONResponse({"error": "Invalid method"}, status_code=400)
 
 if __name__ == "__main__":
@@ -1,27 +1,66 @@
-from fastapi import FastAPI, Request
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, Request, UploadFile
 from fastapi.responses import JSONResponse
+from typing import AsyncIterator, Dict, Any, List, Tuple
 from utils.vector_store import vector_store
+from utils.context_packer import context_packer
+from utils.reranker import reranker
+from utils.ingest_jobs import ingest_jobs
+from utils.a2a import card_response, sse_response, task_stream_events
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Jobs interrupted by a restart are picked up again before new ones
+    ingest_jobs.start()
+    yield
+    ingest_jobs.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 class FileReaderAgent:
     def __init__(self):
         self.name = "File Reader Agent"
         self.description = "Reads and extracts content from vector store"
     
-    async def query_vector_store(self, query: str) -> str:
-        # Always reload the latest vector store index/metadata before querying
-        vector_store.load_index()
-        stats = vector_store.get_stats()
-        print(f"[FileReaderAgent] Loaded vector store: {stats}")
-        print(f"[FileReaderAgent] First 3 docs: {vector_store.documents[:3]}")
-        print(f"[FileReaderAgent] First 3 metadata: {vector_store.metadata[:3]}")
-        # Always use vector search to fetch relevant chunks, then use LLM to answer the query based on those chunks
-        results = vector_store.similarity_search(query, k=5)
+    def _retrieve(self, query: str,
+                  metadata_filter: Dict[str, Any] = None) -> Tuple[List[Tuple[str, float, Dict[str, Any]]], str]:
+        """Ranked chunks and the packed context for a query.
+
+        Everything here blocks (store lock, query embedding, cross-encoder, tokenizer), so it runs
+        off the event loop in one worker thread call.
+        """
+        # Pick up files vectorized since the last query; a stat call when nothing changed
+        vector_store.refresh()
+        # Hybrid retrieval (dense + BM25, fused by reciprocal rank) fetches the relevant chunks,
+        # optionally re-ranked by a cross-encoder
+        k = reranker.candidates if reranker.enabled else 5
+        results = vector_store.hybrid_search(query, k=k, filter=metadata_filter)
+        if results and reranker.enabled:
+            results = reranker.rerank(query, results)
+        if not results:
+            return results, ""
+        # Compose a context from the top chunks, deduplicated and trimmed to the token budget
+        context, _ = context_packer.pack(query, [doc for doc, _, _ in results])
+        return results, context
+
+    async def query_vector_store(self, query: str, metadata_filter: Dict[str, Any] = None) -> str:
+        return "".join([chunk async for chunk in self.query_vector_store_stream(query, metadata_filter)])
+
+    async def query_vector_store_stream(self, query: str,
+                                        metadata_filter: Dict[str, Any] = None) -> AsyncIterator[str]:
+        """Answer the query from the vector store, streaming the LLM answer token by token.
+
+        metadata_filter restricts the search to matching chunks, e.g. {"filename": "report.pdf"}.
+        """
+        try:
+            results, context = await asyncio.to_thread(self._retrieve, query, metadata_filter)
+        except ValueError as e:
+            yield f"Invalid filter: {e}"
+            return
         if results:
             from utils.models import model_manager
-            # Compose a context from the top chunks
-            context = "\n---\n".join(doc for doc, _, _ in results)
+            # The LLM answers the query based on the packed chunks
             prompt = (
                 f"You are a helpful assistant. The user asked: '{query}'.\n"
                 f"Here are the most relevant excerpts from the uploaded files:\n\n{context}\n\n"
@@ -29,42 +68,77 @@ class FileReaderAgent:
                 "If the answer is not present, say 'The answer is not found in the provided documents.'"
             )
             try:
-                summary = model_manager.azure_llm.invoke(prompt)
-                if hasattr(summary, 'content'):
-                    return summary.content
-                return str(summary)
+                async for chunk in model_manager.astream(prompt):
+                    yield chunk
             except Exception as e:
-                return f"No relevant content found in the vector store. (LLM summary failed: {e})"
-        # If no results, fallback to LLM summary over all docs
-        if vector_store.documents:
-            from utils.models import model_manager
-            all_context = "\n---\n".join(vector_store.documents[:10])
-            prompt = (
-                f"You are a helpful assistant. The user asked: '{query}'.\n"
-                f"Here are some excerpts from the uploaded files:\n\n{all_context}\n\n"
-                "Based on this information, provide a concise, direct answer to the user's question. "
-                "If the answer is not present, say 'The answer is not found in the provided documents.'"
-            )
-            try:
-                summary = model_manager.azure_llm.invoke(prompt)
-                if hasattr(summary, 'content'):
-                    return summary.content
-                return str(summary)
-            except Exception as e:
-                return f"No relevant content found in the vector store. (LLM summary failed: {e})"
-        return "No relevant content found in the vector store."
+                yield f"No relevant content found in the vector store. (LLM summary failed: {e})"
+            return
+        if metadata_filter:
+            yield "No content in the vector store matches the filter."
+            return
+        # Hybrid search returns hits whenever a live chunk exists, so the store is empty (or all deleted)
+        yield "No relevant content found in the vector store."
 
 file_reader_agent = FileReaderAgent()
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": file_reader_agent.name,
         "description": file_reader_agent.description,
         "version": "1.0.0",
         "capabilities": ["file_reading", "vector_search"],
         "endpoints": {"a2a": "/"}
-    }
+    })
+
+@app.get("/stats")
+async def stats():
+    """Vector store size, index layout, per-stage latencies (search, rerank), embedding and LLM cache hit
+    rates and prompt context token usage"""
+    from utils.embeddings import embedding_manager
+    from utils.models import model_manager
+    return JSONResponse({**vector_store.get_stats(), "rerank": reranker.get_stats(),
+                         "embeddings": embedding_manager.get_stats(), "context": context_packer.get_stats(),
+                         "llm": model_manager.get_stats()})
+
+def _delete_documents(filename: str = None) -> int:
+    with vector_store._lock:
+        vector_store.refresh()
+        if filename is None:
+            removed = vector_store.docs.live
+            vector_store.clear()
+            return removed
+        removed = vector_store.delete(filename=filename)
+        vector_store.save_index()
+        return removed
+
+@app.delete("/documents")
+async def delete_documents(filename: str = None):
+    """Remove one file's chunks, or clear the whole vector store; this agent is its only writer"""
+    removed = await asyncio.to_thread(_delete_documents, filename)
+    return {"removed": removed, "filename": filename}
+
+@app.post("/ingest", status_code=202)
+async def submit_ingest(files: List[UploadFile] = File(...)):
+    """Queue uploaded files for background ingestion; returns the job id right away"""
+    names = [file.filename for file in files]
+    if len(set(names)) != len(names):
+        return JSONResponse({"error": "Duplicate file names in one job"}, status_code=400)
+    job_id = await asyncio.to_thread(ingest_jobs.submit, [(file.filename, file.file) for file in files])
+    return {"job_id": job_id, "status": "queued", "files": names}
+
+@app.get("/ingest")
+async def list_ingest_jobs(limit: int = 50):
+    """Most recent ingestion jobs first"""
+    return {"jobs": await asyncio.to_thread(ingest_jobs.store.list, limit)}
+
+@app.get("/ingest/{job_id}")
+async def ingest_job_status(job_id: str):
+    """Status, per-file progress and checkpoints, and throughput of one ingestion job"""
+    job = await asyncio.to_thread(ingest_jobs.store.get, job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return job
 
 @app.post("/")
 async def handle_a2a(request: Request):
@@ -74,7 +148,8 @@ async def handle_a2a(request: Request):
     
     if method == "sendTask":
         user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
-        result = await file_reader_agent.query_vector_store(user_message)
+        # Optional metadata filter, e.g. {"filename": "report.pdf", "chunk": {"gte": 2, "lte": 5}}
+        result = await file_reader_agent.query_vector_store(user_message, params.get("filter"))
         
         return JSONResponse({
             "jsonrpc": "2.0",
@@ -87,6 +162,11 @@ async def handle_a2a(request: Request):
             }
         })
     
+    if method == "sendTaskSubscribe":
+        user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
+        chunks = file_reader_agent.query_vector_store_stream(user_message, params.get("filter"))
+        return sse_response(data.get("id"), task_stream_events(params.get("id"), chunks))
+    
     return JSONResponse({"error": "Invalid method"}, status_code=400)
 
 if __name__ == "__main__":
@@ -4,10 +4,20 @@ import httpx
 import uuid
 import asyncio
 import traceback
+from contextlib import asynccontextmanager
+from utils.agent_registry import AgentRegistry
+from utils.agent_router import AgentRouter
+from utils.http_client import create_async_client, HostConnectionLimiter
+from config.settings import settings
+from utils.a2a import (card_response, sse_response, status_update_event, artifact_update_event,
+                       aiter_sse_events, event_text)
+from utils.task_events import TaskEventBus
+from utils.task_store import create_task_store
 
-app = FastAPI()
-
-tasks = {}
+tasks = create_task_store()
+task_events = TaskEventBus()
+live_artifacts = {}  # task_id -> {plan index: partial artifact} while agents are streaming
+running_workflows = set()
 
 # List of agent endpoints (excluding orchestrator itself)
 AGENT_ENDPOINTS = [
@@ -20,292 +30,383 @@ AGENT_ENDPOINTS = [
     {"name": "Predictor Agent", "url": "http://localhost:5107/"},
 ]
 
+registry = AgentRegistry(AGENT_ENDPOINTS)
+router = AgentRouter()
+# Card embeddings are computed when a card is first fetched or changes, not per query
+registry.on_change(router.register)
+agent_limiter = HostConnectionLimiter(settings.HTTP_PER_AGENT_CONNECTIONS)
+http_client: httpx.AsyncClient = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One keep-alive pool for the lifetime of the app instead of a client per request
+    global http_client
+    http_client = create_async_client()
+    await registry.start(http_client)
+    yield
+    await registry.stop()
+    await http_client.aclose()
+    http_client = None
+
+app = FastAPI(lifespan=lifespan)
+
 async def fetch_agent_cards():
-    cards = []
-    print(f"[Orchestrator] Fetching agent cards from {len(AGENT_ENDPOINTS)} endpoints...")
-    async with httpx.AsyncClient() as client:
-        for agent in AGENT_ENDPOINTS:
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    url = agent["url"] + ".well-known/agent.json"
-                    print(f"[Orchestrator] Fetching agent card from: {url} (attempt {attempt + 1})")
-                    resp = await client.get(url, timeout=10)
-                    print(f"[Orchestrator] Response from {agent['name']}: {resp.status_code}")
-                    if resp.status_code == 200:
-                        card = resp.json()
-                        card["url"] = agent["url"]
-                        cards.append(card)
-                        print(f"[Orchestrator] Successfully added card for {agent['name']}")
-                        break
-                    else:
-                        print(f"[Orchestrator] Failed to get card for {agent['name']}: {resp.status_code}")
-                        if attempt < max_retries - 1:
-                            await asyncio.sleep(2)
-                except Exception as e:
-                    print(f"[Orchestrator] Exception fetching card for {agent['name']} (attempt {attempt + 1}): {e}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(2)
-                    continue
-    print(f"[Orchestrator] Total cards fetched: {len(cards)}")
+    # Cards come from the registry's background probes, so no agent is contacted here
+    await registry.wait_for_discovery()
+    cards = registry.cards()
+    if not cards:
+        # Cold start: nothing has answered yet; route as soon as the first agent comes up
+        await registry.wait_until_ready(list(registry.agents), first=True)
+        cards = registry.cards()
+    print(f"[Orchestrator] Total cards available: {len(cards)} (ready: {registry.ready_names()})")
     return cards
 
 def match_agents(query, agent_cards):
-    # Enhanced keyword-based matching for multi-agent orchestration
-    query_lower = query.lower()
-    selected = []
+    """Agents for the query: keyword rules first, then embedding similarity to the agent cards"""
     print(f"[Orchestrator] Matching query '{query}' against {len(agent_cards)} agent cards")
-    
-    for card in agent_cards:
-        print(f"[Orchestrator] Checking agent: {card.get('name', 'Unknown')}")
-        # Handle both string and dict capabilities
-        caps_raw = card.get("capabilities", [])
-        caps = []
-        for c in caps_raw:
-            if isinstance(c, str):
-                caps.append(c)
-            elif isinstance(c, dict):
-                caps.extend([str(v).lower() for v in c.values()])
-        desc = card.get("description", "").lower()
-        caps_desc = " ".join(caps) + " " + desc
-        print(f"[Orchestrator] Agent capabilities/desc: {caps_desc}")
-        
-        # Check for File Reader Agent
-        if (any(word in query_lower for word in ["uploaded", "documents", "files", "pdf", "csv", "document", "file"]) and 
-            any(cap in caps_desc for cap in ["file_reading", "vector_search", "file reading"])):
-            selected.append(card)
-            print(f"[Orchestrator] Selected {card['name']} for file reading")
-        # Check for Summarizer Agent  
-        elif (any(word in query_lower for word in ["summarize", "summary", "summarization"]) and 
-              any(cap in caps_desc for cap in ["text_summarization", "summarization", "summarize"])):
-            selected.append(card)
-            print(f"[Orchestrator] Selected {card['name']} for summarization")
-        # Check for Elaborator Agent
-        elif (any(word in query_lower for word in ["elaborate", "explain", "detailed", "detail", "explanation"]) and 
-              any(cap in caps_desc for cap in ["topic_elaboration", "detailed_explanation", "elaboration", "elaborate"])):
-            selected.append(card)
-            print(f"[Orchestrator] Selected {card['name']} for elaboration")
-        # Check for Predictor Agent
-        elif (any(word in query_lower for word in ["predict", "forecast", "future", "trends"]) and 
-              any(cap in caps_desc for cap in ["prediction", "forecasting", "predict"])):
-            selected.append(card)
-            print(f"[Orchestrator] Selected {card['name']} for prediction")
-        # Check for Calculator Agent  
-        elif (any(word in query_lower for word in ["calculate", "result", "math", "percentage", "compute"]) and 
-              any(cap in caps_desc for cap in ["mathematical_calculations", "calculation", "calculate"])):
-            selected.append(card)
-            print(f"[Orchestrator] Selected {card['name']} for calculation")
-        # Check for Web Search Agent
-        elif (any(word in query_lower for word in ["search", "news", "find"]) and 
-              any(cap in caps_desc for cap in ["web_search", "search", "information_retrieval"])):
-            selected.append(card)
-            print(f"[Orchestrator] Selected {card['name']} for search")
-        # Check for Web Scraper Agent
-        elif (any(word in query_lower for word in ["scrape", "extract", "url", "http"]) and 
-              any(cap in caps_desc for cap in ["web_scraping", "scraping", "content_extraction"])):
-            selected.append(card)
-            print(f"[Orchestrator] Selected {card['name']} for scraping")
-    
-    print(f"[Orchestrator] Initial selection: {len(selected)} agents")
-    
-    # Fallback: if nothing matched, use Web Scraper Agent as default
-    if not selected:
-        print(f"[Orchestrator] No agents matched, looking for fallback...")
-        for card in agent_cards:
-            if "web scraper" in card["name"].lower():
-                selected.append(card)
-                print(f"[Orchestrator] Selected fallback: {card['name']}")
-                break
-        # If still nothing, select the first available agent
-        if not selected and agent_cards:
-            selected.append(agent_cards[0])
-            print(f"[Orchestrator] Selected first available: {agent_cards[0]['name']}")
-    
+    selected = router.route(query, agent_cards)
     print(f"[Orchestrator] Final selection: {[card['name'] for card in selected]}")
     return selected
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": "Orchestrator Agent",
         "description": "Orchestrates multi-agent workflows, delegates tasks, and manages lifecycle.",
         "version": "1.0.0",
         "capabilities": ["orchestration", "agent_discovery", "delegation", "user_input_handling"],
         "endpoints": {"a2a": "/"}
-    }
+    })
 
-async def delegate_to_agents(task_id, user_message):
-    # Wait for agents to be ready
-    print(f"[Orchestrator] Waiting for agents to be ready...")
-    await asyncio.sleep(15)  # Give agents more time to start if they just launched
-    
-    agent_cards = await fetch_agent_cards()
-    selected_agents = match_agents(user_message, agent_cards)
-    print(f"[Orchestrator] Selected agents: {[agent['name'] for agent in selected_agents]}")
-    steps = [{"agent": card["name"], "status": "pending"} for card in selected_agents]
-    artifacts = []
-    input_text = user_message
-    accumulated_content = []  # Store substantial content from all agents
-    
+# Agents that work directly on the user's query
+RETRIEVER_AGENTS = ("web search", "web scraper", "file reader")
+
+# Upstream agents each agent consumes, in order of preference: the first tier that has a
+# selected agent becomes the node's dependencies. Agents not listed (and agents whose
+# tiers are all unselected) run on the raw user query.
+AGENT_DEPENDENCIES = {
+    "summarizer": [RETRIEVER_AGENTS],
+    "calculator": [RETRIEVER_AGENTS],
+    "elaborator": [("summarizer", "calculator"), RETRIEVER_AGENTS],
+    "predictor": [("summarizer", "calculator"), RETRIEVER_AGENTS],
+}
+
+def agent_role(card):
+    name = card["name"].lower()
+    for role in RETRIEVER_AGENTS + tuple(AGENT_DEPENDENCIES):
+        if role in name:
+            return role
+    return name
+
+def build_execution_plan(selected_agents):
+    """Turn the selected agents into a DAG of nodes with their data dependencies"""
+    roles = [agent_role(card) for card in selected_agents]
+    plan = []
     for idx, card in enumerate(selected_agents):
-        print(f"[Orchestrator] Delegating to {card['name']} at {card['url']}")
-        steps[idx]["status"] = "running"
-        tasks[task_id]["status"] = f"{card['name']} running"
-        tasks[task_id]["steps"] = steps  # Update steps in real-time
-        
-        # For Summarizer Agent, use accumulated substantial content instead of just previous agent output
-        if "summarizer" in card["name"].lower() and accumulated_content:
-            # Find the most substantial content for summarization
-            substantial_content = max(accumulated_content, key=len) if accumulated_content else input_text
-            actual_input = substantial_content
-        else:
-            actual_input = input_text
-            
-        try:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "sendTask",
-                "params": {
-                    "id": f"subtask-{idx}",
-                    "sessionId": task_id,
-                    "acceptedOutputModes": ["text"],
-                    "originalQuery": user_message,  # Include original query for context
-                    "message": {
-                        "role": "user",
-                        "parts": [{"type": "text", "text": actual_input}]
-                    }
+        depends_on = []
+        for tier in AGENT_DEPENDENCIES.get(roles[idx], []):
+            depends_on = [i for i, role in enumerate(roles) if role in tier and i != idx]
+            if depends_on:
+                break
+        plan.append({"index": idx, "card": card, "depends_on": depends_on})
+    print(f"[Orchestrator] Execution plan: "
+          f"{[(node['card']['name'], [selected_agents[d]['name'] for d in node['depends_on']]) for node in plan]}")
+    return plan
+
+def plan_steps(plan):
+    return [{
+        "agent": node["card"]["name"],
+        "status": "pending",
+        "depends_on": [plan[d]["card"]["name"] for d in node["depends_on"]]
+    } for node in plan]
+
+def is_substantial(agent_message):
+    # Substantial content is >50 chars and not an error message
+    return (len(agent_message) > 50 and
+            "no results found" not in agent_message.lower() and
+            "no relevant content" not in agent_message.lower() and
+            "failed to" not in agent_message.lower())
+
+async def read_agent_stream(card, resp, on_delta):
+    """Consume an agent's sendTaskSubscribe stream; returns (text, error)"""
+    parts, final_text, error = [], None, None
+    async for event in aiter_sse_events(resp):
+        result = event.get("result", {})
+        if "artifact" in result:
+            delta = event_text(event)
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+        elif result.get("final"):
+            if result.get("status", {}).get("state") == "failed":
+                error = event_text(event) or "Agent stream failed"
+            else:
+                final_text = event_text(event)
+    print(f"[Orchestrator] {card['name']} stream finished ({len(parts)} chunks)")
+    return ("".join(parts) or final_text or ""), error
+
+async def call_agent(card, task_id, subtask_id, actual_input, user_message, on_delta):
+    """Send one streaming sendTaskSubscribe to an agent; returns (status, artifact)"""
+    try:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sendTaskSubscribe",
+            "params": {
+                "id": subtask_id,
+                "sessionId": task_id,
+                "acceptedOutputModes": ["text"],
+                "originalQuery": user_message,  # Include original query for context
+                "message": {
+                    "role": "user",
+                    "parts": [{"type": "text", "text": actual_input}]
                 }
             }
-            
-            # Retry mechanism for failed requests
-            max_retries = 3
-            resp = None
-            for attempt in range(max_retries):
-                try:
-                    async with httpx.AsyncClient() as client:
-                        print(f"[Orchestrator] About to POST to {card['name']} at {card['url']} (attempt {attempt + 1})")
-                        resp = await client.post(card["url"], json=payload, timeout=30)
-                        print(f"[Orchestrator] Finished POST to {card['name']} at {card['url']}")
+        }
+        
+        # Retry mechanism for failed requests
+        max_retries = 3
+        resp = None
+        streamed = None
+        received = []
+        def forward(delta):
+            received.append(delta)
+            on_delta(delta)
+        for attempt in range(max_retries):
+            try:
+                async with agent_limiter.limit(card["url"]):
+                    print(f"[Orchestrator] About to POST to {card['name']} at {card['url']} (attempt {attempt + 1})")
+                    # The timeout applies per read, so long completions are fine while tokens keep flowing
+                    async with http_client.stream("POST", card["url"], json=payload, timeout=30) as resp:
                         print(f"[Orchestrator] {card['name']} response status: {resp.status_code}")
-                        break  # Success, exit retry loop
-                except httpx.ReadTimeout:
-                    if attempt < max_retries - 1:
-                        print(f"[Orchestrator] Timeout for {card['name']}, retrying in 5 seconds...")
-                        await asyncio.sleep(5)
-                        continue
-                    else:
-                        raise  # Re-raise the exception if all retries failed
-            
-            # Process response outside the retry loop
-            if resp and resp.status_code == 200:
-                try:
-                    data = resp.json()
-                    print(f"[Orchestrator] {card['name']} response data: {data}")
-                    agent_message = data.get("result", {}).get("message", {}).get("parts", [{}])[0].get("text", "")
-                    print(f"[Orchestrator] {card['name']} extracted message: '{agent_message}'")
-                    
-                    if agent_message:  # Only proceed if we got a valid message
-                        artifacts.append({
-                            "agent": card["name"],
-                            "type": "text",
-                            "content": agent_message
-                        })
-                        steps[idx]["status"] = "completed"
-                        
-                        # Add substantial content (>50 chars and not error messages) to accumulated content
-                        if (len(agent_message) > 50 and 
-                            "no results found" not in agent_message.lower() and 
-                            "no relevant content" not in agent_message.lower() and
-                            "failed to" not in agent_message.lower()):
-                            accumulated_content.append(agent_message)
-                        
-                        input_text = agent_message  # Pass result to next agent
-                        print(f"[Orchestrator] {card['name']} marked as completed")
-                    else:
-                        print(f"[Orchestrator] {card['name']} returned empty message, marking as failed")
-                        steps[idx]["status"] = "failed (empty response)"
-                        artifacts.append({
-                            "agent": card["name"],
-                            "type": "error",
-                            "content": "Agent returned empty response"
-                        })
-                        break
-                    
-                    # Update task status in real-time
-                    tasks[task_id]["steps"] = steps
-                    tasks[task_id]["artifacts"] = artifacts
-                    tasks[task_id]["status"] = f"Processing... ({idx + 1}/{len(selected_agents)} agents completed)"
-                except Exception as json_exc:
-                    print(f"[Orchestrator] JSON decode error for {card['name']}: {json_exc}")
-                    print(f"[Orchestrator] Response text: {resp.text}")
-                    traceback.print_exc()
-                    steps[idx]["status"] = "failed (json decode error)"
-                    artifacts.append({
-                        "agent": card["name"],
-                        "type": "error",
-                        "content": f"JSON decode error: {json_exc}\nResponse: {resp.text}"
-                    })
-                    break
-            elif resp:
-                print(f"[Orchestrator] {card['name']} non-200 response body: {resp.text}")
-                steps[idx]["status"] = f"failed ({resp.status_code})"
-                artifacts.append({
+                        if resp.status_code == 200 and "text/event-stream" in resp.headers.get("content-type", ""):
+                            streamed = await read_agent_stream(card, resp, forward)
+                        else:
+                            await resp.aread()
+                    print(f"[Orchestrator] Finished POST to {card['name']} at {card['url']}")
+                    break  # Success, exit retry loop
+            except httpx.ReadTimeout:
+                # Partial output has already been forwarded, so only retry before the first token
+                if attempt < max_retries - 1 and not received:
+                    print(f"[Orchestrator] Timeout for {card['name']}, retrying in 5 seconds...")
+                    await asyncio.sleep(5)
+                    continue
+                else:
+                    raise  # Re-raise the exception if all retries failed
+        
+        # Process response outside the retry loop
+        if streamed is not None:
+            agent_message, error = streamed
+            if error:
+                print(f"[Orchestrator] {card['name']} stream failed: {error}")
+                return "failed (agent error)", {"agent": card["name"], "type": "error", "content": error}
+            if agent_message:
+                print(f"[Orchestrator] {card['name']} marked as completed")
+                return "completed", {"agent": card["name"], "type": "text", "content": agent_message}
+            print(f"[Orchestrator] {card['name']} returned empty message, marking as failed")
+            return "failed (empty response)", {
+                "agent": card["name"],
+                "type": "error",
+                "content": "Agent returned empty response"
+            }
+        if resp and resp.status_code == 200:
+            try:
+                data = resp.json()
+                print(f"[Orchestrator] {card['name']} response data: {data}")
+                agent_message = data.get("result", {}).get("message", {}).get("parts", [{}])[0].get("text", "")
+                print(f"[Orchestrator] {card['name']} extracted message: '{agent_message}'")
+                if agent_message:  # Only proceed if we got a valid message
+                    print(f"[Orchestrator] {card['name']} marked as completed")
+                    return "completed", {"agent": card["name"], "type": "text", "content": agent_message}
+                print(f"[Orchestrator] {card['name']} returned empty message, marking as failed")
+                return "failed (empty response)", {
                     "agent": card["name"],
                     "type": "error",
-                    "content": resp.text
-                })
-                break
-            else:
-                print(f"[Orchestrator] No response received from {card['name']}")
-                steps[idx]["status"] = "failed (no response)"
-                artifacts.append({
+                    "content": "Agent returned empty response"
+                }
+            except Exception as json_exc:
+                print(f"[Orchestrator] JSON decode error for {card['name']}: {json_exc}")
+                print(f"[Orchestrator] Response text: {resp.text}")
+                traceback.print_exc()
+                return "failed (json decode error)", {
                     "agent": card["name"],
                     "type": "error",
-                    "content": "No response received"
-                })
-                break
-        except Exception as e:
-            print(f"[Orchestrator] Exception for {card['name']}: {e}")
-            traceback.print_exc()
-            steps[idx]["status"] = "failed (exception)"
-            artifacts.append({
-                "agent": card["name"],
-                "type": "error",
-                "content": str(e) + "\n" + traceback.format_exc()
-            })
-            break
-        tasks[task_id]["artifacts"] = artifacts
+                    "content": f"JSON decode error: {json_exc}\nResponse: {resp.text}"
+                }
+        elif resp:
+            print(f"[Orchestrator] {card['name']} non-200 response body: {resp.text}")
+            return f"failed ({resp.status_code})", {"agent": card["name"], "type": "error", "content": resp.text}
+        print(f"[Orchestrator] No response received from {card['name']}")
+        return "failed (no response)", {"agent": card["name"], "type": "error", "content": "No response received"}
+    except Exception as e:
+        print(f"[Orchestrator] Exception for {card['name']}: {e}")
+        traceback.print_exc()
+        if isinstance(e, httpx.TransportError):
+            # Don't keep routing to a crashed agent until its card expires; a timeout only triggers the re-probe
+            registry.report_failure(card["name"], e, unready=not isinstance(e, httpx.TimeoutException))
+        return "failed (exception)", {
+            "agent": card["name"],
+            "type": "error",
+            "content": str(e) + "\n" + traceback.format_exc()
+        }
+
+async def delegate_to_agents(task_id, user_message, plan):
+    print(f"[Orchestrator] Selected agents: {[node['card']['name'] for node in plan]}")
+    steps = plan_steps(plan)
+    artifacts = []
+    outputs = {}  # node index -> agent output, for nodes that completed
+    node_tasks = {}
+    progress = {"status": "pending"}
+    
+    def publish_progress():
+        task_events.publish(task_id, status_update_event(
+            task_id, "working", metadata={"status": progress["status"], "steps": steps}))
+    
+    def set_status(status):
+        progress["status"] = status
+        tasks.set_status(task_id, status)
+    
+    def set_step(idx, status):
+        steps[idx]["status"] = status
+        tasks.set_step(task_id, idx, status)
+    
+    def add_artifact(artifact):
+        artifacts.append(artifact)
+        tasks.append_artifact(task_id, artifact)
+    
+    def node_input(node):
+        # Substantial content produced upstream of this node (transitively), in plan order
+        upstream, frontier = set(), list(node["depends_on"])
+        while frontier:
+            dep = frontier.pop()
+            if dep not in upstream:
+                upstream.add(dep)
+                frontier.extend(plan[dep]["depends_on"])
+        accumulated_content = [outputs[i] for i in sorted(upstream) if i in outputs and is_substantial(outputs[i])]
+        # For Summarizer Agent, use the most substantial upstream content
+        if "summarizer" in node["card"]["name"].lower() and accumulated_content:
+            return max(accumulated_content, key=len)
+        direct = [outputs[d] for d in node["depends_on"] if d in outputs]
+        return "\n\n".join(direct) if direct else user_message
+    
+    async def run_node(node):
+        idx, card = node["index"], node["card"]
+        # Only true data dependencies are awaited; independent nodes run concurrently
+        dep_ok = await asyncio.gather(*(node_tasks[d] for d in node["depends_on"]))
+        if not all(dep_ok):
+            print(f"[Orchestrator] Skipping {card['name']}: upstream agent failed")
+            set_step(idx, "failed (upstream failed)")
+            publish_progress()
+            return False
+        # Returns immediately when the agent is already healthy
+        if not await registry.wait_until_ready([card["name"]]):
+            print(f"[Orchestrator] {card['name']} did not become ready in time")
+            set_step(idx, "failed (agent not ready)")
+            add_artifact({"agent": card["name"], "type": "error", "content": f"{card['name']} is not available"})
+            publish_progress()
+            return False
+        print(f"[Orchestrator] Delegating to {card['name']} at {card['url']}")
+        set_step(idx, "running")
+        running = [s["agent"] for s in steps if s["status"] == "running"]
+        set_status(f"{', '.join(running)} running")
+        publish_progress()
+        
+        # Token deltas are multiplexed into one artifact per plan node; the partial text is
+        # kept so late subscribers can be replayed up to the current token
+        partial = live_artifacts.setdefault(task_id, {}).setdefault(idx, {"agent": card["name"], "content": ""})
+        def on_delta(delta):
+            task_events.publish(task_id, artifact_update_event(
+                task_id, delta, index=idx, name=card["name"], append=bool(partial["content"])))
+            partial["content"] += delta
+        
+        status, artifact = await call_agent(card, task_id, f"subtask-{idx}", node_input(node), user_message, on_delta)
+        set_step(idx, status)
+        add_artifact(artifact)
+        live_artifacts.get(task_id, {}).pop(idx, None)
+        task_events.publish(task_id, artifact_update_event(
+            task_id, "", index=idx, name=card["name"], append=True, last_chunk=True))
+        if status != "completed":
+            publish_progress()
+            return False
+        outputs[idx] = artifact["content"]
+        done = sum(1 for s in steps if s["status"] == "completed")
+        set_status(f"Processing... ({done}/{len(steps)} agents completed)")
+        publish_progress()
+        return True
+    
+    # All node tasks are created before any of them runs, so each node can await its
+    # dependencies' tasks regardless of plan order
+    for node in plan:
+        node_tasks[node["index"]] = asyncio.ensure_future(run_node(node))
+    await asyncio.gather(*node_tasks.values())
     
     # Final status update
     final_status = "completed" if all(s["status"] == "completed" for s in steps) else "failed"
-    tasks[task_id]["status"] = final_status
-    tasks[task_id]["steps"] = steps
-    tasks[task_id]["artifacts"] = artifacts
+    tasks.set_status(task_id, final_status)
+    live_artifacts.pop(task_id, None)
+    task_events.publish(task_id, status_update_event(
+        task_id, final_status, final=True, metadata={"status": final_status, "steps": steps, "artifacts": artifacts}))
     
     print(f"[Orchestrator] Workflow {final_status} for task {task_id}")
     print(f"[Orchestrator] Final artifacts count: {len(artifacts)}")
     print(f"[Orchestrator] Final steps: {[s['status'] for s in steps]}")
 
+def task_snapshot_events(task_id, task):
+    """Events that bring a late subscriber up to the task's current state"""
+    if task["status"] in ("completed", "failed"):
+        return [status_update_event(task_id, task["status"], final=True, metadata={
+            "task_id": task_id, "status": task["status"], "steps": task["steps"], "artifacts": task["artifacts"]})]
+    events = [status_update_event(task_id, "working", metadata={
+        "task_id": task_id, "status": task["status"], "steps": task["steps"]})]
+    finished = {artifact["agent"]: artifact["content"] for artifact in task["artifacts"] if artifact["type"] == "text"}
+    partial = live_artifacts.get(task_id, {})
+    for idx, step in enumerate(task["steps"]):
+        content = finished.get(step["agent"]) or partial.get(idx, {}).get("content")
+        if content:
+            events.append(artifact_update_event(task_id, content, index=idx, name=step["agent"], append=False))
+    return events
+
+async def stream_task_events(task_id, queue, initial_events):
+    """Relay a task's events to one subscriber until the final status event"""
+    try:
+        for event in initial_events:
+            yield event
+            if event.get("final"):
+                return
+        while True:
+            event = await queue.get()
+            yield event
+            if event.get("final"):
+                break
+    finally:
+        task_events.unsubscribe(task_id, queue)
+
 @app.post("/")
 async def handle_a2a(request: Request, background_tasks: BackgroundTasks):
     data = await request.json()
     method = data.get("method")
     params = data.get("params", {})
-    if method == "sendTask":
+    if method in ("sendTask", "sendTaskSubscribe"):
         user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
         task_id = str(uuid.uuid4())
         # Fetch agent cards and match agents for this query
         agent_cards = await fetch_agent_cards()
-        selected_agents = match_agents(user_message, agent_cards)
-        steps = [{"agent": card["name"], "status": "pending"} for card in selected_agents]
-        tasks[task_id] = {
-            "status": "pending",
-            "steps": steps,
-            "artifacts": [],
-            "user_message": user_message
-        }
-        background_tasks.add_task(delegate_to_agents, task_id, user_message)
+        # Off the event loop: the query may need to be embedded
+        selected_agents = await asyncio.to_thread(match_agents, user_message, agent_cards)
+        plan = build_execution_plan(selected_agents)
+        steps = plan_steps(plan)
+        tasks.create(task_id, user_message, steps)
+        if method == "sendTaskSubscribe":
+            # Subscribe before the workflow starts so no event is missed. The workflow runs as
+            # its own task because background tasks only start once the (streamed) response ends.
+            queue = task_events.subscribe(task_id)
+            workflow = asyncio.create_task(delegate_to_agents(task_id, user_message, plan))
+            running_workflows.add(workflow)
+            workflow.add_done_callback(running_workflows.discard)
+            submitted = status_update_event(task_id, "submitted", metadata={
+                "task_id": task_id, "status": "pending", "steps": steps})
+            return sse_response(data.get("id"), stream_task_events(task_id, queue, [submitted]))
+        background_tasks.add_task(delegate_to_agents, task_id, user_message, plan)
         return JSONResponse({
             "jsonrpc": "2.0",
             "id": data.get("id"),
@@ -319,6 +420,29 @@ async def handle_a2a(request: Request, background_tasks: BackgroundTasks):
         })
     return JSONResponse({"error": "Invalid method"}, status_code=400)
 
+@app.get("/registry")
+async def get_registry(refresh: bool = False):
+    if refresh:
+        await registry.refresh(force=True)
+    return JSONResponse(registry.snapshot())
+
+@app.get("/router")
+async def get_router_decisions(limit: int = 50):
+    """Most recent routing decisions: method, selected agents and their scores"""
+    return JSONResponse({"decisions": list(router.decisions)[-limit:][::-1]})
+
+@app.get("/tasks/{task_id}/events")
+async def task_event_stream(task_id: str):
+    """Push channel for task progress: replays the current state, then streams steps and artifacts"""
+    task = tasks.get(task_id)
+    if task is None:
+        return JSONResponse({"error": "Task not found"}, status_code=404)
+    # Snapshot and subscription happen without yielding to the event loop, so the replay
+    # and the live events neither overlap nor leave a gap
+    snapshot = task_snapshot_events(task_id, task)
+    queue = task_events.subscribe(task_id)
+    return sse_response(None, stream_task_events(task_id, queue, snapshot))
+
 @app.get("/status/{task_id}")
 async def get_status(task_id: str):
     task = tasks.get(task_id)
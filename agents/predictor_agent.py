@@ -1,8 +1,10 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from typing import AsyncIterator
 from utils.models import model_manager
 from config.settings import settings
 import random
+from utils.a2a import card_response, llm_stats, sse_response, task_stream_events
 
 app = FastAPI()
 
@@ -11,31 +13,35 @@ class PredictorAgent:
         self.name = "Predictor Agent"
         self.description = "Makes predictions and forecasts based on patterns and data"
     
-    def make_prediction(self, query: str) -> str:
-        """Use LLM to make predictions based on the query"""
-        prompt = f"""The following query requires a prediction or forecast:
+    def build_prompt(self, query: str) -> str:
+        return f"""The following query requires a prediction or forecast:
 
 Query:
 {query}
 
 Please provide a prediction or forecast based on available patterns and data."""
-        
-        response = model_manager.azure_llm.invoke(prompt)
-        if hasattr(response, 'content'):
-            return response.content
-        return str(response)
+
+    async def make_prediction(self, query: str) -> str:
+        """Use LLM to make predictions based on the query"""
+        return await model_manager.ainvoke(self.build_prompt(query))
+
+    def make_prediction_stream(self, query: str) -> AsyncIterator[str]:
+        """Stream the prediction for the query token by token"""
+        return model_manager.astream(self.build_prompt(query))
 
 predictor_agent = PredictorAgent()
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": predictor_agent.name,
         "description": predictor_agent.description,
         "version": "1.0.0",
         "capabilities": ["prediction", "forecasting", "llm_analysis"],
         "endpoints": {"a2a": "/"}
-    }
+    })
+
+app.add_api_route("/stats", llm_stats)
 
 @app.post("/")
 async def handle_a2a(request: Request):
@@ -45,7 +51,7 @@ async def handle_a2a(request: Request):
     
     if method == "sendTask":
         user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
-        result = predictor_agent.make_prediction(user_message)
+        result = await predictor_agent.make_prediction(user_message)
         
         return JSONResponse({
             "jsonrpc": "2.0",
@@ -58,6 +64,11 @@ async def handle_a2a(request: Request):
             }
         })
     
+    if method == "sendTaskSubscribe":
+        user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
+        chunks = predictor_agent.make_prediction_stream(user_message)
+        return sse_response(data.get("id"), task_stream_events(params.get("id"), chunks))
+    
     return JSONResponse({"error": "Invalid method"}, status_code=400)
 
 if __name__ == "__main__":
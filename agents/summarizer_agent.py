@@ -1,7 +1,9 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from typing import AsyncIterator
 from utils.models import model_manager
 from config.settings import settings
+from utils.a2a import card_response, llm_stats, sse_response, task_stream_events
 
 app = FastAPI()
 
@@ -10,31 +12,35 @@ class SummarizerAgent:
         self.name = "Summarizer Agent"
         self.description = "Summarizes long text content into concise summaries"
     
-    def summarize_text(self, text: str) -> str:
-        """Use LLM to summarize the given text"""
-        prompt = f"""The following text needs to be summarized:
+    def build_prompt(self, text: str) -> str:
+        return f"""The following text needs to be summarized:
 
         Text:
         {text[:2000]}  # Limit to 2000 characters
 
         Please provide a concise summary that captures the key points."""
-        
-        response = model_manager.azure_llm.invoke(prompt)
-        if hasattr(response, 'content'):
-            return response.content
-        return str(response)
+
+    async def summarize_text(self, text: str) -> str:
+        """Use LLM to summarize the given text"""
+        return await model_manager.ainvoke(self.build_prompt(text))
+
+    def summarize_text_stream(self, text: str) -> AsyncIterator[str]:
+        """Stream the summary of the given text token by token"""
+        return model_manager.astream(self.build_prompt(text))
 
 summarizer_agent = SummarizerAgent()
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": summarizer_agent.name,
         "description": summarizer_agent.description,
         "version": "1.0.0",
         "capabilities": ["text_summarization", "llm_analysis"],
         "endpoints": {"a2a": "/"}
-    }
+    })
+
+app.add_api_route("/stats", llm_stats)
 
 @app.post("/")
 async def handle_a2a(request: Request):
@@ -44,7 +50,7 @@ async def handle_a2a(request: Request):
     
     if method == "sendTask":
         user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
-        result = summarizer_agent.summarize_text(user_message)
+        result = await summarizer_agent.summarize_text(user_message)
         
         return JSONResponse({
             "jsonrpc": "2.0",
@@ -57,6 +63,11 @@ async def handle_a2a(request: Request):
             }
         })
     
+    if method == "sendTaskSubscribe":
+        user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
+        chunks = summarizer_agent.summarize_text_stream(user_message)
+        return sse_response(data.get("id"), task_stream_events(params.get("id"), chunks))
+    
     return JSONResponse({"error": "Invalid method"}, status_code=400)
 
 if __name__ == "__main__":
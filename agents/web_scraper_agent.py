@@ -2,9 +2,11 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 import httpx
 from bs4 import BeautifulSoup
+from typing import AsyncIterator
 from utils.models import model_manager
 from config.settings import settings
 import re
+from utils.a2a import card_response, llm_stats, sse_response, task_stream_events, single_chunk
 
 app = FastAPI()
 
@@ -44,47 +46,53 @@ class WebScraperAgent:
             return f"Failed to scrape {url}: {str(e)}"
     
     async def scrape_and_answer(self, url: str, query: str = None) -> str:
+        return "".join([chunk async for chunk in self.scrape_and_answer_stream(url, query)])
+
+    async def scrape_and_answer_stream(self, url: str, query: str = None) -> AsyncIterator[str]:
+        """Streaming variant of scrape_and_answer; the LLM answer is streamed token by token"""
         try:
             headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"}
             async with httpx.AsyncClient(headers=headers) as client:
                 response = await client.get(url, timeout=60)
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                text = soup.get_text()
-                text = ' '.join(text.split())
-                if not text:
-                    return "No content found on the page."
-                if query:
-                    prompt = f"""You are given the following web page content scraped from {url}:
+            soup = BeautifulSoup(response.text, 'html.parser')
+            for script in soup(["script", "style"]):
+                script.decompose()
+            text = soup.get_text()
+            text = ' '.join(text.split())
+            if not text:
+                yield "No content found on the page."
+                return
+            if query:
+                prompt = f"""You are given the following web page content scraped from {url}:
 
 {text[:2000]}
 
 User request: {query}
 
 Based on the content above, please provide a comprehensive response that addresses the user's request. If the user is asking for a summary, provide a concise summary of the key information. If they want specific information, extract and present the relevant details. Focus on the actual content from the webpage and ignore any error messages or irrelevant context."""
-                    response = model_manager.azure_llm.invoke(prompt)
-                    if hasattr(response, 'content'):
-                        return response.content
-                    return str(response)
-                return text[:2000]
+                async for chunk in model_manager.astream(prompt):
+                    yield chunk
+                return
+            yield text[:2000]
         except httpx.TimeoutException:
-            return f"Request to {url} timed out. Please try again later or check the site."
+            yield f"Request to {url} timed out. Please try again later or check the site."
         except Exception as e:
-            return f"Failed to scrape {url}: {str(e)}"
+            yield f"Failed to scrape {url}: {str(e)}"
 
 web_scraper_agent = WebScraperAgent()
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": web_scraper_agent.name,
         "description": web_scraper_agent.description,
         "version": "1.0.0",
         "capabilities": ["web_scraping", "content_extraction", "llm_analysis"],
         "endpoints": {"a2a": "/"}
-    }
+    })
+
+app.add_api_route("/stats", llm_stats)
 
 @app.post("/")
 async def handle_a2a(request: Request):
@@ -92,7 +100,7 @@ async def handle_a2a(request: Request):
     method = data.get("method")
     params = data.get("params", {})
     
-    if method == "sendTask":
+    if method in ("sendTask", "sendTaskSubscribe"):
         # Prefer direct URL param if present
         url = params.get("url")
         user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
@@ -108,19 +116,25 @@ async def handle_a2a(request: Request):
             print(f"[WebScraper] Extracted URL from original query: {url}")
             
         if not url:
+            no_url = "No valid URL found in your request. Please provide a URL in the URL field or in your message."
+            if method == "sendTaskSubscribe":
+                return sse_response(data.get("id"), task_stream_events(params.get("id"), single_chunk(no_url)))
             return JSONResponse({
                 "jsonrpc": "2.0",
                 "id": data.get("id"),
                 "result": {
                     "message": {
                         "role": "agent",
-                        "parts": [{"type": "text", "text": "No valid URL found in your request. Please provide a URL in the URL field or in your message."}]
+                        "parts": [{"type": "text", "text": no_url}]
                     }
                 }
             })
         
         # Use original query for context when available, otherwise fall back to user_message
         query_for_context = original_query if original_query != user_message else user_message
+        if method == "sendTaskSubscribe":
+            chunks = web_scraper_agent.scrape_and_answer_stream(url, query_for_context)
+            return sse_response(data.get("id"), task_stream_events(params.get("id"), chunks))
         result = await web_scraper_agent.scrape_and_answer(url, query_for_context)
         
         return JSONResponse({
@@ -1,9 +1,10 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 from utils.models import model_manager
 from config.settings import settings
+from utils.a2a import card_response, llm_stats, sse_response, task_stream_events
 
 app = FastAPI()
 
@@ -14,6 +15,10 @@ class WebSearchAgent:
     
     async def search_web(self, query: str) -> str:
         """Perform web search using DuckDuckGo API and LLM synthesis"""
+        return "".join([chunk async for chunk in self.search_web_stream(query)])
+
+    async def search_web_stream(self, query: str) -> AsyncIterator[str]:
+        """Streaming variant of search_web; the LLM synthesis is streamed token by token"""
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.get(
@@ -21,51 +26,51 @@ class WebSearchAgent:
                     params={"q": query, "format": "json", "no_html": "1", "skip_disambig": "1"}
                 )
                 data = response.json()
-                
-                # Collect search results
-                results = []
-                if data.get("Abstract"):
-                    results.append(f"Abstract: {data['Abstract']}")
-                if data.get("Answer"):
-                    results.append(f"Answer: {data['Answer']}")
-                
-                # Get related topics
-                for topic in data.get("RelatedTopics", [])[:3]:
-                    if isinstance(topic, dict) and topic.get("Text"):
-                        results.append(f"Related: {topic['Text']}")
-                
-                if results:
-                    # Use LLM to synthesize the search results
-                    context = "\n".join(results)
-                    prompt = f"""Based on the following search results, provide a comprehensive answer to the query: "{query}"
+            
+            # Collect search results
+            results = []
+            if data.get("Abstract"):
+                results.append(f"Abstract: {data['Abstract']}")
+            if data.get("Answer"):
+                results.append(f"Answer: {data['Answer']}")
+            
+            # Get related topics
+            for topic in data.get("RelatedTopics", [])[:3]:
+                if isinstance(topic, dict) and topic.get("Text"):
+                    results.append(f"Related: {topic['Text']}")
+            
+            if results:
+                # Use LLM to synthesize the search results
+                context = "\n".join(results)
+                prompt = f"""Based on the following search results, provide a comprehensive answer to the query: "{query}"
 
 Search Results:
 {context}
 
 Please synthesize this information into a clear, informative response that addresses the user's query."""
 
-                    response = model_manager.azure_llm.invoke(prompt)
-                    if hasattr(response, 'content'):
-                        return response.content
-                    return str(response)
-                else:
-                    # No search results - do not use LLM fallback
-                    return "No results found for your query."
+                async for chunk in model_manager.astream(prompt):
+                    yield chunk
+            else:
+                # No search results - do not use LLM fallback
+                yield "No results found for your query."
                 
         except Exception as e:
-            return f"Search failed: {str(e)}"
+            yield f"Search failed: {str(e)}"
 
 web_search_agent = WebSearchAgent()
 
 @app.get("/.well-known/agent.json")
-async def agent_card():
-    return {
+async def agent_card(request: Request):
+    return card_response(request, {
         "name": web_search_agent.name,
         "description": web_search_agent.description,
         "version": "1.0.0",
         "capabilities": ["web_search", "information_retrieval", "llm_synthesis"],
         "endpoints": {"a2a": "/"}
-    }
+    })
+
+app.add_api_route("/stats", llm_stats)
 
 @app.post("/")
 async def handle_a2a(request: Request):
@@ -88,6 +93,11 @@ async def handle_a2a(request: Request):
             }
         })
     
+    if method == "sendTaskSubscribe":
+        user_message = params.get("message", {}).get("parts", [{}])[0].get("text", "")
+        chunks = web_search_agent.search_web_stream(user_message)
+        return sse_response(data.get("id"), task_stream_events(params.get("id"), chunks))
+    
     return JSONResponse({"error": "Invalid method"}, status_code=400)
 
 if __name__ == "__main__":
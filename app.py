@@ -1,13 +1,12 @@
 import streamlit as st
 import httpx
-import PyPDF2
-import csv
-import json
 import time
 from datetime import datetime
 from typing import List, Dict, Any
 from utils.vector_store import vector_store
+from config.settings import settings
 from utils.models import model_manager
+from utils.a2a import iter_sse_events
 
 # Configure Streamlit page
 st.set_page_config(
@@ -35,25 +34,130 @@ if "uploaded_files" not in st.session_state:
     st.session_state.uploaded_files = []
 if "urls" not in st.session_state:
     st.session_state.urls = []
-if "vectorized_files" not in st.session_state:
-    st.session_state.vectorized_files = set()
+if "ingest_jobs" not in st.session_state:
+    st.session_state.ingest_jobs = []  # job ids submitted to the File Reader agent, newest first
+if "ingest_polling" not in st.session_state:
+    st.session_state.ingest_polling = False  # whether the job panel is refreshing itself
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []  # List of {query, responses, completed}
 if "current_query_responses" not in st.session_state:
     st.session_state.current_query_responses = []
 
+def render_steps(steps):
+    for step in steps:
+        if step['status'] == 'completed':
+            st.success(f"Agent: {step['agent']} | Status: ✅ {step['status']}")
+        elif step['status'] == 'running':
+            st.info(f"Agent: {step['agent']} | Status: 🔄 {step['status']}")
+        elif step['status'] == 'pending':
+            st.info(f"Agent: {step['agent']} | Status: ⏳ {step['status']}")
+        else:
+            st.error(f"Agent: {step['agent']} | Status: ❌ {step['status']}")
+
+def render_agent_responses(responses):
+    for response in responses:
+        st.markdown(f"""
+        <div class="agent-response">
+            <span class="agent-label">🤖 {response['agent']}:</span>
+            {response['content']}
+        </div>
+        """, unsafe_allow_html=True)
+
+def show_ingest_jobs():
+    """Status of the recent ingestion jobs, as reported by the File Reader agent"""
+    active = False
+    for job_id in st.session_state.ingest_jobs[:10]:
+        try:
+            job = httpx.get(f"{settings.FILE_READER_URL}/ingest/{job_id}", timeout=5).json()
+        except Exception as e:
+            st.warning(f"Job {job_id[:8]}: status unavailable ({e})")
+            continue
+        if "error" in job and "status" not in job:
+            st.warning(f"Job {job_id[:8]}: {job['error']}")
+            continue
+        active |= job["status"] in ("queued", "running")
+        st.progress(min(job["fraction"], 1.0),
+                    text=f"Job {job_id[:8]} {job['status']}: {job['chunks']} chunks, "
+                         f"{job['chunks_per_sec']} chunks/s")
+        if job["status"] == "failed" and job.get("error"):
+            st.error(f"Job {job_id[:8]} failed: {job['error']}")
+        for file in job["files"]:
+            report = file.get("report")
+            if report is None:
+                continue
+            if "skipped" in report:
+                st.info(f"Skipped {file['filename']}: {report['skipped']}")
+            elif "error" in report:
+                st.error(f"Failed to vectorize {file['filename']}: {report['error']}")
+            elif not report["chunks"]:
+                st.warning(f"No content extracted from {file['filename']}")
+            elif report["added"] or report["removed"]:
+                st.success(f"Vectorized {file['filename']}: {report['added']} new, {report['removed']} removed, "
+                           f"{report['unchanged']} unchanged chunks")
+            else:
+                st.info(f"{file['filename']} already vectorized ({report['unchanged']} chunks unchanged)")
+    if active != st.session_state.ingest_polling:
+        # Start polling, or stop once every job has finished
+        st.session_state.ingest_polling = active
+        st.rerun()
+
+def stream_orchestrator_task(events):
+    """Render steps and agent tokens live from the orchestrator's sendTaskSubscribe stream"""
+    live = st.empty()
+    responses = {}  # plan index -> {"agent", "content"}
+    last_render = 0.0
+    for event in events:
+        result = event.get("result", {})
+        if "artifact" in result:
+            artifact = result["artifact"]
+            entry = responses.setdefault(artifact.get("index", 0), {"agent": artifact.get("name", "Agent"), "content": ""})
+            text = "".join(part.get("text", "") for part in artifact.get("parts", []))
+            # Replayed artifacts (append=False) carry the full text so far
+            entry["content"] = entry["content"] + text if artifact.get("append", True) else text
+        else:
+            metadata = result.get("metadata", {})
+            if "task_id" in metadata:
+                st.session_state["orchestrator_task_id"] = metadata["task_id"]
+            if "steps" in metadata:
+                st.session_state["orchestrator_steps"] = metadata["steps"]
+            if "status" in metadata:
+                st.session_state["orchestrator_status"] = metadata["status"]
+            if "artifacts" in metadata:
+                st.session_state["orchestrator_artifacts"] = metadata["artifacts"]
+        # Throttle redraws; tokens can arrive much faster than the browser needs them
+        now = time.time()
+        if now - last_render > 0.1 or result.get("final"):
+            with live.container():
+                st.subheader("Orchestration Workflow")
+                st.write(f"**Task Status:** {st.session_state.get('orchestrator_status', 'pending')}")
+                render_steps(st.session_state.get("orchestrator_steps", []))
+                render_agent_responses([responses[i] for i in sorted(responses)])
+            last_render = now
+        if result.get("final"):
+            break
+    live.empty()
+    st.session_state.current_query_responses = [
+        {"agent": artifact["agent"], "content": artifact["content"]}
+        for artifact in st.session_state.get("orchestrator_artifacts", []) if artifact.get("type") == "text"
+    ]
+
 # Sidebar for configuration and stats
 with st.sidebar:
     st.header("🛠️ Configuration")
     st.subheader("📊 Vector Store")
+    vector_store.refresh()  # Files are vectorized by the File Reader agent's ingestion jobs
     stats = vector_store.get_stats()
     st.metric("Documents", stats["total_documents"])
     st.metric("Index Size", stats["index_size"])
     if st.button("Clear Vector Store"):
-        vector_store.clear()
-        st.session_state.vectorized_files = set()
-        st.session_state.uploaded_files = []
-        st.success("Vector store cleared!")
+        try:
+            # The File Reader agent owns the store; clearing it here would be undone by its next save
+            httpx.delete(f"{settings.FILE_READER_URL}/documents", timeout=30).raise_for_status()
+            vector_store.refresh()
+            st.session_state.uploaded_files = []
+            st.success("Vector store cleared!")
+        except Exception as e:
+            st.error(f"Failed to clear the vector store: {e}")
 
     with st.expander("🤖 Available Agents", expanded=True):
         for agent in agents:
@@ -177,21 +281,17 @@ with tab1:
         payload = {
             "jsonrpc": "2.0",
             "id": 1,
-            "method": "sendTask",
+            "method": "sendTaskSubscribe",
             "params": params
         }
         try:
-            with st.spinner("Sending request to Orchestrator Agent..."):
-                response = httpx.post("http://localhost:5108/", json=payload, timeout=30)
+            # Stream the task so agent tokens show up as soon as they are generated
+            with httpx.stream("POST", "http://localhost:5108/", json=payload, timeout=httpx.Timeout(30, read=None)) as response:
                 if response.status_code == 200:
-                    data = response.json()
-                    task_id = data.get("result", {}).get("task_id")
-                    st.session_state["orchestrator_task_id"] = task_id
-                    st.session_state["orchestrator_steps"] = data.get("result", {}).get("steps", [])
-                    st.session_state["orchestrator_status"] = data.get("result", {}).get("status", "pending")
-                    st.session_state["orchestrator_artifacts"] = data.get("result", {}).get("artifacts", [])
                     st.session_state["current_user_query"] = user_input
+                    stream_orchestrator_task(iter_sse_events(response))
                 else:
+                    response.read()
                     st.error(f"Error {response.status_code}: {response.text}")
         except Exception as e:
             st.error(f"Request failed: {e}")
@@ -200,43 +300,27 @@ with tab1:
     if st.session_state.get("orchestrator_task_id"):
         task_id = st.session_state["orchestrator_task_id"]
         
-        # Poll for status updates
-        try:
-            status_response = httpx.get(f"http://localhost:5108/status/{task_id}", timeout=10)
-            if status_response.status_code == 200:
-                task_data = status_response.json()
-                st.session_state["orchestrator_steps"] = task_data.get("steps", [])
-                st.session_state["orchestrator_status"] = task_data.get("status", "pending")
-                artifacts = task_data.get("artifacts", [])
-                st.session_state["orchestrator_artifacts"] = artifacts
-                
-                # Update current query responses with new artifacts
-                current_responses = []
-                for artifact in artifacts:
-                    if artifact.get("type") == "text":
-                        current_responses.append({
-                            "agent": artifact["agent"],
-                            "content": artifact["content"]
-                        })
-                st.session_state.current_query_responses = current_responses
-                
-        except Exception as e:
-            st.warning(f"Failed to get status update: {e}")
+        # Re-attach to the task's event stream if it is still running (e.g. a rerun interrupted
+        # the original stream). Finished tasks are rendered from session state without any request.
+        if st.session_state.get("orchestrator_status", "pending") not in ["completed", "failed"]:
+            try:
+                with httpx.stream("GET", f"http://localhost:5108/tasks/{task_id}/events", timeout=httpx.Timeout(30, read=None)) as events_response:
+                    if events_response.status_code == 200:
+                        stream_orchestrator_task(iter_sse_events(events_response))
+                    elif events_response.status_code == 404:
+                        st.session_state["orchestrator_status"] = "failed"
+                        st.warning("The orchestrator no longer knows this task.")
+                    else:
+                        events_response.read()
+                        st.warning(f"Failed to get status update: {events_response.status_code} {events_response.text}")
+            except Exception as e:
+                st.warning(f"Failed to get status update: {e}")
         
         st.subheader("Orchestration Workflow")
         steps = st.session_state.get("orchestrator_steps", [])
         status = st.session_state.get("orchestrator_status", "pending")
         st.write(f"**Task Status:** {status}")
-        
-        for step in steps:
-            if step['status'] == 'completed':
-                st.success(f"Agent: {step['agent']} | Status: ✅ {step['status']}")
-            elif step['status'] == 'running':
-                st.info(f"Agent: {step['agent']} | Status: 🔄 {step['status']}")
-            elif step['status'] == 'pending':
-                st.info(f"Agent: {step['agent']} | Status: ⏳ {step['status']}")
-            else:
-                st.error(f"Agent: {step['agent']} | Status: ❌ {step['status']}")
+        render_steps(steps)
         
         # When task is completed, add to chat history
         if status == "completed" and st.session_state.get("current_user_query"):
@@ -250,11 +334,6 @@ with tab1:
                     "responses": st.session_state.current_query_responses.copy(),
                     "completed": True
                 })
-                
-        # Auto-refresh every 2 seconds if task is not completed
-        if status not in ["completed", "failed"]:
-            time.sleep(2)
-            st.rerun()
 
     # Current Query Chat History (Always visible when there's an active query)
     if st.session_state.get("current_user_query"):
@@ -268,13 +347,7 @@ with tab1:
         """, unsafe_allow_html=True)
         
         # Display agent responses as they come in
-        for response in st.session_state.current_query_responses:
-            st.markdown(f"""
-            <div class="agent-response">
-                <span class="agent-label">🤖 {response['agent']}:</span>
-                {response['content']}
-            </div>
-            """, unsafe_allow_html=True)
+        render_agent_responses(st.session_state.current_query_responses)
 
     # Previous Chat History Dropdown
     if st.session_state.chat_history:
@@ -342,55 +415,31 @@ with tab2:
         st.session_state.uploaded_files = files_to_keep
 
         if st.button("Vectorize Files"):
-            newly_vectorized = 0
-            for file in st.session_state.uploaded_files:
-                if file.name not in st.session_state.vectorized_files:
-                    try:
-                        docs = []
-                        metas = []
-                        if file.name.lower().endswith('.pdf'):
-                            pdf_reader = PyPDF2.PdfReader(file)
-                            for i, page in enumerate(pdf_reader.pages):
-                                text = page.extract_text() or ""
-                                if text.strip():
-                                    docs.append(text)
-                                    metas.append({"filename": file.name, "type": "pdf", "chunk": i})
-                        elif file.name.lower().endswith('.csv'):
-                            file.seek(0)
-                            reader = csv.reader(file.read().decode("utf-8").splitlines())
-                            header = next(reader)
-                            for i, row in enumerate(reader):
-                                row_text = ", ".join(f"{h}: {v}" for h, v in zip(header, row))
-                                docs.append(row_text)
-                                metas.append({"filename": file.name, "type": "csv", "row": i})
-                        elif file.name.lower().endswith('.json'):
-                            file.seek(0)
-                            data = json.load(file)
-                            docs.append(json.dumps(data, indent=2)[:2000])
-                            metas.append({"filename": file.name, "type": "json"})
-                        else:
-                            file.seek(0)
-                            text = file.read().decode("utf-8")
-                            # Chunk by paragraphs
-                            for i, chunk in enumerate(text.split("\n\n")):
-                                if chunk.strip():
-                                    docs.append(chunk)
-                                    metas.append({"filename": file.name, "type": "txt", "chunk": i})
-                        if docs:
-                            vector_store.add_documents(docs, metas)
-                            vector_store.save_index()  # Automatically save after vectorization
-                            st.session_state.vectorized_files.add(file.name)
-                            st.success(f"Vectorized {file.name} ({len(docs)} chunks)")
-                            newly_vectorized += 1
-                        else:
-                            st.warning(f"No content extracted from {file.name}")
-                    except Exception as e:
-                        st.error(f"Failed to vectorize {file.name}: {e}")
-                else:
-                    st.info(f"{file.name} already vectorized. Skipping.")
-            if newly_vectorized == 0:
+            files = st.session_state.uploaded_files
+            if files:
+                try:
+                    # The File Reader agent ingests in the background and survives reloads and restarts;
+                    # re-vectorizing is idempotent, unchanged chunks are kept and only new ones are embedded
+                    response = httpx.post(
+                        f"{settings.FILE_READER_URL}/ingest",
+                        files=[("files", (file.name, file.getvalue(), file.type or "application/octet-stream"))
+                               for file in files],
+                        timeout=60)
+                    response.raise_for_status()
+                    job = response.json()
+                    st.session_state.ingest_jobs.insert(0, job["job_id"])
+                    st.success(f"Queued {len(files)} file(s) for vectorization (job {job['job_id'][:8]})")
+                except Exception as e:
+                    st.error(f"Failed to submit {', '.join(file.name for file in files)}: {e}")
+            else:
                 st.info("No new files to vectorize.")
 
+    if st.session_state.ingest_jobs:
+        st.subheader("Vectorization Jobs")
+        # Re-run only the job panel every INGEST_POLL_INTERVAL seconds while a job is in progress
+        interval = settings.INGEST_POLL_INTERVAL if st.session_state.ingest_polling else None
+        st.fragment(run_every=interval)(show_ingest_jobs)()
+
 # Tab 3: URL Input
 with tab3:
     st.header("🌐 Input URLs for Scraping")
@@ -0,0 +1,116 @@
+"""Per-hop latency of a 3-agent chain: a new httpx client per call vs the shared pooled client.
+
+Starts three minimal A2A echo agents locally and drives the same sequential chain the
+orchestrator runs, once creating an AsyncClient per POST (the old behaviour) and once
+reusing a single keep-alive client from utils.http_client.
+
+    python -m benchmarks.bench_agent_hops --iterations 200
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from utils.http_client import create_async_client
+
+PORTS = [5201, 5202, 5203]
+
+
+def make_echo_agent() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/")
+    async def handle_a2a(request: Request):
+        data = await request.json()
+        text = data["params"]["message"]["parts"][0]["text"]
+        return JSONResponse({
+            "jsonrpc": "2.0",
+            "id": data.get("id"),
+            "result": {"message": {"role": "agent", "parts": [{"type": "text", "text": text}]}}
+        })
+
+    return app
+
+
+def start_agents():
+    servers = []
+    for port in PORTS:
+        server = uvicorn.Server(uvicorn.Config(make_echo_agent(), host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        servers.append(server)
+    while not all(server.started for server in servers):
+        time.sleep(0.05)
+    return servers
+
+
+def payload(text: str):
+    return {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "sendTask",
+        "params": {"id": "bench", "message": {"role": "user", "parts": [{"type": "text", "text": text}]}}
+    }
+
+
+async def run_chain(post, hop_times):
+    text = "benchmark query"
+    for port in PORTS:
+        start = time.perf_counter()
+        resp = await post(f"http://127.0.0.1:{port}/", payload(text))
+        hop_times.append((time.perf_counter() - start) * 1000)
+        text = resp.json()["result"]["message"]["parts"][0]["text"]
+
+
+async def bench_client_per_call(iterations: int):
+    async def post(url, body):
+        async with httpx.AsyncClient() as client:
+            return await client.post(url, json=body, timeout=30)
+    hop_times = []
+    for _ in range(iterations):
+        await run_chain(post, hop_times)
+    return hop_times
+
+
+async def bench_shared_client(iterations: int):
+    client = create_async_client()
+
+    async def post(url, body):
+        return await client.post(url, json=body, timeout=30)
+    hop_times = []
+    try:
+        for _ in range(iterations):
+            await run_chain(post, hop_times)
+    finally:
+        await client.aclose()
+    return hop_times
+
+
+def report(label: str, hop_times):
+    ordered = sorted(hop_times)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(ordered):7.2f} ms | p50 {statistics.median(ordered):7.2f} ms | "
+          f"p95 {p95:7.2f} ms | chain {statistics.mean(ordered) * len(PORTS):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    servers = start_agents()
+    try:
+        print(f"3-agent chain, {args.iterations} iterations, per-hop latency")
+        print("=" * 40)
+        report("client per call", asyncio.run(bench_client_per_call(args.iterations)))
+        report("shared pooled client", asyncio.run(bench_shared_client(args.iterations)))
+    finally:
+        for server in servers:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Recall@k vs query latency of the ANN index types against the exact flat baseline.
+
+Uses synthetic clustered, L2-normalized vectors (the shape of sentence embeddings) so
+no embedding model is needed. Each index is built with utils.index_factory exactly as
+VectorStore builds it, then searched with a sweep of nprobe / efSearch values.
+
+    python -m benchmarks.bench_ann_recall --vectors 200000 --dimension 384
+"""
+import argparse
+import time
+import numpy as np
+from utils.index_factory import build_index, search_params
+
+SWEEPS = {
+    "flat": [None],
+    "ivf_flat": [1, 4, 16, 64],
+    "ivf_pq": [1, 4, 16, 64],
+    "hnsw": [16, 32, 64, 128],
+}
+
+
+def make_vectors(n, d, clusters, rng):
+    centers = rng.standard_normal((clusters, d)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, d)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def recall_at_k(found, truth):
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+
+def timed_search(index, queries, k, params):
+    start = time.perf_counter()
+    # One query at a time, like the File Reader does
+    found = [index.search(query.reshape(1, -1), k, params=params)[1][0] for query in queries]
+    return np.array(found), (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(args.vectors, args.dimension, 256, rng)
+    queries = make_vectors(args.queries, args.dimension, 256, rng)
+
+    print(f"{args.vectors} vectors x {args.dimension} dims, {args.queries} queries, recall@{args.k}")
+    print("=" * 40)
+    truth = None
+    for kind, sweep in SWEEPS.items():
+        start = time.perf_counter()
+        index = build_index(kind, vectors, np.arange(len(vectors)), args.nlist, args.pq_m, args.hnsw_m)
+        build_s = time.perf_counter() - start
+        for value in sweep:
+            params = search_params(index, nprobe=value, ef_search=value)
+            found, latency = timed_search(index, queries, args.k, params)
+            if truth is None:
+                truth = found
+            label = kind if value is None else f"{kind} ({'efSearch' if kind == 'hnsw' else 'nprobe'}={value})"
+            print(f"{label:<26} recall {recall_at_k(found, truth):6.3f} | {latency:7.3f} ms/query | "
+                  f"build {build_s:6.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Embedding throughput (chunks/sec on CPU): per-file encode vs the bulk EmbeddingManager pipeline.
+
+Builds a synthetic corpus with the length spread of real ingestion (short CSV rows mixed
+with long PDF pages), then embeds it the old way (one encode per file, normalize and cast
+afterwards) and through embed_texts with several batch sizes and, optionally, worker processes.
+
+    python -m benchmarks.bench_embeddings --chunks 4000 --processes 4
+"""
+import argparse
+import random
+import time
+import numpy as np
+from utils.embeddings import embedding_manager
+
+WORDS = ("revenue growth quarter market analysis customer product region forecast model data "
+         "report strategy cost margin team risk").split()
+
+
+def make_corpus(n, rng):
+    corpus = []
+    for _ in range(n):
+        # ~70% short rows, ~30% long pages
+        length = rng.randint(8, 30) if rng.random() < 0.7 else rng.randint(150, 400)
+        corpus.append(" ".join(rng.choice(WORDS) for _ in range(length)))
+    return corpus
+
+
+def bench_per_file(corpus, file_size):
+    model = embedding_manager.model
+    start = time.perf_counter()
+    for i in range(0, len(corpus), file_size):
+        embeddings = model.encode(corpus[i:i + file_size], show_progress_bar=False)
+        embeddings = (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).astype("float32")
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def bench_bulk(corpus, batch_size):
+    start = time.perf_counter()
+    embedding_manager.embed_texts(corpus, batch_size=batch_size)
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--file-size", type=int, default=50, help="chunks per file for the per-file baseline")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--processes", type=int, default=0, help="also run with this many worker processes")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.chunks, random.Random(0))
+    # Warm up model loading so it isn't counted
+    embedding_manager.embed_texts(corpus[:8])
+    print(f"{args.chunks} chunks, model {embedding_manager.model_name} on {embedding_manager.device}")
+    print("=" * 40)
+    print(f"{'per-file encode':<28} {bench_per_file(corpus, args.file_size):8.1f} chunks/s")
+    embedding_manager.processes = 0
+    for batch_size in args.batch_sizes:
+        print(f"{f'bulk, batch {batch_size}':<28} {bench_bulk(corpus, batch_size):8.1f} chunks/s")
+    if args.processes > 1:
+        embedding_manager.processes = args.processes
+        embedding_manager.embed_texts(corpus[:4 * max(args.batch_sizes)])  # start the pool
+        for batch_size in args.batch_sizes:
+            label = f"bulk, batch {batch_size}, {args.processes} procs"
+            print(f"{label:<28} {bench_bulk(corpus, batch_size):8.1f} chunks/s")
+        embedding_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Disk bytes written per ingested file: full index rewrite per save vs append-only segments.
+
+Mirrors the "Vectorize Files" loop (add_documents + save_index per file). Embeddings are
+replaced by random unit vectors so the numbers reflect persistence I/O only. Bytes are read
+from /proc/self/io (Linux).
+
+    python -m benchmarks.bench_ingest_writes --files 200 --chunks 50
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import faiss
+import numpy as np
+
+DIMENSION = 384
+
+
+def written_bytes() -> int:
+    with open("/proc/self/io") as f:
+        for line in f:
+            if line.startswith("wchar:"):
+                return int(line.split()[1])
+    return 0
+
+
+def random_embeddings(texts):
+    vectors = np.random.default_rng(len(texts)).standard_normal((len(texts), DIMENSION)).astype(np.float32)
+    return vectors
+
+
+def chunks_for(file_no, n):
+    return [f"file {file_no} chunk {i} " + "lorem ipsum dolor sit amet " * 20 for i in range(n)]
+
+
+def bench_full_rewrite(directory, files, chunks):
+    """The old save_index: rewrite the whole FAISS index and pickle after every file"""
+    index = faiss.IndexFlatIP(DIMENSION)
+    documents, metadata = [], []
+    per_file = []
+    for f in range(files):
+        texts = chunks_for(f, chunks)
+        index.add(random_embeddings(texts))
+        documents.extend(texts)
+        metadata.extend({"filename": f"file{f}", "chunk": i} for i in range(chunks))
+        before = written_bytes()
+        faiss.write_index(index, os.path.join(directory, "faiss.index"))
+        with open(os.path.join(directory, "faiss.index.metadata"), "wb") as out:
+            pickle.dump({"documents": documents, "metadata": metadata, "dimension": DIMENSION}, out)
+        per_file.append(written_bytes() - before)
+    return per_file
+
+
+def bench_segments(directory, files, chunks):
+    os.environ["FAISS_INDEX_PATH"] = os.path.join(directory, "faiss.index")
+    from utils import vector_store as vs_module
+    vs_module.embedding_manager.embed_texts = random_embeddings
+    store = vs_module.VectorStore()
+    per_file = []
+    for f in range(files):
+        store.add_documents(chunks_for(f, chunks), [{"filename": f"file{f}", "chunk": i} for i in range(chunks)])
+        before = written_bytes()
+        store.save_index()
+        # Compaction runs in the background; let it finish so its writes are counted
+        if store._compactor is not None:
+            store._compactor.join()
+        per_file.append(written_bytes() - before)
+    return per_file
+
+
+def report(label, per_file, chunks):
+    total = sum(per_file)
+    print(f"{label:<18} total {total / 2**20:9.1f} MB | last file {per_file[-1] / 2**20:7.2f} MB | "
+          f"{total / (len(per_file) * chunks) / 1024:7.1f} KB per chunk")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.files} files x {args.chunks} chunks, {DIMENSION}-dim vectors")
+    print("=" * 40)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        report("full rewrite", bench_full_rewrite(directory, args.files, args.chunks), args.chunks)
+        print(f"{'':<18} {time.perf_counter() - start:.1f} s")
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        report("append segments", bench_segments(directory, args.files, args.chunks), args.chunks)
+        print(f"{'':<18} {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
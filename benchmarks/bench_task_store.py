@@ -0,0 +1,91 @@
+"""Memory held by orchestrator task state after N tasks: plain dict vs the bounded task stores.
+
+Each task goes through the same writes a 3-agent workflow makes (3 step updates,
+3 artifacts). Python heap usage is measured with tracemalloc; /status read latency
+is sampled over the most recent tasks.
+
+    python -m benchmarks.bench_task_store --tasks 100000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from utils.task_store import InMemoryTaskStore, SQLiteTaskStore
+
+AGENTS = ["Web Search Agent", "Summarizer Agent", "Elaborator Agent"]
+CONTENT = "lorem ipsum dolor sit amet " * 40  # ~1 KB per artifact
+
+
+class DictTaskStore:
+    """The old behaviour: a module-level dict that is never pruned"""
+    def __init__(self):
+        self.tasks = {}
+
+    def create(self, task_id, user_message, steps):
+        self.tasks[task_id] = {"status": "pending", "steps": steps, "artifacts": [], "user_message": user_message}
+
+    def get(self, task_id):
+        return self.tasks.get(task_id)
+
+    def set_status(self, task_id, status):
+        self.tasks[task_id]["status"] = status
+
+    def set_step(self, task_id, index, status):
+        self.tasks[task_id]["steps"][index]["status"] = status
+
+    def append_artifact(self, task_id, artifact):
+        self.tasks[task_id]["artifacts"].append(artifact)
+
+
+def run_workflow(store, task_id):
+    store.create(task_id, "benchmark query", [{"agent": agent, "status": "pending"} for agent in AGENTS])
+    for idx, agent in enumerate(AGENTS):
+        store.set_step(task_id, idx, "completed")
+        store.append_artifact(task_id, {"agent": agent, "type": "text", "content": CONTENT})
+    store.set_status(task_id, "completed")
+
+
+def bench(label, store, n_tasks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    task_ids = []
+    for _ in range(n_tasks):
+        task_id = str(uuid.uuid4())
+        run_workflow(store, task_id)
+        task_ids.append(task_id)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    read_times = []
+    for task_id in task_ids[-1000:]:
+        t0 = time.perf_counter()
+        store.get(task_id)
+        read_times.append((time.perf_counter() - t0) * 1e6)
+    # Memory of task_ids itself is the same for every store
+    print(f"{label:<24} heap {current / 2**20:8.1f} MB | peak {peak / 2**20:8.1f} MB | "
+          f"{n_tasks / elapsed:8.0f} tasks/s | status read p50 {statistics.median(read_times):7.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--max-entries", type=int, default=10000)
+    parser.add_argument("--ttl", type=float, default=86400)
+    args = parser.parse_args()
+
+    print(f"{args.tasks} tasks, {len(AGENTS)} agents each, max entries {args.max_entries}")
+    print("=" * 40)
+    bench("dict (unbounded)", DictTaskStore(), args.tasks)
+    bench("memory (LRU + TTL)", InMemoryTaskStore(args.ttl, args.max_entries), args.tasks)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteTaskStore(os.path.join(tmp, "tasks.db"), args.ttl, args.max_entries)
+        bench("sqlite", store, args.tasks)
+        print(f"{'':<24} db file {os.path.getsize(store.path) / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
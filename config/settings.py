@@ -8,6 +8,107 @@ class Settings:
     MAX_SEARCH_RESULTS: int = 5
     MAX_SCRAPING_PAGES: int = 5
     
+    # Orchestrator Configuration
+    AGENT_PROBE_TIMEOUT: float = float(os.environ.get("AGENT_PROBE_TIMEOUT", "2"))
+    AGENT_PROBE_INTERVAL: float = float(os.environ.get("AGENT_PROBE_INTERVAL", "1"))
+    AGENT_CARD_TTL: float = float(os.environ.get("AGENT_CARD_TTL", "30"))
+    AGENT_READY_TIMEOUT: float = float(os.environ.get("AGENT_READY_TIMEOUT", "15"))
+    
+    # Orchestrator HTTP client (shared keep-alive pool)
+    HTTP_MAX_CONNECTIONS: int = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_PER_AGENT_CONNECTIONS: int = int(os.environ.get("HTTP_PER_AGENT_CONNECTIONS", "10"))
+    HTTP_TIMEOUT: float = float(os.environ.get("HTTP_TIMEOUT", "30"))
+    HTTP2_ENABLED: bool = os.environ.get("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+    # Orchestrator task store ("memory" or "sqlite")
+    TASK_STORE_BACKEND: str = os.environ.get("TASK_STORE_BACKEND", "memory")
+    TASK_STORE_PATH: str = os.environ.get("TASK_STORE_PATH", "tasks.db")
+    TASK_TTL: float = float(os.environ.get("TASK_TTL", "86400"))
+    TASK_MAX_ENTRIES: int = int(os.environ.get("TASK_MAX_ENTRIES", "10000"))
+
+    # In-flight LLM calls per process
+    LLM_MAX_CONCURRENCY: int = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+
+    # LLM response cache (exact match, optionally semantic)
+    LLM_CACHE_ENABLED: bool = os.environ.get("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_PATH: str = os.environ.get("LLM_CACHE_PATH", "llm_cache.db")
+    LLM_CACHE_TTL: float = float(os.environ.get("LLM_CACHE_TTL", "86400"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+    LLM_SEMANTIC_CACHE: bool = os.environ.get("LLM_SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes")
+    LLM_SEMANTIC_THRESHOLD: float = float(os.environ.get("LLM_SEMANTIC_THRESHOLD", "0.95"))
+
+    # Orchestrator agent routing: keyword fast path, then embedding similarity to the agent cards
+    ROUTER_KEYWORDS_ENABLED: bool = os.environ.get("ROUTER_KEYWORDS_ENABLED", "true").lower() in ("1", "true", "yes")
+    ROUTER_THRESHOLD: float = float(os.environ.get("ROUTER_THRESHOLD", "0.3"))
+    ROUTER_MARGIN: float = float(os.environ.get("ROUTER_MARGIN", "0.1"))
+    ROUTER_MAX_AGENTS: int = int(os.environ.get("ROUTER_MAX_AGENTS", "3"))
+
+    # Background ingestion jobs (File Reader agent)
+    INGEST_JOB_PATH: str = os.environ.get("INGEST_JOB_PATH", "ingest_jobs.db")
+    INGEST_UPLOAD_DIR: str = os.environ.get("INGEST_UPLOAD_DIR", "uploads")
+    INGEST_CHECKPOINT_BATCHES: int = int(os.environ.get("INGEST_CHECKPOINT_BATCHES", "4"))
+    INGEST_JOB_MAX_ENTRIES: int = int(os.environ.get("INGEST_JOB_MAX_ENTRIES", "1000"))
+    # Seconds between status polls of the Streamlit app while a job is queued or running
+    INGEST_POLL_INTERVAL: float = float(os.environ.get("INGEST_POLL_INTERVAL", "1"))
+    FILE_READER_URL: str = os.environ.get("FILE_READER_URL", "http://localhost:5103")
+
+    # File Reader RAG context packing
+    CONTEXT_TOKEN_BUDGET: int = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1500"))
+    CONTEXT_CHUNK_TOKENS: int = int(os.environ.get("CONTEXT_CHUNK_TOKENS", "400"))
+
+    # Embeddings (model, batching, persistent and query caches)
+    EMBEDDING_MODEL: str = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_DEVICE: str = os.environ.get("EMBEDDING_DEVICE", "cpu")
+    EMBEDDING_BATCH_SIZE: int = int(os.environ.get("EMBEDDING_BATCH_SIZE", "64"))
+    # Worker processes for bulk encoding; 0 or 1 keeps everything in-process
+    EMBEDDING_PROCESSES: int = int(os.environ.get("EMBEDDING_PROCESSES", "0"))
+    EMBEDDING_CACHE_SIZE: int = int(os.environ.get("EMBEDDING_CACHE_SIZE", "200000"))
+    EMBEDDING_CACHE_DIR: str = os.environ.get("EMBEDDING_CACHE_DIR", "embedding_cache")
+    EMBEDDING_QUERY_CACHE_SIZE: int = int(os.environ.get("EMBEDDING_QUERY_CACHE_SIZE", "1024"))
+
+    # FAISS vector index ("flat", "ivf_flat", "ivf_pq" or "hnsw") and segment compaction
+    FAISS_INDEX_PATH: str = os.environ.get("FAISS_INDEX_PATH", "faiss.index")
+    FAISS_INDEX_TYPE: str = os.environ.get("FAISS_INDEX_TYPE", "flat").lower()
+    FAISS_NLIST: int = int(os.environ.get("FAISS_NLIST", "256"))
+    FAISS_PQ_M: int = int(os.environ.get("FAISS_PQ_M", "16"))
+    FAISS_HNSW_M: int = int(os.environ.get("FAISS_HNSW_M", "32"))
+    FAISS_NPROBE: int = int(os.environ.get("FAISS_NPROBE", "16"))
+    FAISS_EF_SEARCH: int = int(os.environ.get("FAISS_EF_SEARCH", "64"))
+    FAISS_COMPACT_SEGMENTS: int = int(os.environ.get("FAISS_COMPACT_SEGMENTS", "8"))
+    FAISS_COMPACT_RATIO: float = float(os.environ.get("FAISS_COMPACT_RATIO", "0.25"))
+    # Rebuild once this fraction of the indexed vectors belongs to deleted chunks
+    FAISS_TOMBSTONE_RATIO: float = float(os.environ.get("FAISS_TOMBSTONE_RATIO", "0.2"))
+
+    # Hybrid retrieval: BM25 plus dense, fused by reciprocal rank
+    BM25_K1: float = float(os.environ.get("BM25_K1", "1.5"))
+    BM25_B: float = float(os.environ.get("BM25_B", "0.75"))
+    RRF_K: int = int(os.environ.get("RRF_K", "60"))
+    # Candidates taken from each of the dense and BM25 rankings before fusion
+    HYBRID_CANDIDATES: int = int(os.environ.get("HYBRID_CANDIDATES", "50"))
+
+    # Cross-encoder re-ranking of retrieved chunks
+    RERANK_ENABLED: bool = os.environ.get("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+    RERANKER_MODEL: str = os.environ.get("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANKER_DEVICE: str = os.environ.get("RERANKER_DEVICE", "cpu")
+    RERANK_CANDIDATES: int = int(os.environ.get("RERANK_CANDIDATES", "20"))
+    RERANK_TOP_K: int = int(os.environ.get("RERANK_TOP_K", "3"))
+    RERANK_BATCH_SIZE: int = int(os.environ.get("RERANK_BATCH_SIZE", "32"))
+    RERANK_CACHE_SIZE: int = int(os.environ.get("RERANK_CACHE_SIZE", "4096"))
+
+    # Ingestion pipeline and chunking
+    # Worker processes for PDF page extraction; 0 or 1 extracts in the producer thread
+    INGEST_PROCESSES: int = int(os.environ.get("INGEST_PROCESSES", str(os.cpu_count() or 1)))
+    INGEST_PDF_PAGES_PER_TASK: int = int(os.environ.get("INGEST_PDF_PAGES_PER_TASK", "4"))
+    INGEST_QUEUE_BATCHES: int = int(os.environ.get("INGEST_QUEUE_BATCHES", "4"))
+    # Chunks embedded per batch by upsert_stream()
+    INGEST_BATCH_SIZE: int = int(os.environ.get("INGEST_BATCH_SIZE", "256"))
+    # all-MiniLM-L6-v2 truncates inputs at 256 word pieces, so larger chunks would be cut off silently
+    CHUNK_TOKENS: int = int(os.environ.get("CHUNK_TOKENS", "256"))
+    CHUNK_OVERLAP: int = int(os.environ.get("CHUNK_OVERLAP", "32"))
+    TOKEN_ENCODING: str = os.environ.get("TOKEN_ENCODING", "cl100k_base")
+
     # UI Configuration
     PAGE_TITLE: str = "A2A Multi-Agent Demo"
     PAGE_ICON: str = "🤖"
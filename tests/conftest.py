@@ -0,0 +1,89 @@
+import atexit
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The module singletons (vector store, ingestion job store) open their files on import: keep them
+# out of the working tree, and keep the persistent embedding cache off
+_scratch = tempfile.mkdtemp(prefix="a2a-tests-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ.update(
+    FAISS_INDEX_PATH=os.path.join(_scratch, "faiss.index"),
+    INGEST_JOB_PATH=os.path.join(_scratch, "ingest_jobs.db"),
+    INGEST_UPLOAD_DIR=os.path.join(_scratch, "uploads"),
+    EMBEDDING_CACHE_SIZE="0",
+)
+
+DIMENSION = 32
+
+
+class FakeEncoder:
+    """Bag-of-words hashing encoder standing in for the sentence-transformers model.
+
+    Texts sharing words get similar vectors, which is all the store tests need, without a model download.
+    """
+    def __init__(self, *args, **kwargs):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        vectors = np.zeros((len(texts), DIMENSION), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % DIMENSION] += 1.0
+        self.encoded += len(texts)
+        return vectors
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIMENSION
+
+
+try:
+    import sentence_transformers  # noqa: F401
+except ImportError:
+    # utils.embeddings imports the model class at module level; the tests never load a real model
+    sys.modules["sentence_transformers"] = types.ModuleType("sentence_transformers")
+    sys.modules["sentence_transformers"].SentenceTransformer = FakeEncoder
+
+
+@pytest.fixture
+def encoder(monkeypatch) -> FakeEncoder:
+    """The fake model, installed on the embedding manager singleton"""
+    from utils.embeddings import embedding_manager
+    fake = FakeEncoder()
+    monkeypatch.setattr(embedding_manager, "_model", fake)
+    monkeypatch.setattr(embedding_manager, "_query_cache", OrderedDict())
+    return fake
+
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch, encoder):
+    """Factory for VectorStore instances sharing one index path, like the File Reader and its readers.
+
+    Compaction only runs when a test calls compact(), so it never races the assertions.
+    """
+    from config.settings import settings
+    from utils.vector_store import VectorStore
+    monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path / "vs" / "faiss.index"))
+    monkeypatch.setattr(settings, "FAISS_COMPACT_SEGMENTS", 1000)
+    monkeypatch.setattr(settings, "FAISS_TOMBSTONE_RATIO", 1.0)
+    stores = []
+
+    def make():
+        store = VectorStore()
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        if store._compactor is not None:
+            store._compactor.join()
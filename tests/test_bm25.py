@@ -0,0 +1,53 @@
+from utils.bm25 import BM25Index, tokenize
+
+DOCS = {
+    1: "Invoice INV-2023-001 for consulting services",
+    2: "Invoice INV-2024-117 for hardware",
+    3: "Meeting notes about the hardware rollout and the rollout schedule",
+    4: "Quarterly report",
+}
+
+
+def build() -> BM25Index:
+    index = BM25Index()
+    index.add_many(DOCS.items())
+    return index
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("Invoice INV-2023-001!") == ["invoice", "inv", "2023", "001"]
+
+
+def test_exact_identifiers_rank_first():
+    index = build()
+    assert [chunk for chunk, _ in index.search("INV-2023-001", k=2)] == [1, 2]
+    assert index.search("2024", k=5)[0][0] == 2
+
+
+def test_term_frequency_and_rarity():
+    index = build()
+    hits = dict(index.search("rollout", k=5))
+    assert list(hits) == [3]
+    assert index.search("hardware rollout", k=1)[0][0] == 3
+
+
+def test_allowed_and_empty_queries():
+    index = build()
+    assert [chunk for chunk, _ in index.search("invoice", k=5, allowed={2, 4})] == [2]
+    assert index.search("", k=5) == []
+    assert index.search("unknown", k=5) == []
+    assert index.search("invoice", k=0) == []
+
+
+def test_remove_and_compact():
+    index = build()
+    index.add(1, "duplicate add is ignored")
+    assert len(index) == 4
+    index.remove(1)
+    index.remove(99)
+    assert [chunk for chunk, _ in index.search("invoice", k=5)] == [2]
+    scores = dict(index.search("hardware", k=5))
+    index._compact()
+    assert dict(index.search("hardware", k=5)) == scores
+    index.add(5, "hardware invoice")
+    assert {chunk for chunk, _ in index.search("invoice", k=5)} == {2, 5}
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+
+import utils.chunking as chunking
+from utils.chunking import chunk_file, iter_json, pack
+from utils.tokens import count_tokens
+
+
+def members(data: bytes):
+    return list(iter_json(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")))
+
+
+@pytest.fixture(params=[7, 1 << 16], ids=["tiny-reads", "default-reads"])
+def read_block(request, monkeypatch):
+    monkeypatch.setattr(chunking, "READ_BLOCK", request.param)
+
+
+def test_iter_json_object(read_block):
+    data = {"a": [1, 2, {"x": "y"}], "b": 12345, "c": "str \" with , quotes }", "d": {"nested": [True, None, 1.5e3]}}
+    assert dict(members(json.dumps(data).encode())) == data
+
+
+def test_iter_json_array(read_block):
+    data = [{"id": i, "text": "x" * i} for i in range(50)]
+    assert members(json.dumps(data, indent=2).encode()) == list(enumerate(data))
+
+
+@pytest.mark.parametrize("data, expected", [
+    (b" 42 ", [(None, 42)]),
+    (b'"text"', [(None, "text")]),
+    (b"[]", []),
+    (b"{ }", []),
+    (b"[1, [2, 3]]", [(0, 1), (1, [2, 3])]),
+])
+def test_iter_json_small_documents(read_block, data, expected):
+    assert members(data) == expected
+
+
+def test_iter_json_rejects_malformed_input():
+    with pytest.raises(ValueError):
+        members(b'[1, 2 "x"]')
+
+
+def test_pack_respects_budget_and_overlap():
+    units = [f"Paragraph {i}. " + "word " * 20 for i in range(20)]
+    chunks = list(pack(units, max_tokens=60, overlap=25))
+    assert all(count_tokens(chunk) <= 60 for chunk in chunks)
+    # Every unit survives, and each chunk but the first repeats the last unit of the previous one
+    assert all(any(unit.strip() in chunk for chunk in chunks) for unit in units)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(previous.split("\n\n")[-1])
+
+
+def test_pack_splits_oversized_units():
+    chunks = list(pack(["Short one.", "word " * 500], max_tokens=50, overlap=0))
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+
+
+def test_pack_keeps_indentation_inside_units():
+    lines = ["{", '  "a": 1,', '  "b": 2', "}"]
+    assert list(pack(lines, max_tokens=100, overlap=0, separator="\n")) == ["\n".join(lines)]
+
+
+def test_pack_skips_blank_units():
+    assert list(pack(["", "  ", "\n"], max_tokens=10)) == []
+
+
+def test_chunk_file_csv_rows():
+    data = b"name,value\n" + b"".join(b"item%d,%d\n" % (i, i) for i in range(5))
+    chunks = list(chunk_file("data.csv", io.BytesIO(data)))
+    assert [meta["row"] for _, meta in chunks] == list(range(5))
+    assert chunks[2][0] == "name: item2, value: 2"
+
+
+def test_chunk_file_json_keys():
+    data = json.dumps({"intro": "hello", "body": {"text": "world"}}).encode()
+    chunks = list(chunk_file("data.json", io.BytesIO(data)))
+    assert [meta["key"] for _, meta in chunks] == ["intro", "body"]
+    assert chunks[0][0] == 'intro: "hello"'
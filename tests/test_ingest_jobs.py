@@ -0,0 +1,110 @@
+import io
+import os
+import shutil
+
+import pytest
+
+import utils.ingest_jobs as ingest_jobs_module
+import utils.ingestion as ingestion_module
+from config.settings import settings
+from utils.chunking import chunk_file
+from utils.ingest_jobs import IngestJobRunner, IngestJobStore
+from utils.ingestion import ingestor
+
+ROWS = b"id,text\n" + b"".join(b"%d,row number %d\n" % (i, i) for i in range(23))
+TOTAL = sum(1 for _ in chunk_file("rows.csv", io.BytesIO(ROWS)))
+
+
+class Crash(BaseException):
+    """Stands in for the process being killed: the runner's error handling never sees it"""
+
+
+@pytest.fixture
+def store(make_store, monkeypatch):
+    """A fresh vector store in place of the singleton the ingestion modules use"""
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 4)
+
+    def use():
+        vector_store = make_store()
+        monkeypatch.setattr(ingestion_module, "vector_store", vector_store)
+        monkeypatch.setattr(ingest_jobs_module, "vector_store", vector_store)
+        return vector_store
+
+    return use
+
+
+def test_progress_counts_are_stored_chunks(store):
+    vector_store = store()
+    seen = []
+    report = ingestor.ingest({"rows.csv": io.BytesIO(ROWS)},
+                             progress=lambda progress: seen.append((progress["chunks"], vector_store.docs.live)))
+    assert report["rows.csv"]["chunks"] == TOTAL
+    assert [chunks for chunks, _ in seen] == list(range(4, TOTAL, 4)) + [TOTAL]
+    assert all(chunks == live for chunks, live in seen)
+
+
+def test_job_records_checkpoints(store, tmp_path):
+    store()
+    jobs = IngestJobStore(str(tmp_path / "jobs.db"), 100)
+    runner = IngestJobRunner(jobs, str(tmp_path / "uploads"), checkpoint_batches=2)
+    checkpoints = []
+    progress = jobs.progress
+
+    def record(job_id, position, chunks, fraction, checkpoint=False):
+        progress(job_id, position, chunks, fraction, checkpoint)
+        if checkpoint:
+            checkpoints.append(jobs.get(job_id)["files"][position]["checkpoint"])
+
+    jobs.progress = record
+    runner.start()
+    job_id = runner.submit([("rows.csv", io.BytesIO(ROWS))])
+    runner.stop()
+    job = jobs.get(job_id)
+    assert job["status"] == "completed"
+    assert checkpoints == [8, 16, TOTAL]
+    assert job["files"][0]["checkpoint"] == job["files"][0]["chunks"] == TOTAL
+    assert not os.path.exists(tmp_path / "uploads" / job_id)
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(store, tmp_path, encoder, monkeypatch):
+    store()
+    path = str(tmp_path / "jobs.db")
+    jobs = IngestJobStore(path, 100)
+    runner = IngestJobRunner(jobs, str(tmp_path / "uploads"), checkpoint_batches=2)
+    job_id = runner.submit([("rows.csv", io.BytesIO(ROWS))])
+    progress = jobs.progress
+
+    def crash_after_checkpoint(job_id, position, chunks, fraction, checkpoint=False):
+        progress(job_id, position, chunks, fraction, checkpoint)
+        if checkpoint:
+            raise Crash()
+
+    with monkeypatch.context() as m:
+        m.setattr(jobs, "progress", crash_after_checkpoint)
+        # A killed process never gets to remove the uploads
+        m.setattr(shutil, "rmtree", lambda *args, **kwargs: None)
+        with pytest.raises(Crash):
+            runner._run(job_id)
+    job = jobs.get(job_id)
+    assert job["status"] == "running"
+    assert job["files"][0]["checkpoint"] == 8
+
+    # Restart: a new process loads the saved store and re-queues the job
+    restarted = store()
+    assert restarted.docs.live == 8
+    encoded = encoder.encoded
+    jobs = IngestJobStore(path, 100)
+    assert jobs.unfinished() == [job_id]
+    runner = IngestJobRunner(jobs, str(tmp_path / "uploads"), checkpoint_batches=2)
+    runner.start()
+    runner.stop()
+
+    job = jobs.get(job_id)
+    assert job["status"] == "completed" and job["runs"] == 2
+    assert job["files"][0]["checkpoint"] == TOTAL
+    report = job["files"][0]["report"]
+    assert (report["unchanged"], report["added"], report["removed"]) == (8, TOTAL - 8, 0)
+    # Only the chunks past the checkpoint were embedded again
+    assert encoder.encoded - encoded == TOTAL - 8
+    assert store().docs.live == TOTAL
+    assert jobs.unfinished() == []
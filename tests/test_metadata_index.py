@@ -0,0 +1,77 @@
+import pytest
+
+from utils.metadata_index import MetadataIndex
+
+METAS = {
+    1: {"filename": "a.pdf", "type": "pdf", "page": 1, "chunk": 0},
+    2: {"filename": "a.pdf", "type": "pdf", "page": 2, "chunk": 1},
+    3: {"filename": "b.csv", "type": "csv", "row": 0, "chunk": 0},
+    4: {"filename": "b.csv", "type": "csv", "row": 1, "chunk": 1.5, "flag": True},
+    5: {"filename": "c.txt", "type": "text", "chunk": 2, "tags": ["x", "y"]},
+}
+
+
+@pytest.fixture
+def index() -> MetadataIndex:
+    index = MetadataIndex()
+    for chunk_id, meta in METAS.items():
+        index.add(chunk_id, meta)
+    return index
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"filename": "a.pdf"}, {1, 2}),
+    ({"type": ["pdf", "text"]}, {1, 2, 5}),
+    ({"chunk": {"gte": 1}}, {2, 4, 5}),
+    ({"chunk": {"gt": 0, "lt": 2}}, {2, 4}),
+    ({"chunk": {"lte": 1.5}}, {1, 2, 3, 4}),
+    ({"chunk": {"eq": 0}}, {1, 3}),
+    ({"chunk": {"in": [0, 2]}}, {1, 3, 5}),
+    ({"chunk": {"in": [0, 1, 2], "gte": 1}}, {2, 5}),
+    ({"type": "pdf", "page": {"gte": 2}}, {2}),
+    ({"filename": "b.csv", "flag": True}, {4}),
+    ({"filename": "missing"}, set()),
+    ({"unknown_field": 1}, set()),
+    ({"filename": "a.pdf", "type": "csv"}, set()),
+    ({"filename": None}, set()),
+    ({}, set()),
+])
+def test_match(index, where, expected):
+    assert index.match(where) == expected
+
+
+def test_list_values_are_not_indexed(index):
+    assert index.match({"tags": "x"}) == set()
+
+
+def test_booleans_stay_out_of_numeric_ranges(index):
+    assert index.match({"flag": {"gte": 0}}) == set()
+
+
+def test_remove_updates_values_and_ranges(index):
+    assert index.match({"chunk": {"gt": 1}}) == {4, 5}
+    index.remove(4, METAS[4])
+    assert index.match({"chunk": {"gt": 1}}) == {5}
+    assert index.match({"filename": "b.csv"}) == {3}
+    index.add(6, {"filename": "b.csv", "chunk": 7})
+    assert index.match({"chunk": {"gt": 1}}) == {5, 6}
+    assert index.size == 5
+
+
+@pytest.mark.parametrize("where, message", [
+    (["filename"], "Filter must be an object"),
+    ("a.pdf", "Filter must be an object"),
+    ({"chunk": {"gte": "2"}}, "'gte' expects a number"),
+    ({"chunk": {"lt": None}}, "'lt' expects a number"),
+    ({"chunk": {"gt": True}}, "'gt' expects a number"),
+    ({"chunk": {"between": [1, 2]}}, "expected operators"),
+    ({"chunk": {}}, "expected operators"),
+    ({"chunk": {"gte": 1, "max": 2}}, "expected operators"),
+    ({"filename": {"in": "a.pdf"}}, "'in' expects a list"),
+    ({"filename": {"eq": ["a.pdf"]}}, "is not a string, number or boolean"),
+    ({"filename": [["a.pdf"]]}, "is not a string, number or boolean"),
+    ({"filename": [{"eq": "a.pdf"}]}, "is not a string, number or boolean"),
+])
+def test_malformed_filters_raise_value_error(index, where, message):
+    with pytest.raises(ValueError, match=message):
+        index.match(where)
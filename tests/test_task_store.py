@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from utils.task_store import InMemoryTaskStore, SQLiteTaskStore
+
+STEPS = [{"agent": "Web Search Agent", "status": "pending"}, {"agent": "Summarizer Agent", "status": "pending"}]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make(request, tmp_path):
+    def make(ttl: float = 3600, max_tasks: int = 100):
+        if request.param == "memory":
+            return InMemoryTaskStore(ttl, max_tasks)
+        return SQLiteTaskStore(str(tmp_path / "tasks.db"), ttl, max_tasks)
+    return make
+
+
+def test_task_lifecycle(make):
+    store = make()
+    store.create("t1", "hello", STEPS)
+    store.set_status("t1", "running")
+    store.set_step("t1", 0, "completed")
+    store.set_step("t1", 5, "completed")
+    store.append_artifact("t1", {"agent": "Web Search Agent", "text": "result"})
+    task = store.get("t1")
+    assert task["status"] == "running"
+    assert [step["status"] for step in task["steps"]] == ["completed", "pending"]
+    assert task["artifacts"] == [{"agent": "Web Search Agent", "text": "result"}]
+    assert task["user_message"] == "hello"
+    assert STEPS[0]["status"] == "pending"
+    assert "t1" in store and "t2" not in store
+    store.set_status("t2", "running")
+    assert len(store) == 1
+
+
+def test_expired_tasks_are_gone(make):
+    store = make(ttl=0.05)
+    store.create("t1", "hello", STEPS)
+    time.sleep(0.1)
+    assert store.get("t1") is None
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = InMemoryTaskStore(3600, 2)
+    store.create("t1", "a", STEPS)
+    store.create("t2", "b", STEPS)
+    store.get("t1")
+    store.create("t3", "c", STEPS)
+    assert "t1" in store and "t3" in store and "t2" not in store
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = SQLiteTaskStore(path, 3600, 100)
+    store.create("done", "a", STEPS)
+    store.set_status("done", "completed")
+    store.create("running", "b", STEPS)
+    store.set_status("running", "running")
+    store.append_artifact("running", {"text": "partial"})
+    store.create("old", "c", STEPS)
+    store.create("new", "d", STEPS)
+
+    restarted = SQLiteTaskStore(path, 3600, 100)
+    assert restarted.get("done")["status"] == "completed"
+    # A task in flight when the process stopped can't finish any more
+    assert restarted.get("running")["status"] == "failed"
+    assert restarted.get("running")["artifacts"] == [{"text": "partial"}]
+
+    # Opening with a smaller limit drops the least recently updated tasks
+    restarted = SQLiteTaskStore(path, 3600, 3)
+    assert len(restarted) == 3 and "done" not in restarted
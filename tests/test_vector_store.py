@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+from config.settings import settings
+
+
+def chunks(name: str, count: int):
+    """(texts, metadata) of a file whose chunks all mention its name"""
+    return [f"{name} chunk {i} about {name}" for i in range(count)], [{"chunk": i} for i in range(count)]
+
+
+def contents(store):
+    return sorted((store.docs.meta(i)["filename"], store.docs.text(i)) for _, i in store.docs.live_rows())
+
+
+@pytest.fixture(params=["flat", "hnsw"])
+def index_type(request, monkeypatch):
+    monkeypatch.setattr(settings, "FAISS_INDEX_TYPE", request.param)
+    return request.param
+
+
+def test_reader_catches_up_on_each_save(make_store, index_type):
+    writer = make_store()
+    writer.upsert({"alpha.txt": chunks("alpha", 3)})
+    writer.save_index()
+    reader = make_store()
+    assert contents(reader) == contents(writer)
+    assert reader.refresh() is False
+    for name in ("beta", "gamma", "delta"):
+        writer.upsert({f"{name}.txt": chunks(name, 4)})
+        writer.save_index()
+        assert reader.refresh() is True
+        assert reader.generation == writer.generation
+        assert reader.index.ntotal == writer.index.ntotal
+        assert contents(reader) == contents(writer)
+        assert reader.refresh() is False
+        top = reader.hybrid_search(name, k=1)
+        assert top[0][2]["filename"] == f"{name}.txt"
+
+
+def test_reader_sees_deletes_and_replacements(make_store, index_type):
+    writer = make_store()
+    writer.upsert({"alpha.txt": chunks("alpha", 3), "beta.txt": chunks("beta", 3)})
+    writer.save_index()
+    reader = make_store()
+    writer.delete(filename="alpha.txt")
+    writer.upsert({"beta.txt": (["beta rewritten"], [{"chunk": 0}])})
+    writer.save_index()
+    assert reader.refresh() is True
+    assert contents(reader) == [("beta.txt", "beta rewritten")]
+    assert reader.keyword_search("alpha") == []
+    assert [meta["filename"] for _, _, meta in reader.similarity_search("beta", k=5)] == ["beta.txt"]
+
+
+def test_reader_drops_a_cleared_store(make_store):
+    writer = make_store()
+    writer.upsert({"alpha.txt": chunks("alpha", 2)})
+    writer.save_index()
+    reader = make_store()
+    writer.clear()
+    assert reader.refresh() is True
+    assert reader.index is None and reader.docs.live == 0
+    writer.upsert({"beta.txt": chunks("beta", 2)})
+    writer.save_index()
+    assert reader.refresh() is True
+    assert contents(reader) == contents(writer)
+
+
+def test_concurrent_refreshes_apply_each_segment_once(make_store):
+    writer = make_store()
+    writer.upsert({"seed.txt": chunks("seed", 1)})
+    writer.save_index()
+    reader = make_store()
+    for k in range(10):
+        writer.upsert({f"f{k}.txt": chunks(f"f{k}", 5)})
+        writer.save_index()
+        threads = [threading.Thread(target=reader.refresh) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert reader.index.ntotal == len(reader.docs) == writer.index.ntotal
+        assert contents(reader) == contents(writer)
+
+
+def test_compaction_round_trip(make_store, index_type):
+    writer = make_store()
+    for name in ("alpha", "beta", "gamma", "delta"):
+        writer.upsert({f"{name}.txt": chunks(name, 5)})
+        writer.save_index()
+    reader = make_store()
+    writer.delete(filename="beta.txt")
+    writer.upsert({"gamma.txt": chunks("gamma", 2)})
+    writer.save_index()
+    assert writer.get_stats()["dead_chunks"] > 0
+    before = contents(writer)
+
+    writer.compact(full=True)
+    stats = writer.get_stats()
+    assert stats["segments"] == 0 and stats["dead_chunks"] == 0
+    assert stats["live_chunks"] == stats["index_size"] == len(before)
+    assert contents(writer) == before
+
+    assert reader.refresh() is True
+    reloaded = make_store()
+    for store in (reader, reloaded):
+        assert contents(store) == before
+        assert store.index.ntotal == len(before)
+        assert [meta["filename"] for _, _, meta in store.hybrid_search("delta", k=3)] == ["delta.txt"] * 3
+
+    # Saves after the compaction build on the new base
+    writer.upsert({"epsilon.txt": chunks("epsilon", 3)})
+    writer.save_index()
+    assert reader.refresh() is True
+    assert contents(reader) == contents(writer) == contents(make_store())
+
+
+def test_upsert_keeps_unchanged_chunks(make_store, encoder):
+    store = make_store()
+    texts, metas = chunks("alpha", 4)
+    assert store.upsert({"alpha.txt": (texts, metas)})["alpha.txt"]["added"] == 4
+    encoded = encoder.encoded
+    report = store.upsert({"alpha.txt": (texts[:3] + ["alpha new chunk"], metas)})["alpha.txt"]
+    assert (report["added"], report["removed"], report["unchanged"]) == (1, 1, 3)
+    assert encoder.encoded == encoded + 1
+    assert store.docs.live == 4
+
+
+def test_filtered_search(make_store):
+    store = make_store()
+    store.upsert({"alpha.txt": chunks("alpha", 4), "beta.txt": chunks("beta", 4)})
+    hits = store.hybrid_search("alpha", k=10, filter={"filename": "beta.txt", "chunk": {"gte": 2}})
+    assert sorted(meta["chunk"] for _, _, meta in hits) == [2, 3]
+    assert {meta["filename"] for _, _, meta in hits} == {"beta.txt"}
+    assert store.similarity_search("alpha", filter={"filename": "missing.txt"}) == []
+    with pytest.raises(ValueError):
+        store.hybrid_search("alpha", filter={"chunk": {"gte": "2"}})
@@ -0,0 +1,111 @@
+import hashlib
+import json
+from typing import Dict, Any, AsyncIterator, Iterator, Iterable, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+
+def card_etag(card: Dict[str, Any]) -> str:
+    """Stable ETag for an agent card"""
+    body = json.dumps(card, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def card_response(request: Request, card: Dict[str, Any]) -> Response:
+    """Serve an agent card, answering conditional requests with 304 Not Modified"""
+    etag = card_etag(card)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(card, headers={"ETag": etag})
+
+
+async def llm_stats() -> JSONResponse:
+    """GET /stats of an LLM-backed agent: concurrency limit and LLM response cache hit rates of its process"""
+    from utils.models import model_manager
+    return JSONResponse({"llm": model_manager.get_stats()})
+
+
+def status_update_event(task_id: str, state: str, final: bool = False, text: str = None,
+                        metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    """A2A TaskStatusUpdateEvent"""
+    status = {"state": state}
+    if text is not None:
+        status["message"] = {"role": "agent", "parts": [{"type": "text", "text": text}]}
+    event = {"id": task_id, "status": status, "final": final}
+    if metadata is not None:
+        event["metadata"] = metadata
+    return event
+
+
+def artifact_update_event(task_id: str, text: str, index: int = 0, name: str = None,
+                          append: bool = True, last_chunk: bool = False) -> Dict[str, Any]:
+    """A2A TaskArtifactUpdateEvent carrying one text delta"""
+    artifact = {"parts": [{"type": "text", "text": text}], "index": index, "append": append, "lastChunk": last_chunk}
+    if name is not None:
+        artifact["name"] = name
+    return {"id": task_id, "artifact": artifact}
+
+
+def sse_response(request_id: Any, events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Stream A2A events to the client as JSON-RPC responses over server-sent events"""
+    async def body():
+        async for event in events:
+            message = {"jsonrpc": "2.0", "id": request_id, "result": event}
+            yield f"data: {json.dumps(message)}\n\n"
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def single_chunk(text: str) -> AsyncIterator[str]:
+    """Wrap a precomputed answer so it can be sent through task_stream_events"""
+    yield text
+
+
+async def task_stream_events(task_id: str, chunks: AsyncIterator[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Turn an agent's text chunks into the sendTaskSubscribe event sequence"""
+    yield status_update_event(task_id, "working")
+    parts = []
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            yield artifact_update_event(task_id, chunk, append=bool(parts))
+            parts.append(chunk)
+    except Exception as e:
+        print(f"[A2A] Stream for task {task_id} failed: {e}")
+        yield status_update_event(task_id, "failed", final=True, text=str(e))
+        return
+    yield artifact_update_event(task_id, "", append=True, last_chunk=True)
+    yield status_update_event(task_id, "completed", final=True, text="".join(parts))
+
+
+def _parse_sse(lines: Iterable[str], data: list) -> Iterator[Dict[str, Any]]:
+    for line in lines:
+        if line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line.strip() and data:
+            payload = "\n".join(data)
+            data.clear()
+            yield json.loads(payload)
+
+
+def iter_sse_events(response) -> Iterator[Dict[str, Any]]:
+    """Parse JSON server-sent events from a streaming (sync) httpx response"""
+    yield from _parse_sse(response.iter_lines(), [])
+
+
+async def aiter_sse_events(response) -> AsyncIterator[Dict[str, Any]]:
+    """Parse JSON server-sent events from a streaming (async) httpx response"""
+    data = []
+    async for line in response.aiter_lines():
+        for event in _parse_sse([line], data):
+            yield event
+
+
+def event_text(event: Dict[str, Any]) -> Optional[str]:
+    """Text carried by an artifact or status event, if any"""
+    result = event.get("result", event)
+    if "artifact" in result:
+        parts = result["artifact"].get("parts", [])
+    else:
+        parts = result.get("status", {}).get("message", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts) if parts else None
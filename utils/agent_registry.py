@@ -0,0 +1,207 @@
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Callable
+import httpx
+from config.settings import settings
+from utils.a2a import card_etag
+
+
+class AgentRegistry:
+    """In-memory registry of agent cards with TTL refresh and readiness tracking"""
+    def __init__(self, endpoints: List[Dict[str, str]]):
+        self.agents: Dict[str, Dict[str, Any]] = {}
+        for agent in endpoints:
+            self.agents[agent["name"]] = {
+                "name": agent["name"],
+                "url": agent["url"],
+                "card": None,
+                "etag": None,
+                "ready": False,
+                "fetched_at": None,
+                "last_checked": None,
+                "last_error": None,
+                "changes": 0,
+            }
+        self.version = 0
+        self._listeners: List[Callable[[str, Optional[Dict[str, Any]]], None]] = []
+        self._ready_events: Dict[str, asyncio.Event] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._initial_probe: Optional[asyncio.Event] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self, client: httpx.AsyncClient):
+        """Run the startup probe and keep the registry fresh in the background"""
+        self._client = client
+        self._ready_events = {name: asyncio.Event() for name in self.agents}
+        self._wakeup = asyncio.Event()
+        self._initial_probe = asyncio.Event()
+        print(f"[AgentRegistry] Probing {len(self.agents)} agents...")
+        await self.refresh(force=True)
+        self._initial_probe.set()
+        print(f"[AgentRegistry] Ready after startup probe: {self.ready_names()}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+        self._client = None
+
+    def on_change(self, listener: Callable[[str, Optional[Dict[str, Any]]], None]):
+        """Register a callback invoked with (name, card) whenever an agent card changes"""
+        self._listeners.append(listener)
+
+    def is_stale(self, name: str) -> bool:
+        agent = self.agents[name]
+        if not agent["ready"] or agent["fetched_at"] is None:
+            return True
+        return time.time() - agent["fetched_at"] >= settings.AGENT_CARD_TTL
+
+    async def refresh(self, force: bool = False):
+        """Concurrently re-validate every stale card (or every card when forced)"""
+        names = [name for name in self.agents if force or self.is_stale(name)]
+        if names:
+            await asyncio.gather(*(self.probe(name) for name in names))
+
+    async def probe(self, name: str) -> bool:
+        """Fetch or re-validate an agent's card once and update its readiness"""
+        agent = self.agents[name]
+        url = agent["url"] + ".well-known/agent.json"
+        headers = {"If-None-Match": agent["etag"]} if agent["etag"] and agent["card"] else {}
+        try:
+            resp = await self._client.get(url, headers=headers, timeout=settings.AGENT_PROBE_TIMEOUT)
+            if resp.status_code == 304:
+                agent["fetched_at"] = time.time()
+                agent["last_error"] = None
+                self._set_ready(name, True)
+            elif resp.status_code == 200:
+                card = resp.json()
+                self._store_card(name, card, resp.headers.get("etag") or card_etag(card))
+                agent["fetched_at"] = time.time()
+                agent["last_error"] = None
+                self._set_ready(name, True)
+            else:
+                agent["last_error"] = f"HTTP {resp.status_code}"
+                self._set_ready(name, False)
+        except Exception as e:
+            agent["last_error"] = str(e) or e.__class__.__name__
+            self._set_ready(name, False)
+        agent["last_checked"] = time.time()
+        return agent["ready"]
+
+    def _store_card(self, name: str, card: Dict[str, Any], etag: str):
+        agent = self.agents[name]
+        if etag == agent["etag"] and agent["card"] is not None:
+            return
+        card["url"] = agent["url"]
+        if agent["card"] is not None:
+            print(f"[AgentRegistry] Card changed for {name}")
+        agent["card"] = card
+        agent["etag"] = etag
+        agent["changes"] += 1
+        self.version += 1
+        for listener in self._listeners:
+            try:
+                listener(name, card)
+            except Exception as e:
+                print(f"[AgentRegistry] Change listener failed for {name}: {e}")
+
+    def _set_ready(self, name: str, ready: bool):
+        agent = self.agents[name]
+        if ready != agent["ready"]:
+            state = "ready" if ready else f"unready ({agent['last_error']})"
+            print(f"[AgentRegistry] {name} is {state}")
+        agent["ready"] = ready
+        event = self._ready_events.get(name)
+        if event is not None:
+            if ready:
+                event.set()
+            else:
+                event.clear()
+
+    def report_failure(self, name: str, error: Exception, unready: bool = True):
+        """A call to the agent failed: re-probe it now instead of waiting for its card's TTL.
+
+        With unready (e.g. the connection was refused) it is also taken out of service until
+        the probe succeeds; otherwise (e.g. a slow answer) it stays ready meanwhile.
+        """
+        agent = self.agents.get(name)
+        if agent is None:
+            return
+        agent["fetched_at"] = None
+        agent["last_error"] = str(error) or error.__class__.__name__
+        if unready:
+            self._set_ready(name, False)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _refresh_loop(self):
+        # Unready agents are retried every probe interval so they are picked up as soon as
+        # they start; ready agents are re-validated once their card outlives the TTL, or right
+        # away when a call to them fails (report_failure).
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.AGENT_PROBE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.refresh()
+
+    async def wait_for_discovery(self):
+        """Wait until the startup probe has completed"""
+        if self._initial_probe is not None:
+            await self._initial_probe.wait()
+
+    async def wait_until_ready(self, names: List[str], timeout: float = None, first: bool = False) -> List[str]:
+        """Wait until the given agents (with first, any one of them) are ready or the deadline passes; returns the ready ones"""
+        if timeout is None:
+            timeout = settings.AGENT_READY_TIMEOUT
+        pending = [name for name in names if name in self.agents and not self.is_ready(name)]
+        if not pending or (first and len(pending) < len(names)):
+            return [name for name in names if self.is_ready(name)]
+        print(f"[AgentRegistry] Waiting up to {timeout}s for {pending}")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        waiters = [asyncio.create_task(self._ready_events[name].wait()) for name in pending]
+        try:
+            await asyncio.wait(waiters, timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED if first else asyncio.ALL_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        return [name for name in names if self.is_ready(name)]
+
+    def is_ready(self, name: str) -> bool:
+        agent = self.agents.get(name)
+        return bool(agent and agent["ready"])
+
+    def ready_names(self) -> List[str]:
+        return [name for name, agent in self.agents.items() if agent["ready"]]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Cached card lookup, never does I/O"""
+        agent = self.agents.get(name)
+        return agent["card"] if agent else None
+
+    def cards(self) -> List[Dict[str, Any]]:
+        """Return every cached card, including agents that are currently unready"""
+        return [agent["card"] for agent in self.agents.values() if agent["card"] is not None]
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        agents = []
+        for agent in self.agents.values():
+            agents.append({
+                "name": agent["name"],
+                "url": agent["url"],
+                "ready": agent["ready"],
+                "etag": agent["etag"],
+                "card": agent["card"],
+                "age": round(now - agent["fetched_at"], 3) if agent["fetched_at"] else None,
+                "stale": self.is_stale(agent["name"]),
+                "changes": agent["changes"],
+                "last_error": agent["last_error"],
+            })
+        return {"version": self.version, "ttl": settings.AGENT_CARD_TTL, "agents": agents}
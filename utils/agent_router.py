@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from config.settings import settings
+
+# (route, query words, capability markers): a card is picked when the query contains one of
+# the words and the card's capabilities/description contain one of the markers
+KEYWORD_RULES: List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = [
+    ("file reading", ("uploaded", "documents", "files", "pdf", "csv", "document", "file"),
+     ("file_reading", "vector_search", "file reading")),
+    ("summarization", ("summarize", "summary", "summarization"),
+     ("text_summarization", "summarization", "summarize")),
+    ("elaboration", ("elaborate", "explain", "detailed", "detail", "explanation"),
+     ("topic_elaboration", "detailed_explanation", "elaboration", "elaborate")),
+    ("prediction", ("predict", "forecast", "future", "trends"),
+     ("prediction", "forecasting", "predict")),
+    ("calculation", ("calculate", "result", "math", "percentage", "compute"),
+     ("mathematical_calculations", "calculation", "calculate")),
+    ("search", ("search", "news", "find"),
+     ("web_search", "search", "information_retrieval")),
+    ("scraping", ("scrape", "extract", "url", "http"),
+     ("web_scraping", "scraping", "content_extraction")),
+]
+
+
+def capabilities_text(card: Dict[str, Any]) -> str:
+    """Lower-cased capabilities (string or dict entries) followed by the description"""
+    caps = []
+    for cap in card.get("capabilities", []):
+        if isinstance(cap, str):
+            caps.append(cap)
+        elif isinstance(cap, dict):
+            caps.extend(str(v).lower() for v in cap.values())
+    return " ".join(caps) + " " + card.get("description", "").lower()
+
+
+def card_profile(card: Dict[str, Any]) -> str:
+    """Text embedded for a card: its name, description and readable capability names"""
+    caps = capabilities_text(card).replace("_", " ")
+    return f"{card.get('name', '')}. {caps}"
+
+
+class AgentRouter:
+    """Picks the agents for a query.
+
+    Keyword rules are tried first; when none fires, the query embedding is scored against every
+    card embedding in one matrix product and the agents scoring at least ROUTER_THRESHOLD, and
+    within ROUTER_MARGIN of the best, are chosen (at most ROUTER_MAX_AGENTS). Card embeddings are
+    computed in the background whenever the registry reports a new or changed card.
+    """
+    def __init__(self, threshold: float = None, margin: float = None, max_agents: int = None,
+                 keywords: bool = None):
+        self.threshold = settings.ROUTER_THRESHOLD if threshold is None else threshold
+        self.margin = settings.ROUTER_MARGIN if margin is None else margin
+        self.max_agents = settings.ROUTER_MAX_AGENTS if max_agents is None else max_agents
+        self.keywords = settings.ROUTER_KEYWORDS_ENABLED if keywords is None else keywords
+        self._caps: Dict[str, str] = {}  # agent name -> capabilities_text(card)
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, Future] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-router")
+        self.decisions: "deque[Dict[str, Any]]" = deque(maxlen=200)
+
+    def register(self, name: str, card: Optional[Dict[str, Any]]):
+        """Registry change listener: cache the card's text now and embed it off the event loop"""
+        with self._lock:
+            if card is None:
+                self._caps.pop(name, None)
+                self._vectors.pop(name, None)
+                self._matrix = None
+                return
+            self._caps[name] = capabilities_text(card)
+            self._pending[name] = self._executor.submit(self._embed_card, name, card)
+
+    def _embed_card(self, name: str, card: Dict[str, Any]):
+        from utils.embeddings import embedding_manager
+        vector = embedding_manager.embed_texts([card_profile(card)])[0]
+        with self._lock:
+            self._vectors[name] = vector
+            self._matrix = None
+
+    def _card_matrix(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        with self._lock:
+            pending = list(self._pending.items())
+        for name, future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[Router] Failed to embed the card of {name}: {e}")
+            with self._lock:
+                if self._pending.get(name) is future:
+                    del self._pending[name]
+        with self._lock:
+            if self._matrix is None and self._vectors:
+                self._names = list(self._vectors)
+                self._matrix = np.stack([self._vectors[name] for name in self._names])
+            return self._names, self._matrix
+
+    def _keyword_matches(self, query: str, cards: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+        query_lower = query.lower()
+        routes = [(route, markers) for route, words, markers in KEYWORD_RULES
+                  if any(word in query_lower for word in words)]
+        matches = []
+        for card in cards:
+            caps = self._caps.get(card["name"])
+            if caps is None:
+                caps = self._caps[card["name"]] = capabilities_text(card)
+            for route, markers in routes:
+                if any(marker in caps for marker in markers):
+                    matches.append((card, route))
+                    break
+        return matches
+
+    def _embedding_scores(self, query: str, cards: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], float]]:
+        """(card, cosine similarity to the query) for the embedded cards, best first"""
+        from utils.embeddings import embedding_manager
+        for card in cards:
+            # Cards cached before this router was listening to the registry
+            if card["name"] not in self._vectors and card["name"] not in self._pending:
+                self.register(card["name"], card)
+        names, matrix = self._card_matrix()
+        if matrix is None:
+            return []
+        # Rows are L2-normalized, so the product is the cosine similarity to every card at once
+        scores = matrix @ embedding_manager.embed_text(query)
+        by_name = {card["name"]: card for card in cards}
+        ranked = sorted(((float(score), name) for score, name in zip(scores, names) if name in by_name), reverse=True)
+        return [(by_name[name], score) for score, name in ranked]
+
+    def route(self, query: str, cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        decision = {"query": query[:200], "method": None, "agents": [], "scores": {}}
+        selected = []
+        if self.keywords:
+            matches = self._keyword_matches(query, cards)
+            if matches:
+                selected = [card for card, _ in matches]
+                decision.update(method="keywords", scores={card["name"]: route for card, route in matches})
+        if not selected:
+            try:
+                ranked = self._embedding_scores(query, cards)
+            except Exception as e:
+                print(f"[Router] Embedding routing failed: {e}")
+                ranked = []
+            # Logged even when nothing clears the threshold, to help tune it
+            decision["scores"] = {card["name"]: round(score, 4) for card, score in ranked}
+            best = ranked[0][1] if ranked else 0.0
+            selected = [card for card, score in ranked[:self.max_agents]
+                        if score >= self.threshold and score >= best - self.margin]
+            if selected:
+                decision["method"] = "embedding"
+        if not selected and cards:
+            # Nothing matched: the Web Scraper (or the first available agent) handles the raw query
+            fallback = next((card for card in cards if "web scraper" in card["name"].lower()), cards[0])
+            selected = [fallback]
+            decision["method"] = "fallback"
+        decision["agents"] = [card["name"] for card in selected]
+        decision["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        self.decisions.append(decision)
+        print(f"[Router] {decision['method']}: {decision['agents']} {decision['scores']} ({decision['ms']} ms)")
+        return selected
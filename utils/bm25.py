@@ -0,0 +1,128 @@
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens; identifiers like INV-2023-001 split into inv / 2023 / 001"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts, keyed by chunk id.
+
+    Postings are typed arrays (doc numbers as int32, term frequencies as uint32) that grow in
+    place as chunks are added and are scored with numpy without copying. Removed chunks are only
+    flagged; their postings are dropped once they outnumber the live ones.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}  # term -> (doc numbers, term frequencies)
+        self._chunk_ids = array("q")  # doc number -> chunk id
+        self._lengths = array("I")  # doc number -> token count
+        self._alive = bytearray()
+        self._docnos: Dict[int, int] = {}  # chunk id -> doc number
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docnos)
+
+    @property
+    def terms(self) -> int:
+        return len(self._postings)
+
+    def add(self, chunk_id: int, text: str):
+        if chunk_id in self._docnos:
+            return
+        counts = Counter(tokenize(text))
+        docno = len(self._chunk_ids)
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("i"), array("I"))
+            postings[0].append(docno)
+            postings[1].append(tf)
+        length = sum(counts.values())
+        self._chunk_ids.append(chunk_id)
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._docnos[chunk_id] = docno
+        self._total_length += length
+
+    def add_many(self, chunks: Iterable[Tuple[int, str]]):
+        for chunk_id, text in chunks:
+            self.add(chunk_id, text)
+
+    def remove(self, chunk_id: int):
+        docno = self._docnos.pop(chunk_id, None)
+        if docno is None:
+            return
+        self._alive[docno] = 0
+        self._total_length -= self._lengths[docno]
+        if len(self._chunk_ids) - len(self._docnos) > max(1024, len(self._docnos)):
+            self._compact()
+
+    def _compact(self):
+        """Drop removed docs from every posting list and renumber the rest"""
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        renumber = np.cumsum(alive, dtype=np.int64) - 1
+        postings = {}
+        for term, (docs, tfs) in self._postings.items():
+            docs = np.frombuffer(docs, dtype=np.int32)
+            keep = alive[docs]
+            if keep.any():
+                postings[term] = (array("i", renumber[docs[keep]].astype(np.int32).tobytes()),
+                                  array("I", np.frombuffer(tfs, dtype=np.uint32)[keep].tobytes()))
+        chunk_ids = np.frombuffer(self._chunk_ids, dtype=np.int64)[alive]
+        self._postings = postings
+        self._chunk_ids = array("q", chunk_ids.tobytes())
+        self._lengths = array("I", np.frombuffer(self._lengths, dtype=np.uint32)[alive].tobytes())
+        self._alive = bytearray(b"\x01" * len(chunk_ids))
+        self._docnos = {int(chunk_id): docno for docno, chunk_id in enumerate(chunk_ids)}
+
+    def search(self, query: str, k: int, allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """Top-k (chunk id, score), optionally only among the allowed chunk ids"""
+        live = len(self._docnos)
+        terms = set(tokenize(query))
+        if not terms or not live or k <= 0:
+            return []
+        alive = np.frombuffer(self._alive, dtype=np.uint8)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        avgdl = self._total_length / live or 1.0
+        doc_parts, score_parts = [], []
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            docs = np.frombuffer(postings[0], dtype=np.int32)
+            keep = alive[docs].astype(bool)
+            docs = docs[keep]
+            if not len(docs):
+                continue
+            tfs = np.frombuffer(postings[1], dtype=np.uint32)[keep].astype(np.float32)
+            idf = math.log(1 + (live - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avgdl)
+            doc_parts.append(docs)
+            score_parts.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not doc_parts:
+            return []
+        docs, scores = np.concatenate(doc_parts), np.concatenate(score_parts)
+        if len(doc_parts) > 1:
+            # Sum the per-term scores of docs that match several terms
+            docs, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+        ids = np.frombuffer(self._chunk_ids, dtype=np.int64)[docs]
+        if allowed is not None:
+            mask = np.isin(ids, np.fromiter(allowed, dtype=np.int64, count=len(allowed)))
+            ids, scores = ids[mask], scores[mask]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
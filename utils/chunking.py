@@ -0,0 +1,253 @@
+import csv
+import io
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple
+from config.settings import settings
+from utils.tokens import count_tokens, token_windows
+
+CHUNK_TOKENS = settings.CHUNK_TOKENS
+CHUNK_OVERLAP = settings.CHUNK_OVERLAP
+READ_BLOCK = 1 << 16
+# A text "paragraph" is cut here even without a blank line, so one huge line can't fill memory
+MAX_UNIT_CHARS = 1 << 16
+
+Chunk = Tuple[str, Dict[str, Any]]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _pieces(text: str, max_tokens: int) -> Iterator[str]:
+    """Split one oversized unit at sentence boundaries, falling back to token windows"""
+    if count_tokens(text) <= max_tokens:
+        yield text
+        return
+    for sentence in _SENTENCE_END.split(text):
+        if count_tokens(sentence) <= max_tokens:
+            yield sentence
+        else:
+            yield from token_windows(sentence, max_tokens)
+
+
+def pack(units: Iterable[str], max_tokens: int = None, overlap: int = None, separator: str = "\n\n") -> Iterator[str]:
+    """Greedily join consecutive units (paragraphs, sentences) into chunks of at most max_tokens.
+
+    Each chunk starts with the trailing units of the previous one, up to ``overlap`` tokens, so
+    text near a boundary is retrievable from either side. Units are kept as they are (indentation
+    in JSON and code matters); only the line breaks around a unit and the ends of each chunk are stripped.
+    """
+    max_tokens = max_tokens or CHUNK_TOKENS
+    overlap = CHUNK_OVERLAP if overlap is None else overlap
+    current: List[Tuple[str, int]] = []
+    size = 0
+    fresh = False  # whether current holds anything beyond the carried-over overlap
+    for unit in units:
+        for piece in _pieces(unit.strip("\r\n"), max_tokens):
+            if not piece.strip():
+                continue
+            tokens = count_tokens(piece)
+            if current and size + tokens > max_tokens:
+                if fresh:
+                    yield separator.join(text for text, _ in current).strip()
+                carried, carried_size = [], 0
+                for text, count in reversed(current):
+                    if carried_size + count > overlap or carried_size + count + tokens > max_tokens:
+                        break
+                    carried.insert(0, (text, count))
+                    carried_size += count
+                current, size, fresh = carried, carried_size, False
+            current.append((piece, tokens))
+            size += tokens
+            fresh = True
+    if fresh:
+        yield separator.join(text for text, _ in current).strip()
+
+
+def _text_stream(stream: BinaryIO) -> io.TextIOWrapper:
+    stream.seek(0)
+    return io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+
+
+def _paragraphs(text_stream: io.TextIOBase) -> Iterator[str]:
+    """Blank-line separated paragraphs, read line by line"""
+    lines, chars = [], 0
+    while True:
+        line = text_stream.readline(MAX_UNIT_CHARS)
+        if not line or not line.strip():
+            if lines:
+                yield "".join(lines)
+                lines, chars = [], 0
+            if not line:
+                return
+            continue
+        lines.append(line)
+        chars += len(line)
+        if chars >= MAX_UNIT_CHARS:
+            yield "".join(lines)
+            lines, chars = [], 0
+
+
+def text_chunks(stream: BinaryIO, max_tokens: int = None, overlap: int = None) -> Iterator[Chunk]:
+    text_stream = _text_stream(stream)
+    try:
+        for i, chunk in enumerate(pack(_paragraphs(text_stream), max_tokens, overlap)):
+            yield chunk, {"type": "txt", "chunk": i}
+    finally:
+        # Detach so closing the wrapper doesn't close the caller's stream
+        text_stream.detach()
+
+
+def csv_chunks(stream: BinaryIO, max_tokens: int = None) -> Iterator[Chunk]:
+    """One chunk per row ("header: value, ..."), so row metadata stays exact; long rows are split"""
+    text_stream = _text_stream(stream)
+    try:
+        reader = csv.reader(text_stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        for i, row in enumerate(reader):
+            row_text = ", ".join(f"{h}: {v}" for h, v in zip(header, row))
+            if not row_text.strip():
+                continue
+            for part, piece in enumerate(_pieces(row_text, max_tokens or CHUNK_TOKENS)):
+                meta = {"type": "csv", "row": i}
+                if part:
+                    meta["part"] = part
+                yield piece, meta
+    finally:
+        text_stream.detach()
+
+
+def iter_json(text_stream: io.TextIOBase) -> Iterator[Tuple[Any, Any]]:
+    """Stream the members of a top-level JSON array or object as (index or key, value) pairs.
+
+    Only one member is held in memory at a time; any other top-level value is yielded whole with key None.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def fill(minimum: int) -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        # Drop consumed text; read at least as much as is buffered so retries stay linear
+        size = max(READ_BLOCK, minimum)
+        data = text_stream.read(size)
+        buffer, pos = buffer[pos:] + data, 0
+        eof = len(data) < size
+        return True
+
+    def skip(chars: str = " \t\r\n") -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or not fill(0):
+                return buffer[pos] if pos < len(buffer) else ""
+
+    def decode() -> Any:
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number at the very end of the buffer may continue in the next block
+                if end < len(buffer) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill(len(buffer) - pos + READ_BLOCK)
+
+    first = skip()
+    if first not in ("[", "{"):
+        if first:
+            yield None, decode()
+        return
+    pos += 1
+    closing = "]" if first == "[" else "}"
+    index = 0
+    if skip() == closing:
+        return
+    while True:
+        if closing == "}":
+            key = decode()
+            if skip() != ":":
+                raise ValueError(f"Expected ':' after key {key!r}")
+            pos += 1
+            skip()
+        else:
+            key = index
+        yield key, decode()
+        index += 1
+        separator = skip()
+        pos += 1
+        if separator == closing:
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '{closing}' in JSON, got {separator!r}")
+        skip()
+
+
+def json_chunks(stream: BinaryIO, max_tokens: int = None, overlap: int = None) -> Iterator[Chunk]:
+    """Members of the top-level array/object, packed into token-bounded chunks (no truncation)"""
+    text_stream = _text_stream(stream)
+    try:
+        n = 0
+        for key, value in iter_json(text_stream):
+            text = json.dumps(value, ensure_ascii=False, indent=1)
+            if key is not None and not isinstance(key, int):
+                text = f"{key}: {text}"
+            for chunk in pack(text.split("\n"), max_tokens, overlap, separator="\n"):
+                meta = {"type": "json", "chunk": n}
+                if key is not None:
+                    meta["key"] = key
+                yield chunk, meta
+                n += 1
+    finally:
+        text_stream.detach()
+
+
+def _page_chunks(page, max_tokens: int = None, overlap: int = None) -> List[str]:
+    # Extracted PDF text rarely has blank lines between paragraphs, so pack its lines
+    return list(pack((page.extract_text() or "").splitlines(), max_tokens, overlap, separator="\n"))
+
+
+@lru_cache(maxsize=1)
+def _pdf_reader(path: str, mtime_ns: int):
+    # Each worker parses the document once and keeps it for the following page ranges
+    import PyPDF2
+    return PyPDF2.PdfReader(path)
+
+
+def pdf_page_chunks(path: str, start: int, stop: int, max_tokens: int = None,
+                    overlap: int = None) -> List[Tuple[int, List[str]]]:
+    """Chunk texts of pages [start, stop) of a PDF on disk; run in ingestion worker processes"""
+    reader = _pdf_reader(path, os.stat(path).st_mtime_ns)
+    return [(page, _page_chunks(reader.pages[page], max_tokens, overlap)) for page in range(start, stop)]
+
+
+def pdf_chunks(stream: BinaryIO, max_tokens: int = None, overlap: int = None) -> Iterator[Chunk]:
+    """Page by page; chunks never span pages, so the page in the metadata is exact"""
+    import PyPDF2
+    stream.seek(0)
+    reader = PyPDF2.PdfReader(stream)
+    n = 0
+    for page_number, page in enumerate(reader.pages):
+        for chunk in _page_chunks(page, max_tokens, overlap):
+            yield chunk, {"type": "pdf", "page": page_number, "chunk": n}
+            n += 1
+
+
+def chunk_file(filename: str, stream: BinaryIO, max_tokens: int = None, overlap: int = None) -> Iterator[Chunk]:
+    """Lazily chunk an uploaded file by its extension; yields (text, metadata) pairs"""
+    name = filename.lower()
+    if name.endswith(".pdf"):
+        return pdf_chunks(stream, max_tokens, overlap)
+    if name.endswith(".csv"):
+        return csv_chunks(stream, max_tokens)
+    if name.endswith(".json"):
+        return json_chunks(stream, max_tokens, overlap)
+    return text_chunks(stream, max_tokens, overlap)
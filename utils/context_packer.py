@@ -0,0 +1,116 @@
+import re
+import time
+from collections import deque
+from typing import Any, Dict, List, Set, Tuple
+from config.settings import settings
+from utils.bm25 import tokenize
+from utils.tokens import count_tokens, token_windows
+
+# Sentence ends, plus line breaks: PDF and CSV chunks are line oriented
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how i in is it its of on or that the this to "
+    "was were what when where which who why will with you your".split())
+# Remaining budget below which no further excerpt is started
+MIN_EXCERPT_TOKENS = 32
+
+
+def _sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_BREAK.split(text) if sentence.strip()]
+
+
+def _normalized(sentence: str) -> str:
+    return " ".join(tokenize(sentence))
+
+
+class ContextPacker:
+    """Builds the excerpt block of a RAG prompt within a token budget.
+
+    Chunks are taken in rank order. Sentences already included (overlapping chunks repeat their
+    neighbours' edges) are dropped. A chunk over CONTEXT_CHUNK_TOKENS, or one that no longer fits
+    the remaining CONTEXT_TOKEN_BUDGET, is cut down to its sentences sharing the most terms with the
+    query, kept in their original order.
+    """
+    def __init__(self, budget: int = None, chunk_tokens: int = None, history: int = 1000):
+        self.budget = settings.CONTEXT_TOKEN_BUDGET if budget is None else budget
+        self.chunk_tokens = settings.CONTEXT_CHUNK_TOKENS if chunk_tokens is None else chunk_tokens
+        self.history: "deque[Dict[str, Any]]" = deque(maxlen=history)
+
+    def _trim(self, sentences: List[Tuple[str, int]], terms: Set[str], limit: int) -> List[Tuple[str, int]]:
+        """Most query-relevant sentences within limit tokens, in document order"""
+        def relevance(i: int) -> Tuple[int, int]:
+            # Earlier sentences win ties; they tend to introduce what follows
+            return -len(terms.intersection(tokenize(sentences[i][0]))), i
+        ranked = sorted(range(len(sentences)), key=relevance)
+        kept, used = [], 0
+        for i in ranked:
+            if used + sentences[i][1] <= limit:
+                kept.append(i)
+                used += sentences[i][1]
+        if not kept:
+            # Not even one sentence fits: take the head of the most relevant one
+            text = next(token_windows(sentences[ranked[0]][0], limit), "")
+            return [(text, count_tokens(text))] if text else []
+        return [sentences[i] for i in sorted(kept)]
+
+    def pack(self, query: str, chunks: List[str], separator: str = "\n---\n") -> Tuple[str, Dict[str, Any]]:
+        """Context text from the ranked chunks, plus token accounting for the query"""
+        start = time.time()
+        terms = set(tokenize(query)) - _STOPWORDS
+        seen: Set[str] = set()
+        parts, used = [], 0
+        stats = {"chunks": len(chunks), "used_chunks": 0, "trimmed_chunks": 0, "duplicate_sentences": 0,
+                 "tokens_in": sum(count_tokens(chunk) for chunk in chunks), "budget": self.budget}
+        separator_tokens = count_tokens(separator)
+        for chunk in chunks:
+            remaining = self.budget - used - (separator_tokens if parts else 0)
+            if remaining < MIN_EXCERPT_TOKENS:
+                break
+            sentences, keys = [], set()
+            for sentence in _sentences(chunk):
+                key = _normalized(sentence)
+                if key in seen or key in keys:
+                    stats["duplicate_sentences"] += 1
+                    continue
+                keys.add(key)
+                sentences.append((sentence, count_tokens(sentence)))
+            if not sentences:
+                continue
+            limit = min(self.chunk_tokens, remaining)
+            if sum(tokens for _, tokens in sentences) > limit:
+                sentences = self._trim(sentences, terms, limit)
+                stats["trimmed_chunks"] += 1
+            if not sentences:
+                continue
+            # Only what is actually included counts as seen; trimmed sentences may come back in a later chunk
+            seen.update(_normalized(sentence) for sentence, _ in sentences)
+            text = " ".join(sentence for sentence, _ in sentences)
+            used += count_tokens(text) + (separator_tokens if parts else 0)
+            parts.append(text)
+            stats["used_chunks"] += 1
+        context = separator.join(parts)
+        stats["tokens_out"] = count_tokens(context) if context else 0
+        stats["ms"] = round((time.time() - start) * 1000, 2)
+        self.history.append(stats)
+        print(f"[ContextPacker] {stats['used_chunks']}/{stats['chunks']} chunks, "
+              f"{stats['tokens_in']} -> {stats['tokens_out']} tokens (budget {self.budget})")
+        return context, stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Averages over the recent queries"""
+        if not self.history:
+            return {"queries": 0}
+        n = len(self.history)
+        tokens_in = sum(stats["tokens_in"] for stats in self.history)
+        tokens_out = sum(stats["tokens_out"] for stats in self.history)
+        return {
+            "queries": n,
+            "avg_tokens_in": round(tokens_in / n, 1),
+            "avg_tokens_out": round(tokens_out / n, 1),
+            "saved_ratio": round(1 - tokens_out / tokens_in, 4) if tokens_in else 0.0,
+            "avg_ms": round(sum(stats["ms"] for stats in self.history) / n, 2),
+            "budget": self.budget,
+        }
+
+
+context_packer = ContextPacker()
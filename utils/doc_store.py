@@ -0,0 +1,256 @@
+import bisect
+import json
+import mmap
+import os
+from collections.abc import Sequence
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+import numpy as np
+
+# Row i of a segment spans text[offsets[i, 0]:offsets[i + 1, 0]] and meta[offsets[i, 1]:offsets[i + 1, 1]];
+# ids[i] holds its (chunk id, file key)
+SEGMENT_FILES = (".offsets.npy", ".text", ".meta", ".ids.npy")
+
+Row = Tuple[bytes, bytes, int, int]
+
+
+def _map(path: str):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def encode_rows(texts: List[str], metas: List[Dict[str, Any]], ids: List[int],
+                file_keys: List[int]) -> Iterable[Row]:
+    for text, meta, chunk_id, file_key in zip(texts, metas, ids, file_keys):
+        yield text.encode("utf-8"), json.dumps(meta).encode("utf-8"), chunk_id, file_key
+
+
+def write_segment(prefix: str, rows: Iterable[Row]) -> int:
+    """Write (utf-8 text, json metadata, chunk id, file key) rows as one segment; returns the row count.
+
+    Files are written under a temporary name and renamed, so a segment is either complete or absent.
+    """
+    offsets = [(0, 0)]
+    ids = []
+    with open(prefix + ".text.tmp", "wb") as text_file, open(prefix + ".meta.tmp", "wb") as meta_file:
+        for text, meta, chunk_id, file_key in rows:
+            text_file.write(text)
+            meta_file.write(meta)
+            offsets.append((offsets[-1][0] + len(text), offsets[-1][1] + len(meta)))
+            ids.append((chunk_id, file_key))
+    # Write through a file object so np.save doesn't append a second .npy suffix
+    with open(prefix + ".offsets.npy.tmp", "wb") as f:
+        np.save(f, np.array(offsets, dtype=np.int64))
+    with open(prefix + ".ids.npy.tmp", "wb") as f:
+        np.save(f, np.array(ids, dtype=np.int64).reshape(-1, 2))
+    for suffix in SEGMENT_FILES:
+        os.replace(prefix + suffix + ".tmp", prefix + suffix)
+    return len(offsets) - 1
+
+
+class DocSegment:
+    """Read-only, memory-mapped block of rows; pages are shared between processes via the OS cache.
+
+    Rows are never rewritten in place: deleted rows are only marked in ``dead`` until compaction drops them.
+    """
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.offsets = np.load(prefix + ".offsets.npy", mmap_mode="r")
+        self._text = _map(prefix + ".text")
+        self._meta = _map(prefix + ".meta")
+        # Segments written before chunk ids existed have no id column; they are only read for conversion
+        ids = np.load(prefix + ".ids.npy", mmap_mode="r") if os.path.exists(prefix + ".ids.npy") else None
+        self.ids = ids[:, 0] if ids is not None else None
+        self.file_keys = ids[:, 1] if ids is not None else None
+        self.dead: Set[int] = set()
+        self._order = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def text_bytes(self, i: int) -> bytes:
+        return self._text[self.offsets[i, 0]:self.offsets[i + 1, 0]]
+
+    def meta_bytes(self, i: int) -> bytes:
+        return self._meta[self.offsets[i, 1]:self.offsets[i + 1, 1]]
+
+    def rows(self, skip: Set[int] = frozenset()) -> Iterable[Row]:
+        for i in range(len(self)):
+            if i not in skip:
+                yield self.text_bytes(i), self.meta_bytes(i), int(self.ids[i]), int(self.file_keys[i])
+
+    def find(self, chunk_id: int, before: Optional[int] = None) -> int:
+        """Last row (below ``before``) holding chunk_id, or -1; binary search over a sorted id order"""
+        if self._order is None:
+            self._order = np.argsort(self.ids, kind="stable")
+        lo = np.searchsorted(self.ids, chunk_id, side="left", sorter=self._order)
+        hi = np.searchsorted(self.ids, chunk_id, side="right", sorter=self._order)
+        rows = [int(r) for r in self._order[lo:hi] if before is None or r < before]
+        return max(rows) if rows else -1
+
+    def live_ids(self, file_key: int) -> List[int]:
+        rows = np.flatnonzero(self.file_keys == file_key)
+        return [int(self.ids[r]) for r in rows if int(r) not in self.dead]
+
+
+class _Column(Sequence):
+    """Lazy list-like view over one column; rows are decoded only when accessed"""
+    def __init__(self, store: "DocStore", getter):
+        self._store = store
+        self._getter = getter
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._getter(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._getter(i)
+
+
+class DocStore:
+    """Chunk texts and metadata: an ordered list of memory-mapped segments plus unsaved rows.
+
+    Every row carries a chunk id; ``find`` maps an id to the row that currently holds it.
+    """
+    def __init__(self):
+        self.segments: List[DocSegment] = []
+        self._starts: List[int] = []  # global row index of each segment's first row
+        self._saved = 0
+        self._pending_texts: List[str] = []
+        self._pending_metas: List[Dict[str, Any]] = []
+        self._pending_ids: List[int] = []
+        self._pending_files: List[int] = []
+        self._pending_rows: Dict[int, int] = {}  # chunk id -> pending position
+        self.texts = _Column(self, self.text)
+        self.metas = _Column(self, self.meta)
+
+    def __len__(self) -> int:
+        return self._saved + len(self._pending_texts)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_texts)
+
+    @property
+    def live(self) -> int:
+        """Rows not marked as deleted"""
+        return len(self) - sum(len(segment.dead) for segment in self.segments)
+
+    def _locate(self, i: int):
+        if i >= self._saved:
+            return None, i - self._saved
+        s = bisect.bisect_right(self._starts, i) - 1
+        return self.segments[s], i - self._starts[s]
+
+    def text(self, i: int) -> str:
+        segment, j = self._locate(i)
+        return self._pending_texts[j] if segment is None else segment.text_bytes(j).decode("utf-8")
+
+    def meta(self, i: int) -> Dict[str, Any]:
+        segment, j = self._locate(i)
+        return self._pending_metas[j] if segment is None else json.loads(segment.meta_bytes(j))
+
+    def find(self, chunk_id: int, before: Optional[int] = None) -> Optional[int]:
+        """Global row of the live row holding chunk_id (only rows below ``before``), or None"""
+        if before is None and chunk_id in self._pending_rows:
+            return self._saved + self._pending_rows[chunk_id]
+        # Newest first: an id is only re-added after its older row was deleted
+        for start, segment in zip(reversed(self._starts), reversed(self.segments)):
+            if before is not None and start >= before:
+                continue
+            j = segment.find(chunk_id, None if before is None else before - start)
+            if j >= 0:
+                return None if j in segment.dead else start + j
+        return None
+
+    def kill(self, i: int):
+        """Mark a saved row as deleted"""
+        segment, j = self._locate(i)
+        segment.dead.add(j)
+
+    def live_ids(self, file_key: int) -> List[int]:
+        """Chunk ids of every live row that belongs to one file"""
+        ids = [chunk_id for segment in self.segments for chunk_id in segment.live_ids(file_key)]
+        return ids + [chunk_id for chunk_id, key in zip(self._pending_ids, self._pending_files) if key == file_key]
+
+    def live_rows(self) -> Iterable[Tuple[int, int]]:
+        """(chunk id, global row) of every live row, for building secondary indexes"""
+        for start, segment in zip(self._starts, self.segments):
+            for j in range(len(segment)):
+                if j not in segment.dead:
+                    yield int(segment.ids[j]), start + j
+        for j, chunk_id in enumerate(self._pending_ids):
+            yield chunk_id, self._saved + j
+
+    def append(self, texts: List[str], metas: List[Dict[str, Any]], ids: List[int], file_keys: List[int]):
+        for j, chunk_id in enumerate(ids, self.pending):
+            self._pending_rows[chunk_id] = j
+        self._pending_texts.extend(texts)
+        self._pending_metas.extend(metas)
+        self._pending_ids.extend(ids)
+        self._pending_files.extend(file_keys)
+
+    def drop_pending(self, ids: Set[int]) -> List[int]:
+        """Remove unsaved rows by chunk id; returns the positions they had among the pending rows"""
+        dropped = sorted(self._pending_rows[chunk_id] for chunk_id in ids if chunk_id in self._pending_rows)
+        if dropped:
+            gone = set(dropped)
+            keep = [j for j in range(self.pending) if j not in gone]
+            self._pending_texts = [self._pending_texts[j] for j in keep]
+            self._pending_metas = [self._pending_metas[j] for j in keep]
+            self._pending_ids = [self._pending_ids[j] for j in keep]
+            self._pending_files = [self._pending_files[j] for j in keep]
+            self._pending_rows = {chunk_id: j for j, chunk_id in enumerate(self._pending_ids)}
+        return dropped
+
+    def open_segment(self, prefix: str) -> DocSegment:
+        """Map a segment written by this or another process after the current ones"""
+        segment = DocSegment(prefix)
+        self._starts.append(self._saved)
+        self.segments.append(segment)
+        self._saved += len(segment)
+        return segment
+
+    def flush(self, prefix: str) -> int:
+        """Write the unsaved rows as a new segment; returns its row count"""
+        count = write_segment(prefix, encode_rows(self._pending_texts, self._pending_metas,
+                                                  self._pending_ids, self._pending_files))
+        self._pending_texts, self._pending_metas, self._pending_ids, self._pending_files = [], [], [], []
+        self._pending_rows = {}
+        self.open_segment(prefix)
+        return count
+
+    def replace_segments(self, start: int, count: int, prefix: str) -> DocSegment:
+        """Swap segments [start, start + count) for one merged segment.
+
+        When the merged segment holds exactly the same rows, deletion marks carry over; otherwise
+        (dead rows dropped) the caller re-marks rows deleted since the merge started.
+        """
+        merged = DocSegment(prefix)
+        replaced = self.segments[start:start + count]
+        if len(merged) == sum(len(segment) for segment in replaced):
+            shift = 0
+            for segment in replaced:
+                merged.dead.update(j + shift for j in segment.dead)
+                shift += len(segment)
+        segments = self.segments[:start] + [merged] + self.segments[start + count:]
+        self.segments, self._starts, self._saved = [], [], 0
+        for segment in segments:
+            self._starts.append(self._saved)
+            self.segments.append(segment)
+            self._saved += len(segment)
+        return merged
+
+
+def merge_segments(segments: List[DocSegment], prefix: str, skip: List[Set[int]] = None) -> int:
+    """Concatenate segments into one new segment (used by compaction), leaving out the rows in ``skip``"""
+    def rows():
+        for i, segment in enumerate(segments):
+            yield from segment.rows(skip[i] if skip else frozenset())
+    return write_segment(prefix, rows())
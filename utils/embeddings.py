@@ -1,14 +1,196 @@
 from sentence_transformers import SentenceTransformer
-from typing import List
-import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import atexit
+import hashlib
+import json
 import os
+import threading
+import numpy as np
+from config.settings import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within the process
+    fcntl = None
+
+
+class EmbeddingCache:
+    """Persistent, content-addressed embedding cache for one model.
+
+    Vectors live in a memory-mapped float16 ring buffer next to a parallel array of 128-bit
+    content hashes; the oldest entries are overwritten once the ring is full. Lookups re-check
+    the stored hash, so slots overwritten by another process are treated as misses.
+    """
+    def __init__(self, directory: str, model_name: str, capacity: int):
+        self.directory = directory
+        self.model_name = model_name
+        self.capacity = capacity
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+        self.prefix = os.path.join(directory, safe_name)
+        self.dimension = None
+        self._keys = None
+        self._vectors = None
+        self._state = None  # [next slot, filled slots]
+        self._slots: Dict[bytes, int] = {}
+        self._synced = (0, 0)  # _state when _slots last caught up with the shared files
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        header = self._header()
+        if header is not None and self._matches(header):
+            self._open(header["dimension"])
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()[:16]
+
+    def _header(self) -> Optional[Dict]:
+        try:
+            with open(self.prefix + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _matches(self, header: Dict, dimension: int = None) -> bool:
+        return (header.get("model") == self.model_name and header.get("capacity") == self.capacity
+                and (dimension is None or header.get("dimension") == dimension))
+
+    def _open(self, dimension: int):
+        header = self._header()
+        exists = header is not None and self._matches(header, dimension)
+        if header is not None and not exists:
+            # Laid out for another capacity or dimension: the files can't be mapped at this shape
+            print(f"[EmbeddingCache] Recreating {self.prefix}: cache settings changed")
+            for suffix in (".json", ".keys", ".vectors", ".state"):
+                try:
+                    os.remove(self.prefix + suffix)
+                except FileNotFoundError:
+                    pass
+        mode = "r+" if exists else "w+"
+        self.dimension = dimension
+        self._keys = np.memmap(self.prefix + ".keys", dtype="V16", mode=mode, shape=(self.capacity,))
+        self._vectors = np.memmap(self.prefix + ".vectors", dtype=np.float16, mode=mode,
+                                  shape=(self.capacity, dimension))
+        self._state = np.memmap(self.prefix + ".state", dtype=np.int64, mode=mode, shape=(2,))
+        if not exists:
+            self._keys.flush()
+            self._vectors.flush()
+            self._state.flush()
+            with open(self.prefix + ".json.tmp", "w") as f:
+                json.dump({"model": self.model_name, "capacity": self.capacity, "dimension": dimension}, f)
+            os.replace(self.prefix + ".json.tmp", self.prefix + ".json")
+        empty = np.zeros((), dtype="V16")
+        filled = int(self._state[1])
+        self._slots = {bytes(k): slot for slot, k in enumerate(self._keys[:filled]) if k != empty}
+        self._synced = (int(self._state[0]), filled)
+
+    def _sync(self):
+        """Index the slots other processes have written since the last look.
+
+        Only the ring positions between the last seen and the current write head are read; if the
+        ring went round more than once meanwhile, the entries missed are just cache misses.
+        """
+        if self._vectors is None:
+            header = self._header()
+            if header is None or not self._matches(header):
+                return
+            # Created by another process after this one started
+            self._open(header["dimension"])
+            return
+        head, filled = int(self._state[0]), int(self._state[1])
+        if (head, filled) == self._synced:
+            return
+        last = self._synced[0]
+        written = (head - last) % self.capacity or self.capacity
+        empty = bytes(np.zeros((), dtype="V16"))
+        for slot in (last + np.arange(written)) % self.capacity:
+            key = bytes(self._keys[slot])
+            if key != empty:
+                self._slots[key] = int(slot)
+        self._synced = (head, filled)
+
+    def _file_lock(self):
+        handle = open(self.prefix + ".lock", "a")
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def get(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        if any(key not in self._slots for key in keys):
+            with self._lock:
+                self._sync()
+        results = []
+        for key in keys:
+            slot = self._slots.get(key)
+            vector = None
+            if slot is not None and bytes(self._keys[slot]) == key:
+                vector = np.array(self._vectors[slot], dtype=np.float32)
+                # Overwritten while copying: treat as a miss
+                if bytes(self._keys[slot]) != key:
+                    vector = None
+            if vector is None and slot is not None:
+                self._slots.pop(key, None)
+            results.append(vector)
+            self.stats["hits" if vector is not None else "misses"] += 1
+        return results
+
+    def put(self, keys: List[bytes], vectors: np.ndarray):
+        if not keys:
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            handle = self._file_lock()
+            try:
+                if self._vectors is None:
+                    self._open(vectors.shape[1])
+                else:
+                    # Other processes may have moved the write head; don't lose track of their entries
+                    self._sync()
+                if vectors.shape[1] != self.dimension:
+                    return
+                empty = np.zeros((), dtype="V16")
+                if len(keys) > self.capacity:
+                    keys, vectors = keys[-self.capacity:], vectors[-self.capacity:]
+                for key, vector in zip(keys, vectors):
+                    slot = int(self._state[0])
+                    old = bytes(self._keys[slot])
+                    if old != bytes(empty):
+                        self._slots.pop(old, None)
+                        self.stats["evictions"] += 1
+                    # Clear the key first so concurrent readers never pair it with a partial vector
+                    self._keys[slot] = empty
+                    self._vectors[slot] = vector
+                    self._keys[slot] = np.frombuffer(key, dtype="V16")[0]
+                    self._slots[key] = slot
+                    self._state[0] = (slot + 1) % self.capacity
+                    self._state[1] = min(int(self._state[1]) + 1, self.capacity)
+                self._synced = (int(self._state[0]), int(self._state[1]))
+            finally:
+                handle.close()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+
 
 class EmbeddingManager:
     """Manages embedding models and operations"""
     def __init__(self):
         self._model = None
-        self.model_name = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
-        self.device = os.environ.get("EMBEDDING_DEVICE", "cpu")
+        self._pool = None
+        self.model_name = settings.EMBEDDING_MODEL
+        self.device = settings.EMBEDDING_DEVICE
+        self.batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.processes = settings.EMBEDDING_PROCESSES
+        cache_size = settings.EMBEDDING_CACHE_SIZE
+        cache_dir = settings.EMBEDDING_CACHE_DIR
+        self.cache = EmbeddingCache(cache_dir, self.model_name, cache_size) if cache_size > 0 else None
+        self.query_cache_size = settings.EMBEDDING_QUERY_CACHE_SIZE
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_lock = threading.Lock()  # embed_text() is called from asyncio.to_thread workers
+        self.query_stats = {"hits": 0, "misses": 0}
 
     @property
     def model(self) -> SentenceTransformer:
@@ -16,16 +198,84 @@ class EmbeddingManager:
             self._model = SentenceTransformer(self.model_name, device=self.device)
         return self._model
 
-    def embed_texts(self, texts: List[str]) -> np.ndarray:
+    def _multi_process_pool(self):
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(target_devices=[self.device] * self.processes)
+            atexit.register(self.close)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        # Longest first, so each batch pads to similar lengths; worker processes receive
+        # contiguous chunks of this order, which keeps that property across processes
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        ordered = [texts[i] for i in order]
+        if self.processes > 1 and len(texts) >= 4 * batch_size:
+            sorted_embeddings = self.model.encode_multi_process(
+                ordered, self._multi_process_pool(), batch_size=batch_size)
+        else:
+            sorted_embeddings = self.model.encode(
+                ordered, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+        embeddings = np.empty(sorted_embeddings.shape, dtype=np.float32)
+        embeddings[order] = sorted_embeddings
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        return embeddings
+
+    def embed_texts(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text, in input order"""
+        batch_size = batch_size or self.batch_size
         try:
-            embeddings = self.model.encode(texts, show_progress_bar=False)
-            return embeddings
+            if self.cache is None:
+                return self._encode(texts, batch_size)
+            keys = [self.cache.key(text) for text in texts]
+            cached = self.cache.get(keys)
+            # Encode each distinct missing text once, even if it repeats within the batch
+            missing: Dict[bytes, int] = {}
+            for i, vector in enumerate(cached):
+                if vector is None and keys[i] not in missing:
+                    missing[keys[i]] = i
+            if missing:
+                encoded = self._encode([texts[i] for i in missing.values()], batch_size)
+                self.cache.put(list(missing), encoded)
+                fresh = dict(zip(missing, encoded))
+                cached = [vector if vector is not None else fresh[key] for key, vector in zip(keys, cached)]
+            return np.stack(cached).astype(np.float32, copy=False)
         except Exception as e:
             print(f"Failed to generate embeddings: {e}")
             raise
 
     def embed_text(self, text: str) -> np.ndarray:
-        return self.embed_texts([text])[0]
+        with self._query_lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+                self.query_stats["hits"] += 1
+                return vector
+            self.query_stats["misses"] += 1
+        vector = self.embed_texts([text])[0]
+        if self.query_cache_size > 0:
+            with self._query_lock:
+                self._query_cache[text] = vector
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return vector
+
+    def get_stats(self) -> Dict[str, float]:
+        stats = {"query_cache_hits": self.query_stats["hits"], "query_cache_misses": self.query_stats["misses"]}
+        if self.cache is not None:
+            stats.update({
+                "cache_hits": self.cache.stats["hits"],
+                "cache_misses": self.cache.stats["misses"],
+                "cache_evictions": self.cache.stats["evictions"],
+                "cache_hit_rate": self.cache.hit_rate(),
+                "cache_entries": len(self.cache),
+            })
+        return stats
 
     def get_embedding_dimension(self) -> int:
         return self.model.get_sentence_embedding_dimension()
@@ -0,0 +1,42 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+from urllib.parse import urlsplit
+import httpx
+from config.settings import settings
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """Build the pooled keep-alive client shared by all orchestrator -> agent calls"""
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    http2 = settings.HTTP2_ENABLED
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("[HttpClient] HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(limits=limits, http2=http2, timeout=settings.HTTP_TIMEOUT)
+
+
+class HostConnectionLimiter:
+    """Caps the number of in-flight requests per agent host on top of the pool limits"""
+    def __init__(self, max_per_host: int):
+        self.max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        if self.max_per_host <= 0:
+            yield
+            return
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        async with semaphore:
+            yield
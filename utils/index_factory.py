@@ -0,0 +1,159 @@
+import faiss
+import numpy as np
+from typing import Optional, Tuple
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# FAISS warns below ~39 training points per IVF list; PQ needs 2^nbits points per sub-quantizer
+MIN_POINTS_PER_LIST = 39
+PQ_NBITS = 8
+
+
+def inner_index(index):
+    """The index an IndexIDMap2 wraps (or the index itself)"""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index) -> str:
+    """Which of INDEX_TYPES a (possibly loaded) index is"""
+    if index is None:
+        return "flat"
+    index = inner_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def pq_subquantizers(dimension: int, m: int) -> int:
+    """Largest sub-quantizer count <= m that divides the dimension"""
+    m = max(1, min(m, dimension))
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def nlist_for(ntotal: int, nlist: int) -> int:
+    """Cap the number of IVF lists so every list gets enough training points"""
+    return max(1, min(nlist, ntotal // MIN_POINTS_PER_LIST))
+
+
+def min_training_points(kind: str, nlist: int) -> int:
+    """Vectors needed before a trained index of this kind can be built"""
+    if kind == "ivf_flat":
+        return nlist * MIN_POINTS_PER_LIST
+    if kind == "ivf_pq":
+        return max(nlist * MIN_POINTS_PER_LIST, 2 ** PQ_NBITS)
+    return 0
+
+
+def create_index(kind: str, dimension: int, nlist: int = 256, pq_m: int = 16, hnsw_m: int = 32,
+                 ef_construction: int = 200):
+    """Build an empty inner-product index of the given kind (IVF kinds still need training)"""
+    if kind == "flat":
+        return faiss.IndexFlatIP(dimension)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        return index
+    quantizer = faiss.IndexFlatIP(dimension)
+    if kind == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+    if kind == "ivf_pq":
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_subquantizers(dimension, pq_m), PQ_NBITS,
+                                faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"Unknown FAISS index type '{kind}', expected one of {INDEX_TYPES}")
+
+
+def with_ids(index):
+    """Wrap an index so vectors are added and removed by 64-bit chunk id"""
+    return faiss.IndexIDMap2(index)
+
+
+def build_index(kind: str, vectors: np.ndarray, ids: np.ndarray, nlist: int = 256, pq_m: int = 16,
+                hnsw_m: int = 32):
+    """Create, train (if needed) and fill an id-mapped index of the given kind from normalized vectors"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = create_index(kind, vectors.shape[1], nlist_for(len(vectors), nlist), pq_m, hnsw_m)
+    if not index.is_trained:
+        index.train(vectors)
+    index = with_ids(index)
+    index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype=np.int64))
+    return index
+
+
+def all_vectors(index) -> Tuple[np.ndarray, np.ndarray]:
+    """(ids, vectors) stored in an index, the source for migrating it to another kind.
+
+    Indexes without an id map report their positions as ids.
+    """
+    if index is None or index.ntotal == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, index.d if index is not None else 0), dtype=np.float32)
+    inner = inner_index(index)
+    ids = faiss.vector_to_array(index.id_map) if inner is not index else np.arange(index.ntotal, dtype=np.int64)
+    ivf = index_kind(inner).startswith("ivf")
+    if ivf:
+        # IVF indexes can only reconstruct through a direct map (PQ gives approximations)
+        faiss.extract_index_ivf(inner).make_direct_map()
+    vectors = inner.reconstruct_n(0, inner.ntotal)
+    if ivf:
+        # An array direct map would block remove_ids
+        faiss.extract_index_ivf(inner).make_direct_map(False)
+    return ids, vectors
+
+
+def remove_ids(index, ids: np.ndarray):
+    """Physically remove vectors by chunk id; returns the index to use from now on.
+
+    HNSW graphs can't drop nodes, so those indexes are rebuilt from the remaining vectors.
+    """
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    if index is None or not len(ids):
+        return index
+    if index_kind(index) != "hnsw":
+        index.remove_ids(ids)
+        return index
+    stored_ids, vectors = all_vectors(index)
+    keep = ~np.isin(stored_ids, ids)
+    hnsw = inner_index(index)
+    rebuilt = with_ids(create_index("hnsw", index.d, hnsw_m=hnsw.hnsw.nb_neighbors(1),
+                                    ef_construction=hnsw.hnsw.efConstruction))
+    rebuilt.add_with_ids(vectors[keep], stored_ids[keep])
+    return rebuilt
+
+
+def exclude_ids(ids) -> Optional[faiss.IDSelector]:
+    """Selector matching every id except the given ones (None when there is nothing to exclude)"""
+    if not ids:
+        return None
+    batch = faiss.IDSelectorBatch(np.fromiter(ids, dtype=np.int64, count=len(ids)))
+    selector = faiss.IDSelectorNot(batch)
+    selector.referenced_objects = [batch]  # IDSelectorNot doesn't own the wrapped selector
+    return selector
+
+
+def include_ids(ids) -> faiss.IDSelector:
+    """Selector matching only the given ids"""
+    return faiss.IDSelectorBatch(np.fromiter(ids, dtype=np.int64, count=len(ids)))
+
+
+def search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                  sel: Optional[faiss.IDSelector] = None):
+    """Per-query search parameters, so callers can trade recall for latency without mutating the index.
+
+    ``sel`` restricts the search to matching ids (to skip tombstoned chunks or apply a metadata filter).
+    """
+    kind = index_kind(index)
+    if kind in ("ivf_flat", "ivf_pq") and (nprobe or sel):
+        ivf = faiss.extract_index_ivf(index)
+        return faiss.SearchParametersIVF(nprobe=min(nprobe or ivf.nprobe, ivf.nlist), sel=sel)
+    if kind == "hnsw" and (ef_search or sel):
+        return faiss.SearchParametersHNSW(efSearch=ef_search or inner_index(index).hnsw.efSearch, sel=sel)
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+    return None
@@ -0,0 +1,258 @@
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from config.settings import settings
+from utils.ingestion import ingestor
+from utils.vector_store import vector_store
+
+FINAL_STATUSES = ("completed", "failed")
+
+
+class IngestJobStore:
+    """SQLite record of ingestion jobs, their files and the last checkpoint of each file.
+
+    A file's ``checkpoint`` is the number of its chunks known to be saved in the vector store;
+    ``chunks`` counts the chunks streamed in the current run.
+    """
+    def __init__(self, path: str, max_jobs: int):
+        self.path = path
+        self.max_jobs = max_jobs
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS ingest_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT,
+                fraction REAL DEFAULT 0,
+                runs INTEGER DEFAULT 0,
+                error TEXT,
+                created REAL,
+                started REAL,
+                updated REAL,
+                finished REAL
+            );
+            CREATE INDEX IF NOT EXISTS ingest_jobs_created ON ingest_jobs(created);
+            CREATE TABLE IF NOT EXISTS ingest_files (
+                job_id TEXT,
+                position INTEGER,
+                filename TEXT,
+                path TEXT,
+                status TEXT DEFAULT 'queued',
+                chunks INTEGER DEFAULT 0,
+                checkpoint INTEGER DEFAULT 0,
+                report TEXT,
+                PRIMARY KEY (job_id, position)
+            );
+        """)
+
+    def create(self, job_id: str, files: List[Tuple[str, str]]):
+        """Record a queued job over (filename, path on disk) pairs"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO ingest_jobs (job_id, status, created, updated) VALUES (?, 'queued', ?, ?)",
+                (job_id, now, now))
+            self._conn.executemany(
+                "INSERT INTO ingest_files (job_id, position, filename, path) VALUES (?, ?, ?, ?)",
+                [(job_id, i, filename, path) for i, (filename, path) in enumerate(files)])
+
+    def start(self, job_id: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE ingest_jobs SET status = 'running', runs = runs + 1, started = ?, updated = ? WHERE job_id = ?",
+                (now, now, job_id))
+            self._conn.execute("UPDATE ingest_files SET chunks = 0 WHERE job_id = ?", (job_id,))
+
+    def progress(self, job_id: str, position: int, chunks: int, fraction: float, checkpoint: bool = False):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE ingest_jobs SET fraction = ?, updated = ? WHERE job_id = ?",
+                               (fraction, time.time(), job_id))
+            self._conn.execute(
+                "UPDATE ingest_files SET status = 'running', chunks = ?" + (", checkpoint = MAX(checkpoint, ?)" if checkpoint else "")
+                + " WHERE job_id = ? AND position = ?",
+                (chunks, chunks, job_id, position) if checkpoint else (chunks, job_id, position))
+
+    def finish(self, job_id: str, report: Dict[int, Dict[str, Any]] = None, error: str = None):
+        """Mark the job completed with per-file reports keyed by file position, or failed with an error"""
+        now = time.time()
+        with self._lock, self._conn:
+            for position, counts in (report or {}).items():
+                status = "failed" if "error" in counts else "skipped" if "skipped" in counts else "completed"
+                self._conn.execute(
+                    "UPDATE ingest_files SET status = ?, chunks = ?, checkpoint = ?, report = ? WHERE job_id = ? AND position = ?",
+                    (status, counts.get("chunks", 0), counts.get("chunks", 0), json.dumps(counts), job_id, position))
+            self._conn.execute(
+                "UPDATE ingest_jobs SET status = ?, error = ?, fraction = ?, updated = ?, finished = ? WHERE job_id = ?",
+                ("failed" if error else "completed", error, 0 if error else 1, now, now, job_id))
+        self.prune()
+
+    def files(self, job_id: str) -> List[Tuple[int, str, str]]:
+        """(position, filename, path) of each file of the job"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT position, filename, path FROM ingest_files WHERE job_id = ? ORDER BY position", (job_id,)).fetchall()
+
+    def unfinished(self) -> List[str]:
+        """Queued or interrupted jobs, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM ingest_jobs WHERE status NOT IN (?, ?) ORDER BY created", FINAL_STATUSES).fetchall()
+        return [job_id for job_id, in rows]
+
+    def _job(self, row) -> Dict[str, Any]:
+        job_id, status, fraction, runs, error, created, started, updated, finished = row
+        files = self._conn.execute(
+            "SELECT filename, status, chunks, checkpoint, report FROM ingest_files WHERE job_id = ? ORDER BY position",
+            (job_id,)).fetchall()
+        chunks = sum(file[2] for file in files)
+        elapsed = ((finished or time.time()) - started) if started else 0.0
+        return {
+            "job_id": job_id,
+            "status": status,
+            "fraction": round(fraction, 4),
+            "runs": runs,
+            "error": error,
+            "created": created,
+            "started": started,
+            "updated": updated,
+            "finished": finished,
+            "chunks": chunks,
+            "elapsed": round(elapsed, 2),
+            "chunks_per_sec": round(chunks / elapsed, 2) if elapsed > 0 else 0.0,
+            "files": [
+                {"filename": filename, "status": file_status, "chunks": file_chunks, "checkpoint": checkpoint,
+                 **({"report": json.loads(report)} if report else {})}
+                for filename, file_status, file_chunks, checkpoint, report in files
+            ],
+        }
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ingest_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return self._job(row) if row is not None else None
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM ingest_jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+            return [self._job(row) for row in rows]
+
+    def prune(self):
+        """Drop the oldest finished jobs beyond max_jobs"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM ingest_jobs WHERE job_id IN (SELECT job_id FROM ingest_jobs WHERE status IN (?, ?) "
+                "ORDER BY created DESC LIMIT -1 OFFSET ?)", FINAL_STATUSES + (self.max_jobs,))
+            self._conn.execute("DELETE FROM ingest_files WHERE job_id NOT IN (SELECT job_id FROM ingest_jobs)")
+
+
+class IngestJobRunner:
+    """Runs ingestion jobs one at a time on a background thread.
+
+    Uploads are kept under INGEST_UPLOAD_DIR until their job finishes, and the vector store is
+    saved every INGEST_CHECKPOINT_BATCHES batches. A job interrupted by a restart is resumed from
+    its files: chunks saved before the interruption are found by their content-hash ids and are
+    not embedded again.
+    """
+    def __init__(self, store: IngestJobStore = None, upload_dir: str = None, checkpoint_batches: int = None):
+        self.store = store or IngestJobStore(settings.INGEST_JOB_PATH, settings.INGEST_JOB_MAX_ENTRIES)
+        self.upload_dir = upload_dir or settings.INGEST_UPLOAD_DIR
+        self.checkpoint_batches = max(1, checkpoint_batches or settings.INGEST_CHECKPOINT_BATCHES)
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        """Start the worker and re-queue jobs that were queued or running when the process stopped"""
+        if self._thread is not None:
+            return
+        resumed = self.store.unfinished()
+        for job_id in resumed:
+            self._queue.put(job_id)
+        if resumed:
+            print(f"[IngestJobs] Resuming {len(resumed)} unfinished jobs")
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, files: List[Tuple[str, BinaryIO]]) -> str:
+        """Persist the uploads and queue a job over them; returns the job id"""
+        job_id = uuid.uuid4().hex
+        directory = os.path.join(self.upload_dir, job_id)
+        os.makedirs(directory, exist_ok=True)
+        stored = []
+        for i, (filename, stream) in enumerate(files):
+            path = os.path.join(directory, f"{i}_{os.path.basename(filename)}")
+            with open(path, "wb") as f:
+                shutil.copyfileobj(stream, f)
+            stored.append((filename, path))
+        self.store.create(job_id, stored)
+        self._queue.put(job_id)
+        return job_id
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            self._run(job_id)
+
+    def _run(self, job_id: str):
+        files = self.store.files(job_id)
+        self.store.start(job_id)
+        # A file is identified by its name in the store, so a later upload with the same name replaces an earlier one
+        positions = {filename: position for position, filename, _ in files}
+        report = {position: {"skipped": "replaced by a later upload with the same name"}
+                  for position, filename, _ in files if positions[filename] != position}
+        batches = 0
+
+        def on_progress(progress: Dict[str, Any]):
+            nonlocal batches
+            batches += 1
+            checkpoint = batches % self.checkpoint_batches == 0
+            if checkpoint:
+                # progress["chunks"] is upsert_stream()'s own count of the file's indexed chunks, so
+                # after this save it is exactly what the store holds, whatever the batch sizes
+                vector_store.save_index()
+            self.store.progress(job_id, positions[progress["file"]], progress["chunks"], progress["fraction"],
+                                checkpoint)
+
+        streams = {}  # position -> open upload
+        try:
+            with vector_store._lock:
+                # Pick up a clear or save made since the last job, so this job's saves build on it
+                vector_store.refresh()
+            for position, _, path in files:
+                if position not in report:
+                    streams[position] = open(path, "rb")
+            counts = ingestor.ingest({filename: streams[position] for filename, position in positions.items()},
+                                     progress=on_progress)
+            report.update((positions[filename], file_counts) for filename, file_counts in counts.items())
+        except Exception as e:
+            print(f"[IngestJobs] Job {job_id} failed: {e}")
+            self.store.finish(job_id, error=str(e))
+        else:
+            self.store.finish(job_id, report)
+        finally:
+            for stream in streams.values():
+                stream.close()
+            # Only a restart resumes a job; once it has finished its uploads are no longer needed
+            shutil.rmtree(os.path.join(self.upload_dir, job_id), ignore_errors=True)
+
+
+ingest_jobs = IngestJobRunner()
@@ -0,0 +1,174 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Tuple
+from config.settings import settings
+from utils.chunking import Chunk, chunk_file, pdf_page_chunks
+from utils.vector_store import vector_store
+
+Progress = Callable[[Dict[str, Any]], None]
+
+_END = object()
+
+
+class Ingestor:
+    """Parse -> chunk -> embed -> index pipeline for uploaded files.
+
+    A producer thread parses the files in order, PDFs page-parallel in a process pool and other
+    formats streamed, and hands bounded batches of chunks to the calling thread, which embeds and
+    indexes them through vector_store.upsert_stream() meanwhile. The queue between the two holds
+    at most INGEST_QUEUE_BATCHES batches, so parsing stalls when embedding falls behind.
+    """
+    def __init__(self):
+        self.processes = settings.INGEST_PROCESSES
+        self.pages_per_task = settings.INGEST_PDF_PAGES_PER_TASK
+        self.queue_batches = settings.INGEST_QUEUE_BATCHES
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a process that runs model and server threads is not safe
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(self.close)
+            return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def _page_ranges(self, path: str, pages: int) -> Iterator[List[Tuple[int, List[str]]]]:
+        """Chunked pages in document order, with at most two page ranges per worker in flight"""
+        ranges = [(start, min(start + self.pages_per_task, pages)) for start in range(0, pages, self.pages_per_task)]
+        if self.processes <= 1:
+            for start, stop in ranges:
+                yield pdf_page_chunks(path, start, stop)
+            return
+        pool = self._executor()
+        pending = deque()
+        try:
+            for start, stop in ranges:
+                pending.append(pool.submit(pdf_page_chunks, path, start, stop))
+                if len(pending) >= 2 * self.processes:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _pdf(self, stream: BinaryIO, state: Dict[str, float]) -> Iterator[Chunk]:
+        import PyPDF2
+        # Workers open the document by path, so the upload is spooled to disk once
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spool:
+            stream.seek(0)
+            shutil.copyfileobj(stream, spool)
+        try:
+            pages = len(PyPDF2.PdfReader(spool.name).pages)
+            n = 0
+            for results in self._page_ranges(spool.name, pages):
+                for page, texts in results:
+                    for text in texts:
+                        yield text, {"type": "pdf", "page": page, "chunk": n}
+                        n += 1
+                    state["fraction"] = (page + 1) / pages
+        finally:
+            os.remove(spool.name)
+
+    def _stream(self, filename: str, stream: BinaryIO, state: Dict[str, float]) -> Iterator[Chunk]:
+        size = stream.seek(0, os.SEEK_END) or 1
+        for chunk in chunk_file(filename, stream):
+            yield chunk
+            # The text decoder reads ahead in blocks, so this is the position of the parse frontier
+            state["fraction"] = min(stream.tell() / size, 1.0)
+
+    def _produce(self, files: Dict[str, BinaryIO], out: queue.Queue, stop: threading.Event):
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        batch_size = vector_store.ingest_batch_size
+        for filename, stream in files.items():
+            state = {"fraction": 0.0}
+            try:
+                if filename.lower().endswith(".pdf"):
+                    chunks = self._pdf(stream, state)
+                else:
+                    chunks = self._stream(filename, stream, state)
+                batch = []
+                for chunk in chunks:
+                    batch.append(chunk)
+                    if len(batch) >= batch_size:
+                        if not put((batch, state["fraction"])):
+                            chunks.close()
+                            return
+                        batch = []
+                if not put((batch, 1.0)) or not put((_END, 1.0)):
+                    return
+            except Exception as e:
+                if not put((e, 1.0)):
+                    return
+
+    def _consume(self, inbox: queue.Queue, state: Dict[str, float]) -> Iterator[Chunk]:
+        while True:
+            item, fraction = inbox.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            state["fraction"] = fraction
+            yield from item
+
+    def ingest(self, files: Dict[str, BinaryIO], progress: Progress = None) -> Dict[str, Dict[str, Any]]:
+        """Upsert every file's chunks into the vector store and save it; returns upsert_stream()'s report.
+
+        ``progress`` is called from the calling thread after each batch with the current file,
+        its chunk count so far and the overall fraction done. The count comes from upsert_stream(),
+        so it only covers chunks already in the store, however the producer batches them.
+        """
+        if not files:
+            return {}
+        start = time.time()
+        inbox = queue.Queue(maxsize=max(1, self.queue_batches))
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(files, inbox, stop), daemon=True)
+        producer.start()
+        try:
+            positions = {filename: i for i, filename in enumerate(files)}
+            states = {filename: {"fraction": 0.0} for filename in files}
+
+            def on_batch(filename: str, chunks: int):
+                if progress is not None:
+                    index, fraction = positions[filename], states[filename]["fraction"]
+                    progress({"file": filename, "file_index": index, "files": len(files), "chunks": chunks,
+                              "file_fraction": fraction, "fraction": (index + fraction) / len(files)})
+
+            # upsert_stream() consumes the files in the order the producer parses them
+            report = vector_store.upsert_stream(
+                {filename: self._consume(inbox, states[filename]) for filename in files}, progress=on_batch)
+            vector_store.save_index()
+        finally:
+            stop.set()
+            producer.join()
+        chunks = sum(counts["chunks"] for counts in report.values())
+        print(f"[Ingestion] {chunks} chunks from {len(files)} files in {time.time() - start:.2f}s")
+        return report
+
+
+ingestor = Ingestor()
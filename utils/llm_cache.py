@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from config.settings import settings
+
+
+def cache_key(prompt: str, params: Dict[str, Any]) -> str:
+    """Exact-match key over the prompt and the model parameters that affect the answer"""
+    body = json.dumps({"prompt": prompt, "params": params}, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class SemanticIndex:
+    """Small FAISS inner-product index over normalized prompt embeddings"""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.index = None
+        self.entries: List[Tuple[str, str]] = []  # row -> (params key, cache key)
+        self.vectors: List[np.ndarray] = []
+
+    def add(self, vector: np.ndarray, params_hash: str, key: str):
+        import faiss
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        if self.index is None:
+            self.index = faiss.IndexFlatIP(vector.shape[1])
+        self.entries.append((params_hash, key))
+        self.vectors.append(vector[0])
+        self.index.add(vector)
+        if len(self.entries) > self.max_entries:
+            # Flat indexes can't drop rows cheaply; rebuild from the newest half
+            keep = self.max_entries // 2
+            self.entries, self.vectors = self.entries[-keep:], self.vectors[-keep:]
+            self.index = faiss.IndexFlatIP(vector.shape[1])
+            self.index.add(np.stack(self.vectors))
+
+    def search(self, vector: np.ndarray, params_hash: str, k: int = 4) -> Optional[Tuple[str, float]]:
+        """Most similar cached prompt made with the same model params: (cache key, score)"""
+        import faiss
+        if self.index is None or self.index.ntotal == 0:
+            return None
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        scores, rows = self.index.search(vector, min(k, self.index.ntotal))
+        for score, row in zip(scores[0], rows[0]):
+            if row >= 0 and self.entries[row][0] == params_hash:
+                return self.entries[row][1], float(score)
+        return None
+
+
+class LLMCache:
+    """Response cache for LLM calls: in-process LRU, optional SQLite backend and semantic tier"""
+    def __init__(self, path: str = None, ttl: float = None, max_entries: int = None,
+                 semantic: bool = None, threshold: float = None):
+        self.path = settings.LLM_CACHE_PATH if path is None else path
+        self.ttl = settings.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = settings.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.semantic = settings.LLM_SEMANTIC_CACHE if semantic is None else semantic
+        self.threshold = settings.LLM_SEMANTIC_THRESHOLD if threshold is None else threshold
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._semantic_index = SemanticIndex(self.max_entries) if self.semantic else None
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0}
+        if self.path:
+            self._open()
+
+    def _open(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                params TEXT,
+                response TEXT,
+                embedding BLOB,
+                created REAL,
+                last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache(last_used);
+        """)
+        self.prune()
+        if self._semantic_index is not None:
+            # Rebuild the semantic tier from the most recently used entries on disk
+            rows = self._conn.execute(
+                "SELECT key, params, embedding FROM llm_cache WHERE embedding IS NOT NULL "
+                "ORDER BY last_used DESC LIMIT ?", (self.max_entries,)).fetchall()
+            for key, params_hash, blob in reversed(rows):
+                self._semantic_index.add(np.frombuffer(blob, dtype=np.float32), params_hash, key)
+            if rows:
+                print(f"[LLMCache] Loaded {len(rows)} semantic entries from {self.path}")
+
+    def prune(self):
+        """Drop expired entries and the least recently used ones beyond max_entries"""
+        if self._conn is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        response, created = entry
+        if time.time() - created > self.ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return response
+
+    def _memory_put(self, key: str, response: str, created: float):
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_read(self, key: str) -> Optional[Tuple[str, float]]:
+        """(response, created) from SQLite; blocking, so the async paths run it in a worker thread"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def _disk_write(self, key: str, params_hash: str, response: str, vector: Optional[np.ndarray], now: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, params, response, embedding, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, params_hash, response, vector.tobytes() if vector is not None else None, now, now))
+            self._writes += 1
+            prune = self._writes % 100 == 0
+        if prune:
+            self.prune()
+
+    async def _adisk_get(self, key: str) -> Optional[str]:
+        if self._conn is None:
+            return None
+        row = await asyncio.to_thread(self._disk_read, key)
+        if row is None:
+            return None
+        # The memory tier is only touched from the event loop
+        self._memory_put(key, row[0], row[1])
+        return row[0]
+
+    def get(self, prompt: str, params: Dict[str, Any]) -> Optional[str]:
+        """Exact-match lookup for synchronous callers"""
+        key = cache_key(prompt, params)
+        response = self._memory_get(key)
+        if response is not None:
+            self.metrics["memory_hits"] += 1
+            return response
+        row = self._disk_read(key) if self._conn is not None else None
+        if row is None:
+            return None
+        self._memory_put(key, row[0], row[1])
+        self.metrics["disk_hits"] += 1
+        return row[0]
+
+    async def aget(self, prompt: str, params: Dict[str, Any]) -> Optional[str]:
+        """Exact lookup, then the semantic tier when enabled; counts a miss if both fail"""
+        key = cache_key(prompt, params)
+        response = self._memory_get(key)
+        if response is not None:
+            self.metrics["memory_hits"] += 1
+            return response
+        response = await self._adisk_get(key)
+        if response is not None:
+            self.metrics["disk_hits"] += 1
+            return response
+        if self._semantic_index is not None and self._semantic_index.index is not None:
+            vector = await asyncio.to_thread(self._embed, prompt)
+            match = self._semantic_index.search(vector, params_key(params))
+            if match is not None and match[1] >= self.threshold:
+                response = self._memory_get(match[0]) or await self._adisk_get(match[0])
+                if response is not None:
+                    self.metrics["semantic_hits"] += 1
+                    print(f"[LLMCache] Semantic hit (similarity {match[1]:.3f})")
+        if response is None:
+            self.metrics["misses"] += 1
+        return response
+
+    async def aput(self, prompt: str, params: Dict[str, Any], response: str):
+        """Store a completed response in every enabled tier"""
+        key = cache_key(prompt, params)
+        now = time.time()
+        self._memory_put(key, response, now)
+        vector = None
+        if self._semantic_index is not None:
+            vector = np.asarray(await asyncio.to_thread(self._embed, prompt), dtype=np.float32)
+            self._semantic_index.add(vector, params_key(params), key)
+        if self._conn is not None:
+            # SQLite insert, commit and the periodic prune stay off the event loop
+            await asyncio.to_thread(self._disk_write, key, params_key(params), response, vector, now)
+        self.metrics["stores"] += 1
+
+    def _embed(self, text: str) -> np.ndarray:
+        from utils.embeddings import embedding_manager
+        return embedding_manager.embed_text(text)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.metrics["memory_hits"] + self.metrics["disk_hits"] + self.metrics["semantic_hits"]
+        lookups = hits + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "semantic_entries": len(self._semantic_index.entries) if self._semantic_index is not None else 0,
+        }
@@ -0,0 +1,119 @@
+import bisect
+from typing import Any, Dict, Iterable, List, Set
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+OPERATORS = RANGE_OPERATORS + ("eq", "in")
+
+
+def _indexable(value: Any) -> bool:
+    return isinstance(value, (str, int, float, bool))
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class MetadataIndex:
+    """Inverted index from metadata (field, value) to chunk ids, for filtered vector search.
+
+    Filters are dicts of field -> condition, all of which must hold:
+
+        {"filename": "report.pdf"}                  equality
+        {"type": ["pdf", "csv"]}                    any of
+        {"chunk": {"gte": 2, "lte": 5}}             numeric range (also gt / lt / eq / in)
+
+    Only scalar metadata values are indexed. Numeric fields keep a sorted list of their distinct
+    values, so range conditions only visit the values inside the range.
+    """
+    def __init__(self):
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {}
+        self._sorted: Dict[str, List[Any]] = {}  # field -> sorted numeric values, rebuilt lazily
+        self.size = 0
+
+    def add(self, chunk_id: int, meta: Dict[str, Any]):
+        for field, value in meta.items():
+            if not _indexable(value):
+                continue
+            values = self._postings.setdefault(field, {})
+            if value not in values:
+                values[value] = set()
+                self._sorted.pop(field, None)
+            values[value].add(chunk_id)
+        self.size += 1
+
+    def remove(self, chunk_id: int, meta: Dict[str, Any]):
+        for field, value in meta.items():
+            if not _indexable(value):
+                continue
+            ids = self._postings.get(field, {}).get(value)
+            if ids is None:
+                continue
+            ids.discard(chunk_id)
+            if not ids:
+                del self._postings[field][value]
+                self._sorted.pop(field, None)
+        self.size -= 1
+
+    def _any_of(self, field: str, values: Iterable[Any]) -> Set[int]:
+        postings = self._postings.get(field, {})
+        result = set()
+        for value in values:
+            result |= postings.get(value, set())
+        return result
+
+    def _range(self, field: str, condition: Dict[str, Any]) -> Set[int]:
+        ordered = self._sorted.get(field)
+        if ordered is None:
+            ordered = self._sorted[field] = sorted(v for v in self._postings.get(field, {}) if _numeric(v))
+        lo, hi = 0, len(ordered)
+        if "gte" in condition:
+            lo = max(lo, bisect.bisect_left(ordered, condition["gte"]))
+        if "gt" in condition:
+            lo = max(lo, bisect.bisect_right(ordered, condition["gt"]))
+        if "lte" in condition:
+            hi = min(hi, bisect.bisect_right(ordered, condition["lte"]))
+        if "lt" in condition:
+            hi = min(hi, bisect.bisect_left(ordered, condition["lt"]))
+        return self._any_of(field, ordered[lo:hi])
+
+    def _values(self, field: str, values: Any) -> List[Any]:
+        """Equality operands, checked so that a malformed filter is a ValueError rather than a TypeError"""
+        if not isinstance(values, (list, tuple)):
+            raise ValueError(f"Invalid filter for '{field}': 'in' expects a list of values")
+        for value in values:
+            if value is not None and not _indexable(value):
+                raise ValueError(f"Invalid filter for '{field}': {value!r} is not a string, number or boolean")
+        return list(values)
+
+    def _condition(self, field: str, condition: Any) -> Set[int]:
+        if isinstance(condition, (list, tuple)):
+            return self._any_of(field, self._values(field, condition))
+        if not isinstance(condition, dict):
+            value, = self._values(field, [condition])
+            return set(self._postings.get(field, {}).get(value, set()))
+        unknown = set(condition) - set(OPERATORS)
+        if unknown or not condition:
+            raise ValueError(f"Invalid filter for '{field}': expected operators from {OPERATORS}")
+        for op in RANGE_OPERATORS:
+            if op in condition and not _numeric(condition[op]):
+                raise ValueError(f"Invalid filter for '{field}': '{op}' expects a number, got {condition[op]!r}")
+        matches = []
+        if "eq" in condition:
+            matches.append(self._any_of(field, self._values(field, [condition["eq"]])))
+        if "in" in condition:
+            matches.append(self._any_of(field, self._values(field, condition["in"])))
+        if any(op in condition for op in RANGE_OPERATORS):
+            matches.append(self._range(field, condition))
+        return set.intersection(*matches)
+
+    def match(self, where: Dict[str, Any]) -> Set[int]:
+        """Ids of the chunks whose metadata satisfies every condition of the filter"""
+        if not isinstance(where, dict):
+            raise ValueError("Filter must be an object mapping metadata fields to conditions")
+        result = None
+        # Smallest candidate set first keeps the intersections cheap
+        for ids in sorted((self._condition(field, condition) for field, condition in where.items()), key=len):
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result if result is not None else set()
@@ -1,7 +1,11 @@
 import os
+import asyncio
+from typing import Any, AsyncIterator, Dict
 from langchain_openai import AzureChatOpenAI
 from langchain_core.language_models.base import BaseLanguageModel
 import streamlit as st
+from config.settings import settings
+from utils.llm_cache import LLMCache
 
 # Set Azure OpenAI environment variables
 os.environ["OPENAI_API_TYPE"] = "azure"
@@ -13,6 +17,15 @@ class ModelManager:
     """Manages Azure OpenAI GPT-4o model and connection"""
     def __init__(self):
         self._azure_llm = None
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY
+        self._semaphore = None
+        self.model_params = {
+            "deployment_name": "gpt-4o",
+            "model_name": "gpt-4o",
+            "openai_api_version": "2023-05-15",
+            "temperature": 0.0,
+        }
+        self.cache = LLMCache() if settings.LLM_CACHE_ENABLED else None
 
     @property
     def azure_llm(self) -> BaseLanguageModel:
@@ -20,11 +33,8 @@ class ModelManager:
         if self._azure_llm is None:
             try:
                 self._azure_llm = AzureChatOpenAI(
-                    deployment_name="gpt-4o",
-                    model_name="gpt-4o",
-                    openai_api_version="2023-05-15",
+                    **self.model_params,
                     openai_api_type="azure",
-                    temperature=0.0,
                     verbose=True
                 )
             except Exception as e:
@@ -33,6 +43,49 @@ class ModelManager:
                 raise
         return self._azure_llm
 
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Bounds the number of in-flight LLM calls per process"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def ainvoke(self, prompt: str) -> str:
+        """Run a completion without blocking the event loop and return its text"""
+        if self.cache is not None:
+            cached = await self.cache.aget(prompt, self.model_params)
+            if cached is not None:
+                return cached
+        async with self.semaphore:
+            response = await self.azure_llm.ainvoke(prompt)
+        text = response.content if hasattr(response, 'content') else str(response)
+        if self.cache is not None:
+            await self.cache.aput(prompt, self.model_params, text)
+        return text
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream completion tokens as they are generated; cached answers arrive as one chunk"""
+        if self.cache is not None:
+            cached = await self.cache.aget(prompt, self.model_params)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        async with self.semaphore:
+            async for chunk in self.azure_llm.astream(prompt):
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                if text:
+                    parts.append(text)
+                    yield text
+        # Only complete streams are cached; an abandoned or failed stream never gets here
+        if self.cache is not None and parts:
+            await self.cache.aput(prompt, self.model_params, "".join(parts))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """LLM concurrency limit and response cache hit rates of this process"""
+        return {"max_concurrency": self.max_concurrency,
+                "cache": self.cache.stats() if self.cache is not None else {"enabled": False}}
+
     def test_connection(self) -> bool:
         """Test if Azure OpenAI connection is working"""
         try:
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from config.settings import settings
+
+Result = Tuple[str, float, Dict[str, Any]]
+
+
+class Reranker:
+    """Optional cross-encoder re-ranking of retrieved chunks.
+
+    Retrieval over-fetches RERANK_CANDIDATES chunks cheaply; the cross-encoder then scores every
+    (query, chunk) pair in one batched forward pass and only the best RERANK_TOP_K go to the LLM.
+    Scores are cached per pair, so repeated queries only score chunks they haven't seen.
+    """
+    def __init__(self):
+        self._model = None
+        self._lock = threading.Lock()
+        self.enabled = settings.RERANK_ENABLED
+        self.model_name = settings.RERANKER_MODEL
+        self.device = settings.RERANKER_DEVICE
+        self.candidates = settings.RERANK_CANDIDATES
+        self.top_k = settings.RERANK_TOP_K
+        self.batch_size = settings.RERANK_BATCH_SIZE
+        self.cache_size = settings.RERANK_CACHE_SIZE
+        self._cache: "OrderedDict[bytes, float]" = OrderedDict()
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.failures = 0
+        self.timings: Dict[str, deque] = {}  # stage -> recent latencies in ms
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+
+    def _key(self, query: str, text: str) -> bytes:
+        return hashlib.sha256(f"{query}\0{text}".encode("utf-8")).digest()[:16]
+
+    def _record(self, stage: str, start: float):
+        self.timings.setdefault(stage, deque(maxlen=1000)).append((time.perf_counter() - start) * 1000)
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        """Cross-encoder relevance of each text to the query; uncached pairs are scored in one batch"""
+        start = time.perf_counter()
+        keys = [self._key(query, text) for text in texts]
+        scores = np.empty(len(texts), dtype=np.float32)
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    scores[i] = cached
+            self.cache_stats["hits"] += len(texts) - sum(len(rows) for rows in missing.values())
+            self.cache_stats["misses"] += len(missing)
+        self._record("cache", start)
+        if missing:
+            forward = time.perf_counter()
+            pairs = [(query, texts[rows[0]]) for rows in missing.values()]
+            predicted = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False,
+                                           convert_to_numpy=True)
+            self._record("score", forward)
+            with self._lock:
+                for (key, rows), value in zip(missing.items(), predicted):
+                    scores[rows] = value
+                    self._cache[key] = float(value)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        self._record("rerank", start)
+        return scores
+
+    def rerank(self, query: str, results: List[Result], k: int = None) -> List[Result]:
+        """The k best results by cross-encoder score (which replaces the retrieval score)"""
+        k = k or self.top_k
+        if not results:
+            return results
+        try:
+            self.model
+        except Exception as e:
+            # e.g. the model can't be downloaded; keep serving the retrieval order from now on
+            print(f"[Reranker] Disabled, the model failed to load: {e}")
+            self.enabled = False
+            return results[:k]
+        try:
+            scores = self.score(query, [text for text, _, _ in results])
+        except Exception as e:
+            # A single failed batch (timeout, out of memory, bad input) only affects this query
+            self.failures += 1
+            print(f"[Reranker] Scoring failed, keeping the retrieval order: {e}")
+            return results[:k]
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(results[i][0], float(scores[i]), results[i][2]) for i in order]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"enabled": self.enabled, "model": self.model_name, "candidates": self.candidates,
+                 "top_k": self.top_k, "cache_hits": self.cache_stats["hits"],
+                 "cache_misses": self.cache_stats["misses"], "cache_entries": len(self._cache),
+                 "failures": self.failures}
+        for stage, timings in list(self.timings.items()):
+            values = np.array(timings)
+            if len(values):
+                stats[f"{stage}_ms"] = {"count": len(values), "avg": round(float(values.mean()), 3),
+                                        "p50": round(float(np.percentile(values, 50)), 3),
+                                        "p95": round(float(np.percentile(values, 95)), 3)}
+        return stats
+
+
+reranker = Reranker()
@@ -0,0 +1,27 @@
+import asyncio
+from typing import Dict, Any, List
+
+
+class TaskEventBus:
+    """Fan-out of per-task progress events to any number of subscribers"""
+    def __init__(self):
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(task_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(task_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self._subscribers.pop(task_id, None)
+
+    def publish(self, task_id: str, event: Dict[str, Any]):
+        for queue in self._subscribers.get(task_id, []):
+            queue.put_nowait(event)
+
+    def has_subscribers(self, task_id: str) -> bool:
+        return bool(self._subscribers.get(task_id))
@@ -0,0 +1,233 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from config.settings import settings
+
+FINAL_STATUSES = ("completed", "failed")
+
+
+class TaskStore(ABC):
+    """Interface for orchestrator task state; step and artifact updates are append-only"""
+    def __init__(self, ttl: float, max_tasks: int):
+        self.ttl = ttl
+        self.max_tasks = max_tasks
+
+    @abstractmethod
+    def create(self, task_id: str, user_message: str, steps: List[Dict[str, Any]]):
+        ...
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def set_status(self, task_id: str, status: str):
+        ...
+
+    @abstractmethod
+    def set_step(self, task_id: str, index: int, status: str):
+        ...
+
+    @abstractmethod
+    def append_artifact(self, task_id: str, artifact: Dict[str, Any]):
+        ...
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class InMemoryTaskStore(TaskStore):
+    """Process-local store with LRU and TTL eviction"""
+    def __init__(self, ttl: float, max_tasks: int):
+        super().__init__(ttl, max_tasks)
+        self._tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _evict(self):
+        now = time.time()
+        # Entries are kept in LRU order, so expired ones cluster at the front
+        while self._tasks:
+            task_id, task = next(iter(self._tasks.items()))
+            if len(self._tasks) > self.max_tasks or now - task["updated"] > self.ttl:
+                self._tasks.popitem(last=False)
+            else:
+                break
+
+    def _touch(self, task_id: str) -> Optional[Dict[str, Any]]:
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        if time.time() - task["updated"] > self.ttl:
+            del self._tasks[task_id]
+            return None
+        self._tasks.move_to_end(task_id)
+        return task
+
+    def create(self, task_id: str, user_message: str, steps: List[Dict[str, Any]]):
+        now = time.time()
+        self._tasks[task_id] = {
+            "status": "pending",
+            "steps": [dict(step) for step in steps],
+            "artifacts": [],
+            "user_message": user_message,
+            "created": now,
+            "updated": now,
+        }
+        self._evict()
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self._touch(task_id)
+
+    def set_status(self, task_id: str, status: str):
+        task = self._touch(task_id)
+        if task is not None:
+            task["status"] = status
+            task["updated"] = time.time()
+
+    def set_step(self, task_id: str, index: int, status: str):
+        task = self._touch(task_id)
+        if task is not None and index < len(task["steps"]):
+            task["steps"][index]["status"] = status
+            task["updated"] = time.time()
+
+    def append_artifact(self, task_id: str, artifact: Dict[str, Any]):
+        task = self._touch(task_id)
+        if task is not None:
+            task["artifacts"].append(artifact)
+            task["updated"] = time.time()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+class SQLiteTaskStore(TaskStore):
+    """Durable store: one row per task plus an append-only event log per task.
+
+    Eviction is by last update time (oldest first) rather than last read, so that
+    /status reads never write.
+    """
+    def __init__(self, path: str, ttl: float, max_tasks: int):
+        super().__init__(ttl, max_tasks)
+        self.path = path
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                user_message TEXT,
+                status TEXT,
+                steps TEXT,
+                created REAL,
+                updated REAL
+            );
+            CREATE INDEX IF NOT EXISTS tasks_updated ON tasks(updated);
+            CREATE TABLE IF NOT EXISTS task_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT,
+                kind TEXT,
+                payload TEXT
+            );
+            CREATE INDEX IF NOT EXISTS task_events_task ON task_events(task_id, seq);
+        """)
+        self._writes = 0
+        self._recover()
+
+    def _recover(self):
+        # Workflows do not survive a restart; don't leave their tasks pending forever
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tasks SET status = 'failed' WHERE status NOT IN (?, ?)", FINAL_STATUSES)
+        self.prune()
+
+    def prune(self):
+        """Drop expired tasks, then the oldest ones beyond max_tasks"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE updated < ?", (time.time() - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM tasks WHERE task_id IN (SELECT task_id FROM tasks ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                (self.max_tasks,))
+            self._conn.execute("DELETE FROM task_events WHERE task_id NOT IN (SELECT task_id FROM tasks)")
+
+    def _append(self, task_id: str, kind: str, payload: Any, status: str = None):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET updated = ?" + (", status = ?" if status is not None else "") + " WHERE task_id = ?",
+                (time.time(), status, task_id) if status is not None else (time.time(), task_id))
+            if cursor.rowcount and kind != "status":
+                self._conn.execute(
+                    "INSERT INTO task_events (task_id, kind, payload) VALUES (?, ?, ?)",
+                    (task_id, kind, json.dumps(payload)))
+
+    def create(self, task_id: str, user_message: str, steps: List[Dict[str, Any]]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, user_message, status, steps, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (task_id, user_message, "pending", json.dumps(steps), now, now))
+        # Amortise eviction over many creates
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.prune()
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_message, status, steps, created, updated FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                return None
+            events = self._conn.execute(
+                "SELECT kind, payload FROM task_events WHERE task_id = ? ORDER BY seq", (task_id,)).fetchall()
+        user_message, status, steps, created, updated = row
+        if time.time() - updated > self.ttl:
+            return None
+        task = {
+            "status": status,
+            "steps": json.loads(steps),
+            "artifacts": [],
+            "user_message": user_message,
+            "created": created,
+            "updated": updated,
+        }
+        for kind, payload in events:
+            payload = json.loads(payload)
+            if kind == "step" and payload["index"] < len(task["steps"]):
+                task["steps"][payload["index"]]["status"] = payload["status"]
+            elif kind == "artifact":
+                task["artifacts"].append(payload)
+        return task
+
+    def set_status(self, task_id: str, status: str):
+        self._append(task_id, "status", None, status=status)
+
+    def set_step(self, task_id: str, index: int, status: str):
+        self._append(task_id, "step", {"index": index, "status": status})
+
+    def append_artifact(self, task_id: str, artifact: Dict[str, Any]):
+        self._append(task_id, "artifact", artifact)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+def create_task_store() -> TaskStore:
+    """Build the task store selected by TASK_STORE_BACKEND ("memory" or "sqlite")"""
+    backend = settings.TASK_STORE_BACKEND.lower()
+    if backend == "sqlite":
+        return SQLiteTaskStore(settings.TASK_STORE_PATH, settings.TASK_TTL, settings.TASK_MAX_ENTRIES)
+    if backend != "memory":
+        print(f"[TaskStore] Unknown TASK_STORE_BACKEND '{backend}', using in-memory store")
+    return InMemoryTaskStore(settings.TASK_TTL, settings.TASK_MAX_ENTRIES)
@@ -0,0 +1,64 @@
+import re
+from functools import lru_cache
+from typing import Iterator
+from config.settings import settings
+
+TOKEN_ENCODING = settings.TOKEN_ENCODING
+
+# Rough stand-in when the tiktoken encoding can't be loaded (e.g. offline): words and single
+# punctuation marks, which tracks BPE token counts closely for English prose
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        print(f"[Tokens] Encoding '{TOKEN_ENCODING}' unavailable, estimating token counts: {e}")
+        return None
+
+
+# Only texts up to this length are memoized, so the cache stays within a few MB however large the
+# units it is asked about (sentences and lines repeat; whole paragraphs rarely do)
+CACHED_TEXT_CHARS = 2048
+
+
+def count_tokens(text: str) -> int:
+    """Token count of a text; short texts are cached since chunking and prompt packing count them repeatedly"""
+    if len(text) <= CACHED_TEXT_CHARS:
+        return _cached_count(text)
+    return _count(text)
+
+
+@lru_cache(maxsize=8192)
+def _cached_count(text: str) -> int:
+    return _count(text)
+
+
+def _count(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(_APPROX_TOKEN.findall(text))
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def token_windows(text: str, size: int, overlap: int = 0) -> Iterator[str]:
+    """Consecutive slices of at most ``size`` tokens, each repeating the last ``overlap`` tokens of the previous"""
+    step = max(1, size - overlap)
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        for start in range(0, len(tokens), step):
+            yield encoding.decode(tokens[start:start + size])
+            if start + size >= len(tokens):
+                return
+        return
+    spans = [match.span() for match in _APPROX_TOKEN.finditer(text)]
+    for start in range(0, len(spans), step):
+        end = min(start + size, len(spans)) - 1
+        yield text[spans[start][0]:spans[end][1]]
+        if start + size >= len(spans):
+            return
+
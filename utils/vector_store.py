@@ -1,121 +1,944 @@
 import faiss
 import numpy as np
+import hashlib
 import pickle
+import json
 import os
-from typing import List, Tuple, Dict, Any
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from config.settings import settings
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from utils.embeddings import embedding_manager
+from utils.doc_store import DocStore, DocSegment, merge_segments, SEGMENT_FILES
+from utils.index_factory import (INDEX_TYPES, index_kind, create_index, build_index, all_vectors,
+                                 min_training_points, search_params, with_ids, remove_ids, exclude_ids,
+                                 include_ids)
+from utils.metadata_index import MetadataIndex
+from utils.bm25 import BM25Index
+
+# Version 1 manifests (positional rows, no chunk ids) are converted on load
+MANIFEST_VERSION = 2
+
+
+def _hash64(*parts: str) -> int:
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).digest()
+    # FAISS reserves negative ids (-1 marks an empty result slot)
+    return int.from_bytes(digest[:8], "little") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+def chunk_id(filename: str, text: str) -> int:
+    """Stable id of a chunk: the same text from the same file always maps to the same id"""
+    return _hash64(filename, text)
+
+
+def file_key(filename: str) -> int:
+    return _hash64(filename)
 
 
 class VectorStore:
-    """FAISS-based vector store for similarity search"""
+    """FAISS-based vector store for similarity search.
+
+    On disk the store is a base (FAISS index + doc segment) plus append-only delta segments
+    (vectors .npy + doc segment + deleted ids), tied together by a manifest that is swapped
+    atomically. Saves only write the new rows; a background compactor folds deltas into a new base.
+    Chunks are keyed by a content hash, so adding the same chunk twice is a no-op. Deleted chunks
+    are tombstoned (filtered out of searches) until compaction drops their vectors.
+    """
     def __init__(self):
         self.index = None
-        self.documents = []
-        self.metadata = []
         self.dimension = None
-        self.index_path = os.environ.get("FAISS_INDEX_PATH", "faiss.index")
+        self.index_path = settings.FAISS_INDEX_PATH
+        self.dir_path = os.path.dirname(self.index_path)
+        self.manifest_path = f"{self.index_path}.manifest.json"
+        # Files written by older versions, converted on first load
         self.metadata_path = f"{self.index_path}.metadata"
-        dir_path = os.path.dirname(self.index_path)
-        if dir_path:
-            os.makedirs(dir_path, exist_ok=True)
+        self.docs_prefix = f"{self.index_path}.docs"
+        self.version_path = f"{self.index_path}.version"
+        self.docs = DocStore()
+        self.index_type = settings.FAISS_INDEX_TYPE
+        if self.index_type not in INDEX_TYPES:
+            print(f"[VectorStore] Unknown FAISS_INDEX_TYPE '{self.index_type}', using flat")
+            self.index_type = "flat"
+        self.nlist = settings.FAISS_NLIST
+        self.pq_m = settings.FAISS_PQ_M
+        self.hnsw_m = settings.FAISS_HNSW_M
+        self.nprobe = settings.FAISS_NPROBE
+        self.ef_search = settings.FAISS_EF_SEARCH
+        self.compact_segments = settings.FAISS_COMPACT_SEGMENTS
+        self.compact_ratio = settings.FAISS_COMPACT_RATIO
+        self.bm25_k1 = settings.BM25_K1
+        self.bm25_b = settings.BM25_B
+        self.rrf_k = settings.RRF_K
+        self.hybrid_candidates = settings.HYBRID_CANDIDATES
+        self.tombstone_ratio = settings.FAISS_TOMBSTONE_RATIO
+        self.ingest_batch_size = settings.INGEST_BATCH_SIZE
+        self.generation = 0
+        self.manifest: Optional[Dict[str, Any]] = None
+        self.file_counts: Dict[str, int] = {}
+        self._pending_vectors: List[np.ndarray] = []
+        self._pending_deletes: List[int] = []  # ids of saved rows deleted since the last flush
+        self.tombstones: Set[int] = set()  # ids of deleted chunks whose vectors are still indexed
+        self._exclude = None  # cached selector skipping the tombstones
+        self._meta_index: Optional[MetadataIndex] = None  # built on the first filtered search
+        self._bm25: Optional[BM25Index] = None  # built on the first keyword/hybrid search
+        self.search_timings: Dict[str, deque] = {}  # query path -> recent durations in ms
+        self._needs_base = False
+        self._garbage: List[str] = []
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+        self._version_sig = None
+        if self.dir_path:
+            os.makedirs(self.dir_path, exist_ok=True)
         self.load_index()
 
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir_path, name)
+
     def _initialize_index(self, dimension: int):
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension)
+        # IVF kinds need training data, so they start flat and are upgraded once enough
+        # vectors have accumulated
+        kind = "hnsw" if self.index_type == "hnsw" else "flat"
+        self.index = with_ids(create_index(kind, dimension, hnsw_m=self.hnsw_m))
 
-    def add_documents(self, texts: List[str], metadata: List[Dict[str, Any]] = None):
-        if not texts:
+    def _maybe_upgrade(self):
+        if self.index_type == "flat" or index_kind(self.index) != "flat":
             return
+        if self.index.ntotal >= min_training_points(self.index_type, self.nlist):
+            self.migrate(self.index_type)
+
+    def migrate(self, kind: str):
+        """Rebuild the current index as another kind (e.g. flat -> ivf_pq); call save_index() to persist"""
+        with self._lock:
+            self.index_type = kind
+            if self.index is None or self.index.ntotal < min_training_points(kind, 1):
+                # Too few vectors to train yet; _maybe_upgrade() migrates once there are enough
+                print(f"[VectorStore] Not enough vectors to train {kind} yet, keeping {index_kind(self.index)}")
+                return
+            start = time.time()
+            old_kind = index_kind(self.index)
+            ids, vectors = all_vectors(self.index)
+            self.index = build_index(kind, vectors, ids, self.nlist, self.pq_m, self.hnsw_m)
+            # Delta segments only hold raw vectors, so the new index must be written as a base
+            self._needs_base = True
+            print(f"[VectorStore] Migrated {self.index.ntotal} vectors from {old_kind} to {kind} "
+                  f"in {time.time() - start:.2f}s")
+
+    def _fresh(self, ids: List[int]) -> List[int]:
+        """Positions of ids that are neither stored nor repeated earlier in the list"""
+        seen = set()
+        fresh = []
+        for i, chunk in enumerate(ids):
+            if chunk not in seen and self.docs.find(chunk) is None:
+                fresh.append(i)
+            seen.add(chunk)
+        return fresh
+
+    def _add_rows(self, vectors: np.ndarray, texts: List[str], metas: List[Dict[str, Any]], ids: List[int]):
+        if self.index is None:
+            self._initialize_index(vectors.shape[1])
+        self.index, add = self._revive(self.index, self.tombstones, ids)
+        self.index.add_with_ids(vectors[add], np.array(ids, dtype=np.int64)[add])
+        self._pending_vectors.append(vectors)
+        self.docs.append(texts, metas, ids, [file_key(meta.get("filename", "")) for meta in metas])
+        for chunk, text, meta in zip(ids, texts, metas):
+            self._index_chunk(chunk, text, meta)
+        self._maybe_upgrade()
+        for meta in metas:
+            filename = meta.get("filename")
+            if filename:
+                self.file_counts[filename] = self.file_counts.get(filename, 0) + 1
+
+    def add_documents(self, texts: List[str], metadata: List[Dict[str, Any]] = None) -> int:
+        """Add chunks that aren't stored yet; returns how many were new"""
+        if not texts:
+            return 0
         try:
-            embeddings = embedding_manager.embed_texts(texts)
-            if self.index is None:
-                self._initialize_index(embeddings.shape[1])
-            embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
-            self.index.add(embeddings.astype('float32'))
-            self.documents.extend(texts)
-            if metadata:
-                self.metadata.extend(metadata)
-            else:
-                self.metadata.extend([{"index": len(self.documents) + i} for i in range(len(texts))])
+            if not metadata:
+                metadata = [{"index": len(self.docs) + i} for i in range(len(texts))]
+            ids = [chunk_id(meta.get("filename", ""), text) for text, meta in zip(texts, metadata)]
+            with self._lock:
+                fresh = self._fresh(ids)
+            if not fresh:
+                return 0
+            # Only unseen chunks are embedded; already L2-normalized float32
+            embeddings = embedding_manager.embed_texts([texts[i] for i in fresh])
+            with self._lock:
+                # Another thread may have added some of them while embedding
+                keep = [j for j, i in enumerate(fresh) if self.docs.find(ids[i]) is None]
+                fresh = [fresh[j] for j in keep]
+                if fresh:
+                    self._add_rows(embeddings[keep], [texts[i] for i in fresh], [metadata[i] for i in fresh],
+                                   [ids[i] for i in fresh])
+            return len(fresh)
         except Exception as e:
             print(f"Failed to add documents: {e}")
             raise
 
-    def similarity_search(self, query: str, k: int = 5) -> List[Tuple[str, float, Dict[str, Any]]]:
+    def _revive(self, index, tombstones: Set[int], ids) -> Tuple[Any, np.ndarray]:
+        """Un-tombstone ids that are being added again, so an id is indexed once.
+
+        Returns the index and a mask of the ids whose vectors still have to be added. The old
+        vectors are dropped, except from HNSW, where removal rebuilds the whole graph: there the
+        old vector is kept instead (an id is a hash of its text, so it embeds the same) and the
+        graph is only rebuilt by the next full compaction.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        add = np.ones(len(ids), dtype=bool)
+        revived = tombstones.intersection(int(chunk) for chunk in ids)
+        if revived:
+            if index_kind(index) == "hnsw":
+                add = ~np.isin(ids, np.fromiter(revived, dtype=np.int64))
+            else:
+                index = remove_ids(index, np.fromiter(revived, dtype=np.int64))
+            tombstones.difference_update(revived)
+            self._exclude = None
+        return index, add
+
+    def delete(self, ids: List[int] = None, filename: str = None) -> int:
+        """Tombstone chunks by id and/or every chunk of a file; returns how many were deleted.
+
+        Searches skip tombstoned chunks right away; their vectors stay in the index until the
+        next compaction (started by save_index() once FAISS_TOMBSTONE_RATIO is exceeded).
+        """
+        with self._lock:
+            targets = set(ids or [])
+            if filename is not None:
+                targets.update(self.docs.live_ids(file_key(filename)))
+            rows = {}
+            for chunk in targets:
+                row = self.docs.find(chunk)
+                if row is not None:
+                    rows[chunk] = row
+            if not rows:
+                return 0
+            for chunk, row in rows.items():
+                meta = self.docs.meta(row)
+                self._unindex_chunk(chunk, meta)
+                name = meta.get("filename")
+                if name in self.file_counts:
+                    self.file_counts[name] -= 1
+                    if not self.file_counts[name]:
+                        del self.file_counts[name]
+            saved = len(self.docs) - self.docs.pending
+            # Unsaved rows are simply dropped; saved rows are marked dead and recorded for the next flush
+            dropped = self.docs.drop_pending(set(rows))
+            if dropped:
+                vectors = np.concatenate(self._pending_vectors)
+                self._pending_vectors = [np.delete(vectors, dropped, axis=0)]
+            for chunk, row in rows.items():
+                if row < saved:
+                    self.docs.kill(row)
+                    self._pending_deletes.append(chunk)
+            self.tombstones.update(rows)
+            self._exclude = None
+            return len(rows)
+
+    def upsert(self, files: Dict[str, Tuple[List[str], List[Dict[str, Any]]]]) -> Dict[str, Dict[str, int]]:
+        """Make the stored chunks of each file exactly the given ones.
+
+        Unchanged chunks are kept (and not re-embedded), chunks no longer present are deleted and
+        new ones are added. Returns per-file added/removed/unchanged counts.
+        """
+        return self.upsert_stream({filename: zip(texts, metas) for filename, (texts, metas) in files.items()})
+
+    def upsert_stream(self, files: Dict[str, Iterable[Tuple[str, Dict[str, Any]]]], batch_size: int = None,
+                      progress: Callable[[str, int], None] = None) -> Dict[str, Dict[str, Any]]:
+        """upsert() for lazily produced (text, metadata) chunks, e.g. from utils.chunking.chunk_file.
+
+        Chunks are embedded and added in batches of INGEST_BATCH_SIZE across all files, so only one
+        batch is held in memory. A file's stale chunks are deleted once its stream is exhausted; if
+        its stream fails, the error is reported and its old chunks are left in place.
+        ``progress(filename, chunks)`` is called after each batch with the number of the file's
+        chunks added (or found already stored) so far.
+        """
+        batch_size = batch_size or self.ingest_batch_size
+        report = {}
+        for filename, chunks in files.items():
+            old_ids = set(self.docs.live_ids(file_key(filename)))
+            seen = set()
+            moved = done = 0
+            error = None
+            chunks = iter(chunks)
+            while True:
+                try:
+                    batch = list(islice(chunks, batch_size))
+                except Exception as e:
+                    # Parsing failed part way: without the full file its stale chunks are unknown
+                    error = str(e)
+                    print(f"[VectorStore] Failed to read {filename}: {e}")
+                    break
+                if not batch:
+                    break
+                texts = [text for text, _ in batch]
+                metas = [{**meta, "filename": filename} for _, meta in batch]
+                ids = [chunk_id(filename, text) for text in texts]
+                # A kept chunk that moved (e.g. text inserted above it) would keep its old page/row/chunk
+                # metadata; it is deleted and added again, its embedding coming from the embedding cache
+                stale = self._moved(ids, metas, old_ids, seen)
+                if stale:
+                    self.delete(ids=stale)
+                    moved += len(stale)
+                self.add_documents(texts, metas)
+                seen.update(ids)
+                done += len(batch)
+                if progress is not None:
+                    progress(filename, done)
+            removed = self.delete(ids=list(old_ids - seen)) if error is None else 0
+            report[filename] = {"added": len(seen - old_ids), "removed": removed,
+                                "unchanged": len(seen & old_ids), "moved": moved, "chunks": len(seen)}
+            if error is not None:
+                report[filename]["error"] = error
+        return report
+
+    def _moved(self, ids: List[int], metas: List[Dict[str, Any]], old_ids: Set[int], seen: Set[int]) -> List[int]:
+        """Stored chunks of the batch whose metadata differs from their first occurrence in this upsert"""
+        moved, checked = [], set()
+        with self._lock:
+            for chunk, meta in zip(ids, metas):
+                if chunk not in old_ids or chunk in seen or chunk in checked:
+                    continue
+                checked.add(chunk)
+                row = self.docs.find(chunk)
+                if row is not None and self.docs.meta(row) != meta:
+                    moved.append(chunk)
+        return moved
+
+    @property
+    def documents(self):
+        """Lazy, list-like view of chunk texts"""
+        return self.docs.texts
+
+    @property
+    def metadata(self):
+        """Lazy, list-like view of chunk metadata"""
+        return self.docs.metas
+
+    def _index_chunk(self, chunk: int, text: str, meta: Dict[str, Any]):
+        """Keep the secondary indexes (when built) in step with an added chunk"""
+        if self._meta_index is not None:
+            self._meta_index.add(chunk, meta)
+        if self._bm25 is not None:
+            self._bm25.add(chunk, text)
+
+    def _unindex_chunk(self, chunk: int, meta: Dict[str, Any]):
+        if self._meta_index is not None:
+            self._meta_index.remove(chunk, meta)
+        if self._bm25 is not None:
+            self._bm25.remove(chunk)
+
+    def _metadata_index(self) -> MetadataIndex:
+        if self._meta_index is None:
+            start = time.time()
+            index = MetadataIndex()
+            for chunk, row in self.docs.live_rows():
+                index.add(chunk, self.docs.meta(row))
+            self._meta_index = index
+            print(f"[VectorStore] Built metadata index over {index.size} chunks in {time.time() - start:.2f}s")
+        return self._meta_index
+
+    def _bm25_index(self) -> BM25Index:
+        if self._bm25 is None:
+            start = time.time()
+            index = BM25Index(self.bm25_k1, self.bm25_b)
+            index.add_many((chunk, self.docs.text(row)) for chunk, row in self.docs.live_rows())
+            self._bm25 = index
+            print(f"[VectorStore] Built BM25 index over {len(index)} chunks ({index.terms} terms) "
+                  f"in {time.time() - start:.2f}s")
+        return self._bm25
+
+    @contextmanager
+    def _timed(self, path: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings = self.search_timings.setdefault(path, deque(maxlen=1000))
+            timings.append((time.perf_counter() - start) * 1000)
+
+    def _allowed(self, filter: Optional[Dict[str, Any]]) -> Optional[Set[int]]:
+        """Chunk ids matching a metadata filter, or None when there is no filter"""
+        if not filter:
+            return None
+        with self._lock:
+            return self._metadata_index().match(filter)
+
+    def _rows(self, hits: List[Tuple[int, float]]) -> List[Tuple[str, float, Dict[str, Any]]]:
+        results = []
+        for chunk, score in hits:
+            row = self.docs.find(chunk)
+            if row is not None:
+                # Only the k hit rows are read from the memory-mapped doc store
+                results.append((self.docs.text(row), score, self.docs.meta(row)))
+        return results
+
+    def _dense(self, query: str, k: int, nprobe: Optional[int], ef_search: Optional[int],
+               allowed: Optional[Set[int]]) -> List[Tuple[int, float]]:
+        query_embedding = embedding_manager.embed_text(query).reshape(1, -1)
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return []
+            if allowed is not None:
+                # The metadata index only holds live chunks, so this also skips the tombstones
+                sel = include_ids(allowed)
+                k = min(k, len(allowed))
+            else:
+                if self._exclude is None and self.tombstones:
+                    self._exclude = exclude_ids(self.tombstones)
+                sel = self._exclude if self.tombstones else None
+            params = search_params(self.index, nprobe or self.nprobe, ef_search or self.ef_search, sel=sel)
+            scores, labels = self.index.search(query_embedding, min(k, self.index.ntotal), params=params)
+        # IVF returns -1 for empty slots when the probed lists hold fewer than k vectors
+        return [(int(label), float(score)) for score, label in zip(scores[0], labels[0]) if label >= 0]
+
+    def similarity_search(self, query: str, k: int = 5, nprobe: int = None, ef_search: int = None,
+                          filter: Dict[str, Any] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Top-k chunks by embedding similarity, optionally restricted by a metadata filter (see MetadataIndex).
+
+        The filter is resolved to chunk ids through the inverted index and applied as a FAISS
+        IDSelector, so the index only scores matching vectors. Raises ValueError for a malformed filter.
+        """
         if self.index is None or self.index.ntotal == 0:
             return []
+        allowed = self._allowed(filter)
+        if allowed is not None and not allowed:
+            return []
         try:
-            query_embedding = embedding_manager.embed_text(query)
-            query_embedding = query_embedding / np.linalg.norm(query_embedding)
-            query_embedding = query_embedding.reshape(1, -1).astype('float32')
-            scores, indices = self.index.search(query_embedding, min(k, self.index.ntotal))
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx < len(self.documents):
-                    results.append((self.documents[idx], float(score), self.metadata[idx] if idx < len(self.metadata) else {}))
-            return results
+            with self._timed("dense"):
+                hits = self._dense(query, k, nprobe, ef_search, allowed)
+            with self._lock:
+                return self._rows(hits)
         except Exception as e:
             print(f"Search failed: {e}")
             return []
 
+    def keyword_search(self, query: str, k: int = 5,
+                       filter: Dict[str, Any] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Top-k chunks by BM25 score; finds exact identifiers, numbers and names that embeddings blur"""
+        allowed = self._allowed(filter)
+        if allowed is not None and not allowed:
+            return []
+        with self._timed("sparse"), self._lock:
+            return self._rows(self._bm25_index().search(query, k, allowed))
+
+    def hybrid_search(self, query: str, k: int = 5, filter: Dict[str, Any] = None,
+                      candidates: int = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Dense and BM25 rankings fused by reciprocal rank (score = sum of 1 / (RRF_K + rank)).
+
+        Each path contributes its top HYBRID_CANDIDATES; the returned score is the fused one.
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        allowed = self._allowed(filter)
+        if allowed is not None and not allowed:
+            return []
+        depth = max(k, candidates or self.hybrid_candidates)
+        try:
+            with self._timed("hybrid"):
+                with self._timed("dense"):
+                    dense = self._dense(query, depth, None, None, allowed)
+                with self._timed("sparse"), self._lock:
+                    sparse = self._bm25_index().search(query, depth, allowed)
+                with self._timed("fusion"):
+                    fused: Dict[int, float] = {}
+                    for ranking in (dense, sparse):
+                        for rank, (chunk, _) in enumerate(ranking, start=1):
+                            fused[chunk] = fused.get(chunk, 0.0) + 1.0 / (self.rrf_k + rank)
+                    top = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+                with self._lock:
+                    return self._rows(top)
+        except Exception as e:
+            print(f"Search failed: {e}")
+            return []
+
+    def _stat_version(self):
+        """Identity of the manifest; os.replace gives every save a new inode"""
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, base: Optional[Dict[str, Any]], segments: List[Dict[str, Any]]):
+        manifest = {
+            # Identifies this store across clears, so readers never mistake a segment from a
+            # recreated store for one they already applied
+            "store_id": self.manifest["store_id"] if self.manifest else uuid.uuid4().hex,
+            "version": MANIFEST_VERSION,
+            "generation": self.generation + 1,
+            "dimension": self.dimension,
+            "index_type": index_kind(self.index),
+            "base": base,
+            "segments": segments,
+            "files": self.file_counts,
+            # Files superseded by the previous compaction, deleted by the next one
+            "garbage": self._garbage,
+        }
+        with open(self.manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+        self.generation += 1
+        self.manifest = manifest
+        self._version_sig = self._stat_version()
+
+    def _next_name(self, kind: str) -> str:
+        return f"{os.path.basename(self.index_path)}.{kind}-{self.generation + 1:06d}"
+
+    def _save_array(self, path: str, array: np.ndarray):
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+
+    def _flush(self):
+        """Append unsaved rows and deletions as a delta segment and publish it in a new manifest"""
+        if not self.docs.pending and not self._pending_deletes:
+            return
+        name = self._next_name("seg")
+        vectors = np.concatenate(self._pending_vectors) if self._pending_vectors \
+            else np.zeros((0, self.dimension), dtype=np.float32)
+        self._save_array(self._path(name) + ".npy", vectors)
+        entry = {"name": name}
+        if self._pending_deletes:
+            # (id, row position) pairs: a delete applies to rows stored before that position.
+            # Deletions in a flush always target earlier segments, so the position is 0
+            deletes = np.zeros((len(self._pending_deletes), 2), dtype=np.int64)
+            deletes[:, 0] = self._pending_deletes
+            self._save_array(self._path(name) + ".del.npy", deletes)
+            entry["deletes"] = len(deletes)
+        entry["count"] = self.docs.flush(self._path(name))
+        self._pending_vectors = []
+        self._pending_deletes = []
+        base = self.manifest["base"] if self.manifest else None
+        segments = (self.manifest["segments"] if self.manifest else []) + [entry]
+        self._write_manifest(base, segments)
+
     def save_index(self):
         try:
-            if self.index is not None:
-                faiss.write_index(self.index, self.index_path)
-                with open(self.metadata_path, 'wb') as f:
-                    pickle.dump({
-                        'documents': self.documents,
-                        'metadata': self.metadata,
-                        'dimension': self.dimension
-                    }, f)
+            with self._lock:
+                if self.index is None:
+                    return
+                self._flush()
+                if self._needs_base:
+                    self.compact()
+                elif self.dead_ratio() > self.tombstone_ratio:
+                    self._start_compactor(full=True)
+                elif len(self._small_tail()) >= self.compact_segments:
+                    self._start_compactor()
         except Exception as e:
             print(f"Failed to save vector store: {e}")
 
+    def _small_tail(self) -> List[Dict[str, Any]]:
+        """Trailing delta segments that have not been through a merge yet"""
+        tail = []
+        for segment in reversed(self.manifest["segments"] if self.manifest else []):
+            if segment.get("level", 0):
+                break
+            tail.insert(0, segment)
+        return tail
+
+    def dead_ratio(self) -> float:
+        """Fraction of indexed vectors that belong to deleted chunks"""
+        if self.index is None or not self.index.ntotal:
+            return 0.0
+        return len(self.tombstones) / self.index.ntotal
+
+    def _start_compactor(self, full: bool = False):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, kwargs={"full": full},
+                                           name="vector-store-compactor", daemon=True)
+        self._compactor.start()
+
+    def compact(self, full: bool = True):
+        """Merge delta segments; fold everything into a new base when full or when the deltas
+        have grown past FAISS_COMPACT_RATIO of the base.
+
+        Rewriting the base only after geometric growth, and merging small deltas only once,
+        keeps the bytes written per ingested chunk roughly constant.
+        """
+        try:
+            with self._lock:
+                self._flush()
+                if self.manifest is None or self.index is None or not self.manifest["segments"] and not full:
+                    return
+                store_id = self.manifest["store_id"]
+                base = self.manifest["base"]
+                deltas = sum(segment["count"] for segment in self.manifest["segments"])
+                if full or self._needs_base or deltas >= self.compact_ratio * (base["count"] if base else 0):
+                    if self.tombstones:
+                        # The new base holds live rows only, so tombstoned vectors go now
+                        self.index = remove_ids(self.index, np.fromiter(self.tombstones, dtype=np.int64))
+                        self.tombstones = set()
+                        self._exclude = None
+                    plan = ("base", list(self.manifest["segments"]), list(self.docs.segments),
+                            faiss.serialize_index(self.index))
+                    self._needs_base = False
+                else:
+                    tail = self._small_tail()
+                    if len(tail) < 2:
+                        return
+                    plan = ("merge", tail, self.docs.segments[-len(tail):], None)
+                # Rows deleted so far are dropped from a new base; later deletes are re-marked afterwards
+                dead = [set(segment.dead) for segment in plan[2]]
+                name = self._next_name(plan[0])
+            # The slow part (rewriting rows) happens without holding the lock, so ingestion
+            # and queries continue meanwhile
+            start = time.time()
+            kind, covered, doc_segments, index_bytes = plan
+            merged_deletes = 0
+            if kind == "base":
+                with open(self._path(name) + ".faiss.tmp", "wb") as f:
+                    f.write(index_bytes.tobytes())
+                os.replace(self._path(name) + ".faiss.tmp", self._path(name) + ".faiss")
+                count = merge_segments(doc_segments, self._path(name), skip=dead)
+            else:
+                vectors = np.concatenate([np.load(self._path(segment["name"]) + ".npy") for segment in covered])
+                self._save_array(self._path(name) + ".npy", vectors)
+                # A merge keeps every row, so the deletions travel along, shifted to merged positions
+                deletes, shift = [], 0
+                for segment in covered:
+                    if segment.get("deletes"):
+                        records = np.load(self._path(segment["name"]) + ".del.npy")
+                        records[:, 1] += shift
+                        deletes.append(records)
+                    shift += segment["count"]
+                if deletes:
+                    merged_deletes = sum(len(records) for records in deletes)
+                    self._save_array(self._path(name) + ".del.npy", np.concatenate(deletes))
+                count = merge_segments(doc_segments, self._path(name))
+            with self._lock:
+                segments = self.manifest["segments"] if self.manifest else []
+                first = segments.index(covered[0]) if covered and covered[0] in segments else 0
+                if self.manifest is None or self.manifest["store_id"] != store_id \
+                        or segments[first:first + len(covered)] != covered:
+                    # Cleared, or compacted by someone else, while merging
+                    self._remove(self._path(name))
+                    return
+                offset = 1 if self.manifest["base"] else 0
+                # Files from the previous compaction are deleted only now, giving readers that
+                # loaded the older manifest a full cycle to finish
+                for garbage in self._garbage:
+                    self._remove(self._path(garbage))
+                self._garbage = [segment["name"] for segment in covered]
+                if kind == "base":
+                    merged = self.docs.replace_segments(0, len(doc_segments), self._path(name))
+                    for segment, before in zip(doc_segments, dead):
+                        for j in segment.dead - before:
+                            row = merged.find(int(segment.ids[j]))
+                            if row >= 0:
+                                merged.dead.add(row)
+                    if base:
+                        self._garbage += [base["docs"], base["index"]]
+                    # Segments flushed while merging stay as deltas on top of the new base
+                    self._write_manifest({"index": name + ".faiss", "docs": name, "count": count},
+                                         segments[len(covered):])
+                else:
+                    self.docs.replace_segments(offset + first, len(covered), self._path(name))
+                    merged = {"name": name, "count": count, "level": 1,
+                              "replaces": [segment["name"] for segment in covered]}
+                    if merged_deletes:
+                        merged["deletes"] = merged_deletes
+                    self._write_manifest(self.manifest["base"],
+                                         segments[:first] + [merged] + segments[first + len(covered):])
+            print(f"[VectorStore] Compacted {len(covered)} segments into {name} ({count} chunks) "
+                  f"in {time.time() - start:.2f}s")
+        except Exception as e:
+            print(f"[VectorStore] Compaction failed: {e}")
+
+    def _remove(self, path: str):
+        for suffix in ("", ".npy", ".del.npy", ".faiss") + SEGMENT_FILES:
+            if os.path.isfile(path + suffix):
+                os.remove(path + suffix)
+
     def load_index(self):
         try:
-            if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
-                self.index = faiss.read_index(self.index_path)
-                with open(self.metadata_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.documents = data['documents']
-                    self.metadata = data['metadata']
-                    self.dimension = data['dimension']
+            # Stat before reading: a save that lands mid-load leaves the signature stale,
+            # so the next refresh() loads again
+            sig = self._stat_version()
+            manifest = self._read_manifest()
+            if manifest is None and os.path.exists(self.index_path):
+                self._convert_legacy()
+                sig = self._stat_version()
+            elif manifest is not None and manifest.get("version", 1) < MANIFEST_VERSION:
+                self._convert_v1(manifest)
+                sig = self._stat_version()
+            elif manifest is not None:
+                self._load_manifest(manifest)
+            self._version_sig = sig
         except Exception as e:
             print(f"Could not load existing vector store: {e}")
 
-    def clear(self):
-        self.index = None
-        self.documents = []
-        self.metadata = []
-        self.dimension = None
-        for path in [self.index_path, self.metadata_path]:
+    def _apply_segment(self, index, docs: DocStore, tombstones: Set[int], entry: Dict[str, Any],
+                       incremental: bool = False):
+        """Add one delta segment (rows and deletions) to an index and doc store; returns the index.
+
+        ``incremental`` also updates this store's secondary indexes (refresh of the loaded store).
+        """
+        path = self._path(entry["name"])
+        start = len(docs)
+        segment = docs.open_segment(path)
+        if entry.get("deletes"):
+            for chunk, position in np.load(path + ".del.npy"):
+                # A merged segment can delete its own earlier rows; otherwise the target is older
+                j = segment.find(int(chunk), before=int(position))
+                if j >= 0:
+                    segment.dead.add(j)
+                    continue
+                row = docs.find(int(chunk), before=start)
+                if row is not None:
+                    if incremental:
+                        self._unindex_chunk(int(chunk), docs.meta(row))
+                    docs.kill(row)
+                    tombstones.add(int(chunk))
+        keep = np.array([j for j in range(len(segment)) if j not in segment.dead], dtype=np.int64)
+        if len(keep):
+            ids = np.asarray(segment.ids)[keep]
+            index, add = self._revive(index, tombstones, ids)
+            index.add_with_ids(np.load(path + ".npy")[keep][add], ids[add])
+            if incremental:
+                for j in keep:
+                    self._index_chunk(int(segment.ids[j]), segment.text_bytes(j).decode("utf-8"),
+                                      json.loads(segment.meta_bytes(j)))
+        return index
+
+    def _load_manifest(self, manifest: Dict[str, Any]):
+        if manifest.get("version", 1) < MANIFEST_VERSION:
+            raise ValueError("store has not been converted to chunk ids yet")
+        docs = DocStore()
+        base = manifest["base"]
+        if base:
+            index = faiss.read_index(self._path(base["index"]))
+            docs.open_segment(self._path(base["docs"]))
+        else:
+            # Without a base there is no trained index to load; exact search over the deltas
+            # is used until the writer publishes one
+            kind = "hnsw" if manifest["index_type"] == "hnsw" else "flat"
+            index = with_ids(create_index(kind, manifest["dimension"], hnsw_m=self.hnsw_m))
+        tombstones = set()
+        for segment in manifest["segments"]:
+            index = self._apply_segment(index, docs, tombstones, segment)
+        if index.ntotal != docs.live + len(tombstones):
+            raise ValueError(f"index has {index.ntotal} vectors but doc store has {docs.live} live rows "
+                             f"and {len(tombstones)} tombstones")
+        with self._lock:
+            self.index = index
+            self.docs = docs
+            self.dimension = index.d
+            self.manifest = manifest
+            self.generation = manifest["generation"]
+            self.file_counts = dict(manifest.get("files", {}))
+            self._garbage = list(manifest.get("garbage", []))
+            self._pending_vectors = []
+            self._pending_deletes = []
+            self.tombstones = tombstones
+            self._exclude = None
+            self._meta_index = None
+            self._bm25 = None
+
+    def _apply_segments(self, manifest: Dict[str, Any]) -> bool:
+        """Catch up with a newer manifest on the same base without a full reload.
+
+        New delta segments are added to the index; merged segments only swap the doc segments
+        they replace, since their vectors are already in the index. Returns False when a full
+        load is needed (new base, or a change this can't follow).
+        """
+        loaded = self.manifest
+        if loaded is None or self.index is None or loaded.get("store_id") != manifest.get("store_id") \
+                or loaded["base"] != manifest["base"]:
+            return False
+        known = [segment["name"] for segment in loaded["segments"]]
+        swaps, adds, i = [], [], 0
+        for segment in manifest["segments"]:
+            replaces = segment.get("replaces", [])
+            if i < len(known) and segment["name"] == known[i]:
+                i += 1
+            elif replaces and known[i:i + len(replaces)] == replaces:
+                swaps.append((i, len(replaces), segment["name"]))
+                i += len(replaces)
+            elif i == len(known):
+                adds.append(segment)
+            else:
+                return False
+        if i != len(known):
+            return False
+        offset = 1 if loaded["base"] else 0
+        with self._lock:
+            # Right to left, so earlier positions stay valid while swapping
+            for position, count, name in reversed(swaps):
+                self.docs.replace_segments(offset + position, count, self._path(name))
+            for segment in adds:
+                self.index = self._apply_segment(self.index, self.docs, self.tombstones, segment, incremental=True)
+            self._exclude = None
+            self.manifest = manifest
+            self.generation = manifest["generation"]
+            self.file_counts = dict(manifest.get("files", {}))
+            self._garbage = list(manifest.get("garbage", []))
+        return True
+
+    def _rebuild(self, vectors: np.ndarray, texts: List[str], metas: List[Dict[str, Any]]):
+        """Write positional rows from an older layout as a fresh, id-keyed base (duplicates dropped)"""
+        with self._lock:
+            generation = self.generation
+            self._reset()
+            # Keep counting generations, so new file names never collide with the old ones
+            self.generation = generation
+            ids = [chunk_id(meta.get("filename", ""), text) for text, meta in zip(texts, metas)]
+            fresh = self._fresh(ids)
+            if fresh:
+                self._add_rows(np.ascontiguousarray(vectors[fresh], dtype=np.float32), [texts[i] for i in fresh],
+                               [metas[i] for i in fresh], [ids[i] for i in fresh])
+                self._needs_base = True
+                self.save_index()
+            print(f"[VectorStore] Converted {len(texts)} chunks to chunk ids "
+                  f"({len(texts) - len(fresh)} duplicates dropped)")
+
+    def _convert_legacy(self):
+        """One-off conversion of stores written by older versions (pickle sidecar or single doc segment)"""
+        index = faiss.read_index(self.index_path)
+        if os.path.exists(self.docs_prefix + ".offsets.npy"):
+            segment = DocSegment(self.docs_prefix)
+            texts = [segment.text_bytes(i).decode("utf-8") for i in range(len(segment))]
+            metas = [json.loads(segment.meta_bytes(i)) for i in range(len(segment))]
+        elif os.path.exists(self.metadata_path):
+            with open(self.metadata_path, 'rb') as f:
+                data = pickle.load(f)
+            texts, metas = data['documents'], data['metadata']
+        else:
+            return
+        self._rebuild(all_vectors(index)[1], texts, metas)
+        for path in (self.metadata_path, self.docs_prefix + ".json", self.version_path, self.index_path):
             if os.path.exists(path):
                 os.remove(path)
+        self._remove(self.docs_prefix)
+
+    def _convert_v1(self, manifest: Dict[str, Any]):
+        """One-off conversion of a segment store written before rows carried chunk ids"""
+        vectors, segments = [], []
+        base = manifest["base"]
+        if base:
+            vectors.append(all_vectors(faiss.read_index(self._path(base["index"])))[1])
+            segments.append(DocSegment(self._path(base["docs"])))
+        for entry in manifest["segments"]:
+            vectors.append(np.load(self._path(entry["name"]) + ".npy"))
+            segments.append(DocSegment(self._path(entry["name"])))
+        texts = [segment.text_bytes(i).decode("utf-8") for segment in segments for i in range(len(segment))]
+        metas = [json.loads(segment.meta_bytes(i)) for segment in segments for i in range(len(segment))]
+        self.generation = manifest["generation"]
+        self._rebuild(np.concatenate(vectors) if vectors else np.zeros((0, manifest["dimension"])), texts, metas)
+        if self.manifest is None and os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        old = [segment.prefix for segment in segments] + [self._path(name) for name in manifest.get("garbage", [])]
+        if base:
+            old.append(self._path(base["index"]))
+        for path in old:
+            self._remove(path)
+
+    def refresh(self) -> bool:
+        """Pick up saves (or a clear) from other processes; costs one stat when nothing changed.
+
+        Holds the store lock throughout, so concurrent refreshes (and this process's own saves,
+        which swap the manifest file before updating self.manifest) never apply a segment twice.
+        """
+        with self._lock:
+            sig = self._stat_version()
+            if sig == self._version_sig:
+                return False
+            manifest = self._read_manifest()
+            if manifest is None:
+                # Manifest gone: the store was cleared elsewhere
+                self._reset()
+                self._version_sig = None
+                print("[VectorStore] Store was cleared, dropped in-memory index")
+                return True
+            loaded = self.manifest
+            if loaded is not None and loaded.get("store_id") == manifest.get("store_id") \
+                    and manifest["generation"] <= loaded["generation"]:
+                # Already applied, e.g. by a refresh that got the lock first
+                self._version_sig = sig
+                return False
+            try:
+                if self._apply_segments(manifest):
+                    print(f"[VectorStore] Applied delta segments up to generation {self.generation} "
+                          f"({len(self.docs)} chunks)")
+                else:
+                    self._load_manifest(manifest)
+                    print(f"[VectorStore] Reloaded generation {self.generation} ({len(self.docs)} chunks)")
+                self._version_sig = sig
+            except Exception as e:
+                # Usually a compaction racing with this load; the next refresh retries
+                print(f"[VectorStore] Refresh failed, keeping generation {self.generation}: {e}")
+            return True
+
+    def _reset(self):
+        with self._lock:
+            self.index = None
+            self.docs = DocStore()
+            self.dimension = None
+            self.generation = 0
+            self.manifest = None
+            self.file_counts = {}
+            self._pending_vectors = []
+            self._pending_deletes = []
+            self.tombstones = set()
+            self._exclude = None
+            self._meta_index = None
+            self._bm25 = None
+            self._needs_base = False
+
+    def clear(self):
+        with self._lock:
+            # Manifest first, so readers never see it pointing at deleted files
+            if os.path.exists(self.manifest_path):
+                os.remove(self.manifest_path)
+            self._reset()
+            self._version_sig = None
+            self._garbage = []
+            prefix = os.path.basename(self.index_path)
+            for name in os.listdir(self.dir_path or "."):
+                if name == prefix or name.startswith(prefix + "."):
+                    os.remove(self._path(name))
 
     def get_stats(self) -> Dict[str, Any]:
-        # If no metadata, return 0
-        if not self.metadata:
-            return {
-                "total_documents": 0,
-                "index_size": self.index.ntotal if self.index else 0,
-                "dimension": self.dimension,
-                "index_exists": self.index is not None
-            }
-        # Count unique filenames in metadata as number of documents, fallback to chunk count if no filenames
-        filenames = [meta.get("filename") for meta in self.metadata if meta.get("filename")]
-        if filenames:
-            unique_files = set(filenames)
-            total_documents = len(unique_files)
-        else:
-            total_documents = len(self.documents)
+        # Count unique filenames as number of documents, fallback to chunk count if no filenames.
+        # Per-file counts are kept in the manifest, so no chunk metadata is decoded here
+        total_documents = len(self.file_counts) or self.docs.live
         return {
             "total_documents": total_documents,
             "index_size": self.index.ntotal if self.index else 0,
             "dimension": self.dimension,
-            "index_exists": self.index is not None
+            "index_exists": self.index is not None,
+            "index_type": index_kind(self.index),
+            "live_chunks": self.docs.live,
+            "dead_chunks": len(self.tombstones),
+            "dead_ratio": round(self.dead_ratio(), 4),
+            "generation": self.generation,
+            "segments": len(self.manifest["segments"]) if self.manifest else 0,
+            "bm25_terms": self._bm25.terms if self._bm25 is not None else 0,
+            "search_ms": self.search_latency(),
         }
 
+    def search_latency(self) -> Dict[str, Dict[str, float]]:
+        """Recent per-path query latencies (dense, sparse, fusion, hybrid) in ms"""
+        latency = {}
+        for path, timings in list(self.search_timings.items()):
+            values = np.array(timings)
+            if len(values):
+                latency[path] = {"count": len(values), "avg": round(float(values.mean()), 3),
+                                 "p50": round(float(np.percentile(values, 50)), 3),
+                                 "p95": round(float(np.percentile(values, 95)), 3)}
+        return latency
+
 
 # Export the vector_store instance
-vector_store = VectorStore()
\ No newline at end of file
+vector_store = VectorStore()